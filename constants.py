@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Constants and configuration for the Robot Simulator"""
 
+import math
 from enum import Enum
 
 
@@ -119,9 +120,80 @@ ACTION_DURATIONS = {
     'bow': 4, 'wave': 3.5, 'default': 2
 }
 
+ACTION_CATEGORIES = {
+    'dance': ('dance', 'dance_two', 'dance_three', 'dance_four', 'dance_five',
+              'dance_six', 'dance_seven', 'dance_eight', 'dance_nine', 'dance_ten'),
+    'combat': ('kung_fu', 'wing_chun', 'kick', 'punch', 'right_kick', 'left_kick',
+               'right_uppercut', 'left_uppercut', 'right_shot_fast', 'left_shot_fast'),
+    'exercise': ('push_ups', 'sit_ups', 'squat', 'squat_up', 'weightlifting', 'chest',
+                 'jumping_jacks'),
+    'movement': ('go_forward', 'go_backward', 'turn_left', 'turn_right', 'right_move_fast',
+                 'left_move_fast', 'back_fast', 'stepping', 'twist'),
+    'basic': ('wave', 'bow', 'jump', 'celebrate', 'think', 'stand_up_back',
+              'stand_up_front', 'idle'),
+    'domain': ('domain_unlimited_void', 'domain_malevolent_shrine', 'domain_self_embodiment',
+               'domain_authentic_love', 'domain_idle_death_gamble', 'domain_yuji_itadori',
+               'domain_chimera_shadow_garden', 'domain_time_cell_moon_palace'),
+    'technique': ('lapse_blue', 'reversal_red', 'hollow_purple'),
+}
+
+# Video clip (under VIDEO_BUCKET_URL) switched to when a Domain/Technique action starts
+ACTION_VIDEOS = {
+    'domain_unlimited_void': 'domain_unlimited_void.mp4',
+    'domain_malevolent_shrine': 'domain_malevolent_shrine.mp4',
+    'domain_self_embodiment': 'domain_self_embodiment.mp4',
+    'domain_authentic_love': 'domain_authentic_love.mp4',
+    'domain_idle_death_gamble': 'domain_idle_death_gamble.mp4',
+    'domain_yuji_itadori': 'domain_yuji_itadori.mp4',
+    'domain_chimera_shadow_garden': 'domain_chimera_shadow_garden.mp4',
+    'domain_time_cell_moon_palace': 'domain_time_cell_moon_palace.mp4',
+    'lapse_blue': 'technique_lapse_blue.mp4',
+    'reversal_red': 'technique_reversal_red.mp4',
+    'hollow_purple': 'technique_hollow_purple.mp4',
+}
+
+# Mapping from Simulation/Domain actions to standard Real Robot actions
+# (Using only short combat/gesture moves - no long dances)
+# NOTE: Actions MUST start with "robot_" to be recognized by Text Control tools
+REAL_ROBOT_ACTION_MAP = {
+    'domain_unlimited_void': 'robot_twist',            # Gojo: Rhythmic focus
+    'domain_malevolent_shrine': 'robot_kung_fu',       # Sukuna: Sharp martial arts
+    'domain_self_embodiment': 'robot_right_shot_fast', # Mahito: Powerful direct strike
+    'domain_authentic_love': 'robot_bow',              # Yuta: Respectful bow
+    'domain_idle_death_gamble': 'robot_wave',          # Hakari: Rhythmic waving
+    'domain_yuji_itadori': 'robot_sit_ups',            # Yuji: Physical training (Sit ups)
+    'domain_chimera_shadow_garden': 'robot_weightlifting', # Megumi: Shadow strength (Weightlifting)
+    'domain_time_cell_moon_palace': 'robot_left_shot_fast', # Naoya: Frame-by-frame strike (Left Shot)
+    'lapse_blue': 'robot_left_uppercut',               # Blue: Left hand attraction strike
+    'reversal_red': 'robot_right_uppercut',            # Red: Right hand strike
+    'hollow_purple': 'robot_chest',                    # Purple: 2-hand chest expansion blast
+}
+
 MOVEMENT_ACTIONS = {
     HumanoidAction.GO_FORWARD, HumanoidAction.GO_BACKWARD,
     HumanoidAction.TURN_LEFT, HumanoidAction.TURN_RIGHT,
     HumanoidAction.RIGHT_MOVE_FAST, HumanoidAction.LEFT_MOVE_FAST,
     HumanoidAction.BACK_FAST
 }
+
+# Pose change over a whole movement action in the robot's own frame:
+# (distance to the robot's left, distance forward, yaw change in radians).
+# Mirrors the client animations in static/js/robot_animations.js
+MOVEMENT_KINEMATICS = {
+    HumanoidAction.GO_FORWARD: (0, 30, 0),
+    HumanoidAction.GO_BACKWARD: (0, -30, 0),
+    HumanoidAction.BACK_FAST: (0, -35, 0),
+    HumanoidAction.RIGHT_MOVE_FAST: (25, 0, 0),  # User's right = robot's left
+    HumanoidAction.LEFT_MOVE_FAST: (-25, 0, 0),
+    HumanoidAction.TURN_LEFT: (0, 0, -math.pi / 2),
+    HumanoidAction.TURN_RIGHT: (0, 0, math.pi / 2),
+}
+
+# Robot footprint radius on the ground plane (torso plus arms is ~28 units wide)
+ROBOT_RADIUS = 14
+
+# Cell size of the per-session spatial hash; about one collision diameter
+SPATIAL_CELL_SIZE = 30
+
+# Largest ?radius= accepted by the neighbor and collision queries
+MAX_QUERY_RADIUS = 1000
@@ -63,6 +63,7 @@ fi
 
 # Update IMAGE_NAME with the provided values
 IMAGE_NAME="${REGION}-docker.pkg.dev/${PROJECT_ID}/${REPO_NAME}/${SERVICE_NAME}"
+SNAPSHOT_BUCKET="${PROJECT_ID}-robot-sessions"
 
 echo -e "${BLUE}🚀 Starting deployment of Humanoid Robot Simulator to Cloud Run${NC}"
 echo -e "${YELLOW}Project ID: ${PROJECT_ID}${NC}"
@@ -111,6 +112,12 @@ docker build -t $IMAGE_NAME .
 echo -e "${BLUE}📤 Pushing image to Container Registry...${NC}"
 docker push $IMAGE_NAME
 
+# Session snapshots are kept in a Cloud Storage bucket mounted at /data
+if ! gcloud storage buckets describe gs://$SNAPSHOT_BUCKET >/dev/null 2>&1; then
+    echo -e "${BLUE}🪣 Creating snapshot bucket gs://$SNAPSHOT_BUCKET...${NC}"
+    gcloud storage buckets create gs://$SNAPSHOT_BUCKET --location=$REGION
+fi
+
 # Deploy to Cloud Run
 echo -e "${BLUE}🚀 Deploying to Cloud Run...${NC}"
 gcloud run deploy $SERVICE_NAME \
@@ -125,7 +132,10 @@ gcloud run deploy $SERVICE_NAME \
     --min-instances 0 \
     --timeout 3600 \
     --concurrency 80 \
-    --set-env-vars="FLASK_ENV=production" \
+    --execution-environment gen2 \
+    --add-volume name=session-snapshots,type=cloud-storage,bucket=$SNAPSHOT_BUCKET \
+    --add-volume-mount volume=session-snapshots,mount-path=/data \
+    --set-env-vars="FLASK_ENV=production,SNAPSHOT_PATH=/data/robot-sessions.db,SNAPSHOT_JOURNAL_MODE=delete" \
     --session-affinity \
     --quiet
 
@@ -6,6 +6,8 @@ from flask_socketio import emit, disconnect, join_room, leave_room
 from flask import request
 import logging
 
+from server.serializers import JSON, MSGPACK, negotiate_encoding, pack
+
 # Configure logging based on environment variable
 log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
 numeric_level = getattr(logging, log_level, logging.INFO)
@@ -16,11 +18,59 @@ logger = logging.getLogger(__name__)
 
 
 class WebSocketHandlers:
-    def __init__(self, socketio, sessions_manager):
+    def __init__(self, socketio, sessions_manager, action_queues, camera_controls,
+                 run_actions, event_log):
         self.socketio = socketio
         self.sessions_manager = sessions_manager
+        self.action_queues = action_queues
+        self.camera_controls = camera_controls
+        self.run_actions = run_actions  # callable(session_key, commands) -> (result, status)
+        self.event_log = event_log
+        self.client_encodings = {}  # sid -> negotiated snapshot encoding
         self.setup_handlers()
 
+    def _emit_snapshot(self, session_key):
+        """Send the requesting client every robot's state and its version"""
+        # Flush pending changes first so the snapshot is the latest version
+        self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
+        # Resuming from this event replays at worst events the snapshot has
+        event_id = self.event_log.last_id()
+        seq, robot_states = self.sessions_manager.state_snapshot(session_key)
+        logger.debug(
+            f"✅ Emitting 'robot_states' event v{seq} with {len(robot_states)} robots"
+        )
+        meta = {"seq": seq, "event_id": event_id, "epoch": self.event_log.epoch}
+        # A tuple is sent as two arguments; clients reading one still get the states
+        if self.client_encodings.get(request.sid) == MSGPACK:
+            # One binary attachment instead of a JSON-encoded tree
+            emit("robot_states", (pack(robot_states), dict(meta, encoding=MSGPACK)))
+            return
+        emit("robot_states", (robot_states, meta))
+
+    def _replay(self, session_key, epoch, last_event_id, state_seq=None):
+        """Send a rejoining client the events after ``last_event_id``.
+
+        Deltas the client's state version ``state_seq`` already includes are
+        skipped. Returns False if the events are no longer in the log; the
+        client then needs a snapshot.
+        """
+        missed = self.event_log.since(session_key, epoch, last_event_id)
+        if missed is None:
+            logger.debug(f"⚠️ Client {request.sid} missed evicted events; sending a snapshot")
+            return False
+        if isinstance(state_seq, int):
+            missed = [
+                entry for entry in missed
+                if entry[1] != "robot_states_delta" or entry[2][0]["seq"] > state_seq
+            ]
+        logger.debug(f"🔁 Replaying {len(missed)} missed events to client {request.sid}")
+        if missed:
+            emit("batch", {"events": [
+                {"event": event, "args": list(self.event_log.stamp(args, event_id))}
+                for event_id, event, args in missed
+            ]})
+        return True
+
     def setup_handlers(self):
         @self.socketio.on("connect")
         def handle_connect():
@@ -29,6 +79,8 @@ class WebSocketHandlers:
         @self.socketio.on("disconnect")
         def handle_disconnect():
             logger.debug(f"🔌 Client disconnected: {request.sid}")
+            self.sessions_manager.remove_client(request.sid)
+            self.client_encodings.pop(request.sid, None)
 
         @self.socketio.on("join_session")
         def handle_join_session(data):
@@ -42,19 +94,24 @@ class WebSocketHandlers:
                 disconnect()
                 return
 
-            join_room(f"session_{session_key}")
-            client_id = request.sid
-            session = self.sessions_manager.get_or_create_session(session_key)
-            session["clients"].add(client_id)
-
-            robots = self.sessions_manager.get_session_robots(session_key)
-            robot_states = {
-                robot_id: robot.to_dict() for robot_id, robot in robots.items()
-            }
-            logger.debug(
-                f"✅ Emitting 'robot_states' event with {len(robot_states)} robots"
-            )
-            emit("robot_states", robot_states)
+            # Join and replay under the log lock, so each event reaches the
+            # client exactly once: in the replay or live
+            with self.event_log.locked(session_key):
+                join_room(f"session_{session_key}")
+                resumed = "last_event_id" in data and self._replay(
+                    session_key, data.get("epoch"), data["last_event_id"], data.get("seq")
+                )
+            self.sessions_manager.add_client(session_key, request.sid)
+            if "low_latency" in data:
+                self.sessions_manager.set_low_latency(session_key, data["low_latency"])
+            encoding = negotiate_encoding(data.get("encoding", JSON))
+            if encoding == JSON:
+                self.client_encodings.pop(request.sid, None)
+            else:
+                self.client_encodings[request.sid] = encoding
+
+            if not resumed:
+                self._emit_snapshot(session_key)
 
         @self.socketio.on("get_robot_states")
         def handle_get_robot_states(data=None):
@@ -68,14 +125,9 @@ class WebSocketHandlers:
                 )
                 return
 
-            robots = self.sessions_manager.get_session_robots(session_key)
-            robot_states = {
-                robot_id: robot.to_dict() for robot_id, robot in robots.items()
-            }
-            logger.debug(
-                f"✅ Emitting 'robot_states' event with {len(robot_states)} robots"
-            )
-            emit("robot_states", robot_states)
+            if "seq" in data:
+                logger.debug(f"⚠️ Client {request.sid} resyncing after a gap at v{data['seq']}")
+            self._emit_snapshot(session_key)
 
         @self.socketio.on("robot_action")
         def handle_robot_action(data):
@@ -94,12 +146,8 @@ class WebSocketHandlers:
             try:
                 robots = self.sessions_manager.get_session_robots(session_key)
 
-                if robot_id == "all":
-                    for robot in robots.values():
-                        robot.start_action(action)
-                    result = {"status": "success", "robot_id": "all", "action": action}
-                elif robot_id in robots:
-                    robots[robot_id].start_action(action)
+                if robot_id == "all" or robot_id in robots:
+                    self.sessions_manager.start_action(session_key, robot_id, action)
                     result = {
                         "status": "success",
                         "robot_id": robot_id,
@@ -114,15 +162,7 @@ class WebSocketHandlers:
 
                 logger.debug(f"✅ Emitting 'action_result' event: {result}")
                 emit("action_result", result)
-                robot_states = {
-                    robot_id: robot.to_dict() for robot_id, robot in robots.items()
-                }
-                logger.debug(
-                    f"📡 Broadcasting 'robot_states' event to session_{session_key} with {len(robot_states)} robots"
-                )
-                self.socketio.emit(
-                    "robot_states", robot_states, room=f"session_{session_key}"
-                )
+                self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
 
             except Exception as e:
                 error_result = {"status": "error", "message": str(e)}
@@ -155,8 +195,7 @@ class WebSocketHandlers:
 
                 if robot_id == "all":
                     # Run action on all robots
-                    for robot in robots.values():
-                        robot.start_action(action_name)
+                    self.sessions_manager.start_action(session_key, "all", action_name)
                     result = {
                         "status": "success",
                         "action_name": action_name,
@@ -165,7 +204,7 @@ class WebSocketHandlers:
                     }
                 elif robot_id in robots:
                     # Run action on specific robot
-                    robots[robot_id].start_action(action_name)
+                    self.sessions_manager.start_action(session_key, robot_id, action_name)
                     result = {
                         "status": "success",
                         "action_name": action_name,
@@ -184,15 +223,7 @@ class WebSocketHandlers:
                 emit("action_result", result)
 
                 # Broadcast updated robot states to all clients in the session
-                robot_states = {
-                    robot_id: robot.to_dict() for robot_id, robot in robots.items()
-                }
-                logger.debug(
-                    f"📡 Broadcasting 'robot_states' event to session_{session_key} with {len(robot_states)} robots"
-                )
-                self.socketio.emit(
-                    "robot_states", robot_states, room=f"session_{session_key}"
-                )
+                self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
 
             except Exception as e:
                 error_result = {
@@ -204,6 +235,87 @@ class WebSocketHandlers:
                 logger.debug(f"❌ Emitting 'action_result' error event: {error_result}")
                 emit("action_result", error_result)
 
+        @self.socketio.on("batch_actions")
+        def handle_batch_actions(data):
+            """Start several robots' actions at once, all or none"""
+            logger.debug(f"🎬 Handling batch_actions event with data: {data}")
+            session_key = data.get("session_key")
+            if not session_key:
+                logger.debug("❌ Emitting 'error' event: Session key required")
+                emit("error", {"message": "Session key required for batch_actions event"})
+                return
+
+            try:
+                result, _ = self.run_actions(session_key, data.get("commands"))
+                result["status"] = "success" if result["success"] else "error"
+            except Exception as e:
+                result = {"success": False, "status": "error", "error": str(e)}
+            logger.debug(f"✅ Emitting 'batch_actions_result' event: {result}")
+            emit("batch_actions_result", result)
+
+        @self.socketio.on("queue_action")
+        def handle_queue_action(data):
+            """Append actions to a robot's server-side queue"""
+            logger.debug(f"📋 Handling queue_action event with data: {data}")
+            session_key = data.get("session_key")
+            if not session_key:
+                logger.debug("❌ Emitting 'error' event: Session key required")
+                emit("error", {"message": "Session key required for queue_action event"})
+                return
+
+            robot_id = data.get("robot_id", "all")
+            actions = data.get("actions") or (
+                [data["action"]] if data.get("action") else []
+            )
+            if not actions:
+                emit("queue_result", {"status": "error", "message": "Action is required"})
+                return
+
+            try:
+                queues = self.action_queues.enqueue(session_key, robot_id, actions)
+                emit("queue_result", {"status": "success", "robot_id": robot_id, "queues": queues})
+            except Exception as e:
+                emit("queue_result", {"status": "error", "robot_id": robot_id, "message": str(e)})
+
+        @self.socketio.on("clear_queue")
+        def handle_clear_queue(data):
+            """Drop a robot's pending queued actions"""
+            logger.debug(f"🗑️ Handling clear_queue event with data: {data}")
+            session_key = data.get("session_key")
+            if not session_key:
+                logger.debug("❌ Emitting 'error' event: Session key required")
+                emit("error", {"message": "Session key required for clear_queue event"})
+                return
+
+            robot_id = data.get("robot_id", "all")
+            try:
+                queues = self.action_queues.clear(session_key, robot_id)
+                emit("queue_result", {"status": "success", "robot_id": robot_id, "queues": queues})
+            except Exception as e:
+                emit("queue_result", {"status": "error", "robot_id": robot_id, "message": str(e)})
+
+        @self.socketio.on("preempt_action")
+        def handle_preempt_action(data):
+            """Clear a robot's queue and interrupt its current action"""
+            logger.debug(f"⏭️ Handling preempt_action event with data: {data}")
+            session_key = data.get("session_key")
+            if not session_key:
+                logger.debug("❌ Emitting 'error' event: Session key required")
+                emit("error", {"message": "Session key required for preempt_action event"})
+                return
+
+            robot_id = data.get("robot_id", "all")
+            action = data.get("action")
+            if not action:
+                emit("queue_result", {"status": "error", "message": "Action is required"})
+                return
+
+            try:
+                queues = self.action_queues.preempt(session_key, robot_id, action)
+                emit("queue_result", {"status": "success", "robot_id": robot_id, "queues": queues})
+            except Exception as e:
+                emit("queue_result", {"status": "error", "robot_id": robot_id, "message": str(e)})
+
         @self.socketio.on("reset_session")
         def handle_reset_session(data):
             logger.debug(f"🔄 Handling reset_session event with data: {data}")
@@ -216,20 +328,12 @@ class WebSocketHandlers:
                 return
 
             try:
-                robots = self.sessions_manager.reset_session(session_key)
-                robot_states = {
-                    robot_id: robot.to_dict() for robot_id, robot in robots.items()
-                }
+                self.sessions_manager.reset_session(session_key)
 
                 result = {"status": "success", "message": "Session reset successfully"}
                 logger.debug(f"✅ Emitting 'reset_result' event: {result}")
                 emit("reset_result", result)
-                logger.debug(
-                    f"📡 Broadcasting 'robot_states' event to session_{session_key} with {len(robot_states)} robots"
-                )
-                self.socketio.emit(
-                    "robot_states", robot_states, room=f"session_{session_key}"
-                )
+                self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
 
             except Exception as e:
                 error_result = {"status": "error", "message": str(e)}
@@ -385,15 +489,14 @@ class WebSocketHandlers:
                 return
 
             try:
-                # Emit to all clients in the session
-                self.socketio.emit(
-                    "camera_control",
-                    data,
-                    room=f"session_{session_key}",
-                )
+                # Merged with other deltas and forwarded to the session at a capped rate
+                if not self.camera_controls.submit(session_key, data):
+                    logger.debug(f"❌ Dropped malformed camera_control: {data}")
+                    emit("error", {"message": "Invalid camera_control command"})
+                    return
 
                 logger.debug(
-                    f"✅ Camera control command broadcast for session {session_key}"
+                    f"✅ Camera control command accepted for session {session_key}"
                 )
             except Exception as e:
                 logger.error(f"❌ Error broadcasting camera control: {e}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Precomputed registry of everything known about each robot action"""
+
+import sys
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Tuple
+
+from constants import (
+    ACTION_CATEGORIES,
+    ACTION_DURATIONS,
+    ACTION_VIDEOS,
+    MOVEMENT_ACTIONS,
+    MOVEMENT_KINEMATICS,
+    REAL_ROBOT_ACTION_MAP,
+    HumanoidAction,
+)
+
+
+class ActionSpec(NamedTuple):
+    """Immutable metadata of one HumanoidAction"""
+
+    action: HumanoidAction
+    name: str
+    code: int  # position in HumanoidAction, used by RobotTable's action column
+    duration: float
+    category: str
+    video: Optional[str]  # clip file name, for actions that switch the video
+    hardware_action: str  # action sent to the real robot
+    is_movement: bool
+    kinematics: Optional[Tuple[float, float, float]]  # see MOVEMENT_KINEMATICS
+
+
+def _build_specs():
+    categories = {
+        name: category for category, names in ACTION_CATEGORIES.items() for name in names
+    }
+    specs = {}
+    for code, action in enumerate(HumanoidAction):
+        name = sys.intern(action.value)
+        spec = ActionSpec(
+            action=action,
+            name=name,
+            code=code,
+            duration=ACTION_DURATIONS.get(name, ACTION_DURATIONS['default']),
+            category=categories.get(name, 'basic'),
+            video=ACTION_VIDEOS.get(name),
+            hardware_action=REAL_ROBOT_ACTION_MAP.get(name, name),
+            is_movement=action in MOVEMENT_ACTIONS,
+            kinematics=MOVEMENT_KINEMATICS.get(action),
+        )
+        # Looked up by member, by name and by upper-case name alike
+        specs[action] = specs[name] = specs[name.upper()] = spec
+    return MappingProxyType(specs)
+
+
+ACTION_SPECS = _build_specs()
+SPECS_BY_CODE = tuple(ACTION_SPECS[action] for action in HumanoidAction)
+ACTION_NAMES = tuple(spec.name for spec in SPECS_BY_CODE)
+IDLE_SPEC = ACTION_SPECS[HumanoidAction.IDLE]
+
+
+def action_spec(action):
+    """Return the ActionSpec of a HumanoidAction or action name, IDLE if unknown"""
+    spec = ACTION_SPECS.get(action)
+    if spec is None and isinstance(action, str):
+        # Mixed-case names are rare; only they pay for the lower()
+        spec = ACTION_SPECS.get(action.lower())
+    return spec or IDLE_SPEC
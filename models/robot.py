@@ -1,70 +1,226 @@
 #!/usr/bin/env python3
 """Robot 3D model and related functionality"""
 
+import json
+import math
 import time
-import threading
-from constants import HumanoidAction, ACTION_DURATIONS, MOVEMENT_ACTIONS
+from constants import HumanoidAction, MOVEMENT_KINEMATICS
+from models.action_spec import action_spec
+from server.scheduler import get_scheduler
+
+BODY_PARTS = ('head', 'torso', 'left_arm', 'right_arm', 'left_leg', 'right_leg')
+
+
+def parse_action(action):
+    """Resolve an action name to a HumanoidAction, falling back to IDLE"""
+    return action_spec(action).action
+
+
+def action_duration(action):
+    """Duration in seconds of a HumanoidAction"""
+    return action_spec(action).duration
+
+
+def movement_delta(action, yaw):
+    """World-frame (dx, dz, dyaw) a movement action applies from heading ``yaw``"""
+    left, forward, turn = MOVEMENT_KINEMATICS[action]
+    sin_yaw, cos_yaw = math.sin(yaw), math.cos(yaw)
+    return (forward * sin_yaw + left * cos_yaw,
+            forward * cos_yaw - left * sin_yaw,
+            turn)
+
+
+def action_origin_pose(action, position, rotation, progress):
+    """Rewind a pose ``progress`` of the way through a movement action to its start"""
+    if action not in MOVEMENT_KINEMATICS:
+        return list(position), list(rotation)
+    yaw = rotation[1] - MOVEMENT_KINEMATICS[action][2] * progress
+    dx, dz, _ = movement_delta(action, yaw)
+    return ([position[0] - dx * progress, position[1], position[2] - dz * progress],
+            [rotation[0], yaw, rotation[2]])
 
 
 class Robot3D:
-    def __init__(self, robot_id, position, color):
+    __slots__ = (
+        'robot_id', 'position', 'rotation', 'color', '_current_action',
+        'action_started_at', 'action_duration', 'is_visible', 'movement_count',
+        'version', '_scheduler', '_completion', '_move_origin', '_move_delta',
+        '_cache_version', '_cached_dict', '_cached_json',
+    )
+
+    def __init__(self, robot_id, position, color, scheduler=None):
+        object.__setattr__(self, 'version', 0)
+        self._cache_version = -1
+        self._cached_dict = None
+        self._cached_json = None
         self.robot_id = robot_id
         self.position = position
         self.rotation = [0, 0, 0]
         self.color = color
-        self.current_action = HumanoidAction.IDLE
-        self.action_progress = 0.0
+        self._current_action = HumanoidAction.IDLE
+        self.action_started_at = None
+        self.action_duration = 0.0
         self.is_visible = True
-        self.is_animating = False
         self.movement_count = 0
+        self._scheduler = scheduler or get_scheduler()
+        self._completion = None
+        self._move_origin = None
+        self._move_delta = None
 
-    def to_dict(self):
+    def __setattr__(self, name, value):
+        # Any public field assignment invalidates the cached serialized state.
+        # In-place edits (e.g. robot.position[0] = 1) must call touch() instead.
+        object.__setattr__(self, name, value)
+        if name[0] != '_' and name != 'version':
+            object.__setattr__(self, 'version', self.version + 1)
+
+    def touch(self):
+        """Mark the robot as changed so the next to_dict() rebuilds"""
+        object.__setattr__(self, 'version', self.version + 1)
+
+    def _timing(self):
+        """Return (elapsed, animating) for the current action from one clock read"""
+        if self.action_started_at is None:
+            return 0.0, False
+        elapsed = time.monotonic() - self.action_started_at
+        if elapsed >= self.action_duration:
+            return self.action_duration, False
+        return elapsed, True
+
+    @property
+    def action_elapsed(self):
+        """Seconds since the current action started, capped at its duration"""
+        return self._timing()[0]
+
+    @property
+    def is_animating(self):
+        return self._timing()[1]
+
+    @property
+    def action_progress(self):
+        """Fraction of the current action completed, computed from timestamps"""
+        elapsed, animating = self._timing()
+        return elapsed / self.action_duration if animating else 0.0
+
+    @property
+    def current_action(self):
+        # Derived on read so snapshots stay correct even before the deadline fires
+        return self._current_action if self._timing()[1] else HumanoidAction.IDLE
+
+    def _build_dict(self):
+        """Serialize the robot as it looks while not animating"""
+        # Copies, so the cached dict and the robot never share a list
         return {
             'robot_id': self.robot_id,
-            'position': self.position,
-            'rotation': self.rotation,
+            'position': list(self.position),
+            'rotation': list(self.rotation),
             'color': self.color,
-            'current_action': self.current_action.value,
-            'action_progress': self.action_progress,
+            'current_action': HumanoidAction.IDLE.value,
+            'action_progress': 0.0,
             'is_visible': self.is_visible,
-            'is_animating': self.is_animating,
+            'is_animating': False,
+            'action_elapsed': self.action_duration if self.action_started_at is not None else 0.0,
+            'action_duration': self.action_duration,
             'movement_count': self.movement_count,
             'body_parts': {part: {'x': 0, 'y': 0, 'z': 0}
-                           for part in ['head', 'torso', 'left_arm', 'right_arm', 'left_leg', 'right_leg']}
+                           for part in BODY_PARTS}
         }
 
-    def start_action(self, action):
-        if isinstance(action, str):
-            try:
-                action = HumanoidAction(action.lower())
-            except ValueError:
-                action = HumanoidAction.IDLE
+    def to_dict(self):
+        """Return the robot state, reusing the cached dict until the robot changes.
+
+        Callers must treat the returned dict as read-only.
+        """
+        if self._cache_version != self.version:
+            self._cached_dict = self._build_dict()
+            self._cached_json = None
+            self._cache_version = self.version
 
-        self.current_action = action
-        self.action_progress = 0.0
-        self.is_animating = True
-        duration = ACTION_DURATIONS.get(action.value, 2)
+        elapsed, animating = self._timing()
+        if not animating:
+            return self._cached_dict
 
-        # Movement calculations removed - let client handle all positioning/rotation
-        if action in MOVEMENT_ACTIONS:
+        # Only the timing fields move while an action plays
+        state = dict(self._cached_dict)
+        state['current_action'] = self._current_action.value
+        state['action_progress'] = elapsed / self.action_duration
+        state['is_animating'] = True
+        state['action_elapsed'] = elapsed
+        return state
+
+    def to_json(self):
+        """Return the robot state as UTF-8 JSON bytes, cached while unchanged"""
+        state = self.to_dict()
+        if state is not self._cached_dict:
+            return json.dumps(state).encode('utf-8')
+        if self._cached_json is None:
+            self._cached_json = json.dumps(state).encode('utf-8')
+        return self._cached_json
+
+    def start_action(self, action, elapsed=0.0):
+        """Start an action, optionally as if it began ``elapsed`` seconds ago"""
+        spec = action_spec(action)
+        duration = spec.duration
+        now = time.monotonic()
+        # Settle an interrupted movement where it is before starting the next action
+        self.advance_movement(now)
+        self._current_action = spec.action
+        self.action_started_at = now - elapsed
+        self.action_duration = duration
+
+        if spec.is_movement:
             self.movement_count += 1
+        if spec.kinematics is not None:
+            self._move_origin = (list(self.position), list(self.rotation))
+            self._move_delta = movement_delta(spec.action, self.rotation[1])
+
+        # A new action preempts the previous deadline so it cannot end this one early
+        self._scheduler.cancel(self._completion)
+        self._completion = self._scheduler.schedule(
+            duration - elapsed, self._complete_action)
+
+    def advance_movement(self, now=None):
+        """Move the robot along its current movement action.
+
+        Position and heading are interpolated linearly over the action's
+        duration, matching the client animation. Returns True if the pose
+        changed.
+        """
+        if self._move_delta is None:
+            return False
+        now = time.monotonic() if now is None else now
+        progress = min(1.0, (now - self.action_started_at) / self.action_duration)
+        (x, y, z), (rx, ry, rz) = self._move_origin
+        dx, dz, dyaw = self._move_delta
+        self.position = [x + dx * progress, y, z + dz * progress]
+        self.rotation = [rx, ry + dyaw * progress, rz]
+        if progress >= 1.0:
+            self._move_origin = None
+            self._move_delta = None
+        return True
 
-        threading.Thread(target=self._complete_action,
-                         args=(duration,), daemon=True).start()
+    def _complete_action(self):
+        self.advance_movement()
+        self._completion = None
+        self._current_action = HumanoidAction.IDLE
+        self.action_started_at = None
+        self.action_duration = 0.0
 
-    def _complete_action(self, duration):
-        time.sleep(duration)
-        self.is_animating = False
-        if self.current_action != HumanoidAction.IDLE:
-            self.current_action = HumanoidAction.IDLE
+    def cancel_completion(self):
+        """Drop the scheduled end of the current action, e.g. when the robot is replaced"""
+        self._scheduler.cancel(self._completion)
+        self._completion = None
 
     def reset_to_initial_state(self, initial_position):
         """Reset robot to initial position and state"""
+        self.cancel_completion()
+        self._move_origin = None
+        self._move_delta = None
         self.position = initial_position
         # Reset rotation to face forward (default orientation)
         self.rotation = [0, 0, 0]
-        self.current_action = HumanoidAction.IDLE
-        self.action_progress = 0.0
+        self._current_action = HumanoidAction.IDLE
+        self.action_started_at = None
+        self.action_duration = 0.0
         self.is_visible = True
-        self.is_animating = False
         self.movement_count = 0
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""Array-backed (struct-of-arrays) robot store for large sessions"""
+
+import time
+from collections.abc import MutableMapping
+
+from constants import HumanoidAction
+from models.action_spec import action_spec
+from models.robot import BODY_PARTS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; sessions fall back to a dict of Robot3D
+    np = None
+
+ACTIONS = tuple(HumanoidAction)
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+IDLE_CODE = ACTION_CODES[HumanoidAction.IDLE]
+
+
+class RobotView:
+    """Robot3D-compatible view of one row in a RobotTable.
+
+    Setting a field through the view bumps the row's ``version``, as
+    assigning a Robot3D field does.
+    """
+
+    __slots__ = ("_table", "robot_id")
+
+    def __init__(self, table, robot_id):
+        self._table = table
+        self.robot_id = robot_id
+
+    @property
+    def _row(self):
+        return self._table._rows[self.robot_id]
+
+    def _set(self, name, value):
+        row = self._row
+        getattr(self._table, name)[row] = value
+        self._table.version[row] += 1
+
+    @property
+    def version(self):
+        return int(self._table.version[self._row])
+
+    def touch(self):
+        """Mark the robot as changed"""
+        self._table.version[self._row] += 1
+
+    @property
+    def position(self):
+        return self._table.position[self._row].tolist()
+
+    @position.setter
+    def position(self, value):
+        self._set("position", value)
+
+    @property
+    def rotation(self):
+        return self._table.rotation[self._row].tolist()
+
+    @rotation.setter
+    def rotation(self, value):
+        self._set("rotation", value)
+
+    @property
+    def color(self):
+        return self._table._colors[self._row]
+
+    @color.setter
+    def color(self, value):
+        row = self._row
+        self._table._colors[row] = value
+        self._table.version[row] += 1
+
+    @property
+    def is_visible(self):
+        return bool(self._table.is_visible[self._row])
+
+    @is_visible.setter
+    def is_visible(self, value):
+        self._set("is_visible", value)
+
+    @property
+    def movement_count(self):
+        return int(self._table.movement_count[self._row])
+
+    @movement_count.setter
+    def movement_count(self, value):
+        self._set("movement_count", value)
+
+    @property
+    def action_started_at(self):
+        started_at = self._table.started_at[self._row]
+        return None if np.isnan(started_at) else float(started_at)
+
+    @property
+    def action_duration(self):
+        return float(self._table.duration[self._row])
+
+    def _timing(self):
+        started_at = self.action_started_at
+        if started_at is None:
+            return 0.0, False
+        elapsed = time.monotonic() - started_at
+        if elapsed >= self.action_duration:
+            return self.action_duration, False
+        return elapsed, True
+
+    @property
+    def action_elapsed(self):
+        return self._timing()[0]
+
+    @property
+    def is_animating(self):
+        return self._timing()[1]
+
+    @property
+    def action_progress(self):
+        elapsed, animating = self._timing()
+        return elapsed / self.action_duration if animating else 0.0
+
+    @property
+    def current_action(self):
+        if not self._timing()[1]:
+            return HumanoidAction.IDLE
+        return ACTIONS[self._table.action_code[self._row]]
+
+    @property
+    def _current_action(self):
+        return ACTIONS[self._table.action_code[self._row]]
+
+    def to_dict(self):
+        return self._table.to_dicts([self.robot_id])[self.robot_id]
+
+    def advance_movement(self, now=None):
+        row = self._row
+        if not self._table.moving[row]:
+            return False
+        self._table._advance_rows(np.array([row]), time.monotonic() if now is None else now)
+        return True
+
+    def start_action(self, action, elapsed=0.0):
+        self._table.start_action_rows([self._row], action, elapsed)
+
+    def cancel_completion(self):
+        """Table actions end by their timing columns; nothing is scheduled"""
+
+    def reset_to_initial_state(self, initial_position):
+        """Reset robot to initial position and state"""
+        self._table.reset({self.robot_id: initial_position})
+
+
+class RobotTable(MutableMapping):
+    """Session robot store keeping every field in contiguous NumPy columns.
+
+    Behaves like the ``{robot_id: Robot3D}`` dict used by regular sessions,
+    handing out RobotView objects, while "all" actions, resets and snapshots
+    run as single vectorized operations over the columns.
+    """
+
+    _COLUMNS = (
+        ("position", (3,), "float64", 0.0),
+        ("rotation", (3,), "float64", 0.0),
+        ("action_code", (), "int16", IDLE_CODE),
+        ("started_at", (), "float64", float("nan")),
+        ("duration", (), "float64", 0.0),
+        ("movement_count", (), "int64", 0),
+        ("is_visible", (), "bool", True),
+        ("moving", (), "bool", False),
+        ("move_origin", (4,), "float64", 0.0),  # x, y, z, yaw
+        ("move_delta", (3,), "float64", 0.0),   # dx, dz, dyaw
+        ("version", (), "int64", 0),            # bumped by every change to a row
+    )
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def __init__(self, capacity=64):
+        if np is None:
+            raise RuntimeError("RobotTable requires NumPy to be installed")
+        self._ids = []
+        self._rows = {}
+        self._colors = []
+        self._views = {}
+        self._capacity = 0
+        for name, shape, dtype, fill in self._COLUMNS:
+            setattr(self, name, np.full((0,) + shape, fill, dtype=dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name, shape, dtype, fill in self._COLUMNS:
+            column = np.full((capacity,) + shape, fill, dtype=dtype)
+            column[: self._capacity] = getattr(self, name)
+            setattr(self, name, column)
+        self._capacity = capacity
+
+    # Mapping interface used by the existing routes
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def __contains__(self, robot_id):
+        return robot_id in self._rows
+
+    def __getitem__(self, robot_id):
+        if robot_id not in self._rows:
+            raise KeyError(robot_id)
+        view = self._views.get(robot_id)
+        if view is None:
+            view = self._views[robot_id] = RobotView(self, robot_id)
+        return view
+
+    def __setitem__(self, robot_id, robot):
+        row = self._rows.get(robot_id)
+        if row is None:
+            row = len(self._ids)
+            if row == self._capacity:
+                self._grow(max(64, self._capacity * 2))
+            self._ids.append(robot_id)
+            self._colors.append(robot.color)
+            self._rows[robot_id] = row
+        self._colors[row] = robot.color
+        self.position[row] = robot.position
+        self.rotation[row] = robot.rotation
+        self.action_code[row] = ACTION_CODES[robot._current_action]
+        started_at = robot.action_started_at
+        self.started_at[row] = np.nan if started_at is None else started_at
+        self.duration[row] = robot.action_duration
+        self.movement_count[row] = robot.movement_count
+        self.is_visible[row] = robot.is_visible
+        self.moving[row] = False
+        self.version[row] += 1
+
+    def __delitem__(self, robot_id):
+        row = self._rows.pop(robot_id)
+        self._views.pop(robot_id, None)
+        last = len(self._ids) - 1
+        # Swap-remove keeps the columns dense
+        if row != last:
+            moved_id = self._ids[last]
+            for name, _, _, _ in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._ids[row] = moved_id
+            self._colors[row] = self._colors[last]
+            self._rows[moved_id] = row
+        self._ids.pop()
+        self._colors.pop()
+
+    def clear(self):
+        self._ids.clear()
+        self._rows.clear()
+        self._colors.clear()
+        self._views.clear()
+
+    # Vectorized bulk operations
+
+    def start_action_rows(self, rows, action, elapsed=0.0):
+        """Start one action on the given rows in a single column update"""
+        spec = action_spec(action)
+        rows = np.asarray(rows, dtype=np.intp)
+        now = time.monotonic()
+        # Settle interrupted movements where they are first
+        self._advance_rows(rows[self.moving[rows]], now)
+        self.action_code[rows] = spec.code
+        self.started_at[rows] = now - elapsed
+        self.duration[rows] = spec.duration
+        if spec.is_movement:
+            self.movement_count[rows] += 1
+        self.version[rows] += 1
+        if spec.kinematics is not None:
+            left, forward, turn = spec.kinematics
+            yaw = self.rotation[rows, 1]
+            sin_yaw, cos_yaw = np.sin(yaw), np.cos(yaw)
+            self.move_origin[rows, :3] = self.position[rows]
+            self.move_origin[rows, 3] = yaw
+            self.move_delta[rows, 0] = forward * sin_yaw + left * cos_yaw
+            self.move_delta[rows, 1] = forward * cos_yaw - left * sin_yaw
+            self.move_delta[rows, 2] = turn
+            self.moving[rows] = True
+
+    def _advance_rows(self, rows, now):
+        progress = np.clip((now - self.started_at[rows]) / self.duration[rows], 0.0, 1.0)
+        origin = self.move_origin[rows]
+        delta = self.move_delta[rows]
+        self.position[rows, 0] = origin[:, 0] + delta[:, 0] * progress
+        self.position[rows, 2] = origin[:, 2] + delta[:, 1] * progress
+        self.rotation[rows, 1] = origin[:, 3] + delta[:, 2] * progress
+        self.moving[rows[progress >= 1.0]] = False
+        self.version[rows] += 1
+
+    def advance_movement(self, now=None):
+        """Advance every moving robot in one vectorized step.
+
+        Returns ``{robot_id: {'position': ..., 'rotation': ...}}`` for the
+        robots whose pose changed.
+        """
+        rows = np.flatnonzero(self.moving[: len(self._ids)])
+        if not len(rows):
+            return {}
+        self._advance_rows(rows, time.monotonic() if now is None else now)
+        return {
+            self._ids[row]: {'position': position, 'rotation': rotation}
+            for row, position, rotation in zip(
+                rows.tolist(), self.position[rows].tolist(), self.rotation[rows].tolist())
+        }
+
+    def start_action_all(self, action, elapsed=0.0):
+        self.start_action_rows(np.arange(len(self._ids)), action, elapsed)
+
+    def any_animating(self, now=None):
+        """True if any robot's action is still within its duration"""
+        count = len(self._ids)
+        now = time.monotonic() if now is None else now
+        with np.errstate(invalid="ignore"):
+            return bool(np.any(now - self.started_at[:count] < self.duration[:count]))
+
+    def reset(self, initial_positions):
+        """Reset the robots named in ``{robot_id: position}`` to their initial state"""
+        ids = [robot_id for robot_id in initial_positions if robot_id in self._rows]
+        if not ids:
+            return
+        rows = np.fromiter((self._rows[robot_id] for robot_id in ids),
+                           dtype=np.intp, count=len(ids))
+        self.position[rows] = [initial_positions[robot_id] for robot_id in ids]
+        self.rotation[rows] = 0.0
+        self.action_code[rows] = IDLE_CODE
+        self.started_at[rows] = np.nan
+        self.duration[rows] = 0.0
+        self.movement_count[rows] = 0
+        self.is_visible[rows] = True
+        self.moving[rows] = False
+        self.version[rows] += 1
+
+    def to_dicts(self, robot_ids=None):
+        """Serialize robots to ``{robot_id: dict}`` with columnwise computation"""
+        if robot_ids is None:
+            ids = self._ids
+            rows = slice(0, len(ids))
+            colors = self._colors
+        else:
+            ids = list(robot_ids)
+            rows = np.fromiter((self._rows[robot_id] for robot_id in ids),
+                               dtype=np.intp, count=len(ids))
+            colors = [self._colors[row] for row in rows]
+
+        duration = self.duration[rows]
+        started_at = self.started_at[rows]
+        with np.errstate(invalid="ignore"):
+            elapsed = time.monotonic() - started_at
+            animating = elapsed < duration
+        elapsed = np.where(animating, elapsed, np.where(np.isnan(started_at), 0.0, duration))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            progress = np.where(animating, elapsed / duration, 0.0)
+        codes = np.where(animating, self.action_code[rows], IDLE_CODE)
+
+        columns = zip(
+            ids,
+            self.position[rows].tolist(),
+            self.rotation[rows].tolist(),
+            colors,
+            codes.tolist(),
+            progress.tolist(),
+            self.is_visible[rows].tolist(),
+            animating.tolist(),
+            elapsed.tolist(),
+            duration.tolist(),
+            self.movement_count[rows].tolist(),
+        )
+        return {
+            robot_id: {
+                'robot_id': robot_id,
+                'position': position,
+                'rotation': rotation,
+                'color': color,
+                'current_action': ACTIONS[code].value,
+                'action_progress': action_progress,
+                'is_visible': is_visible,
+                'is_animating': is_animating,
+                'action_elapsed': action_elapsed,
+                'action_duration': duration,
+                'movement_count': movement_count,
+                'body_parts': {part: {'x': 0, 'y': 0, 'z': 0} for part in BODY_PARTS}
+            }
+            for (robot_id, position, rotation, color, code, action_progress,
+                 is_visible, is_animating, action_elapsed, duration,
+                 movement_count) in columns
+        }
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Uniform-grid spatial hash for robot proximity and collision queries"""
+
+import math
+from collections import defaultdict
+
+
+class SpatialHash:
+    """Buckets robots into square cells on the ground (x/z) plane.
+
+    Updates are O(1) and only touch the cells a robot leaves and enters.
+    A radius query visits just the cells overlapping the query circle, so
+    lookups cost depends on local density rather than session size.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self._cells = defaultdict(set)
+        self._points = {}  # robot_id -> (x, z, cell)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, robot_id):
+        return robot_id in self._points
+
+    def _cell(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def update(self, robot_id, position):
+        """Insert a robot or move it to ``position`` ([x, y, z])"""
+        x, z = float(position[0]), float(position[2])
+        cell = self._cell(x, z)
+        previous = self._points.get(robot_id)
+        if previous is not None and previous[2] != cell:
+            self._discard(robot_id, previous[2])
+        if previous is None or previous[2] != cell:
+            self._cells[cell].add(robot_id)
+        self._points[robot_id] = (x, z, cell)
+
+    def remove(self, robot_id):
+        previous = self._points.pop(robot_id, None)
+        if previous is not None:
+            self._discard(robot_id, previous[2])
+
+    def _discard(self, robot_id, cell):
+        members = self._cells[cell]
+        members.discard(robot_id)
+        if not members:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._points.clear()
+
+    def rebuild(self, robots):
+        """Re-index every robot in a ``{robot_id: robot}`` mapping"""
+        self.clear()
+        for robot_id, robot in robots.items():
+            self.update(robot_id, robot.position)
+
+    def position_of(self, robot_id):
+        x, z, _ = self._points[robot_id]
+        return x, z
+
+    def query(self, x, z, radius):
+        """Return ``[(robot_id, distance)]`` within ``radius`` of (x, z), nearest first"""
+        cx0, cz0 = self._cell(x - radius, z - radius)
+        cx1, cz1 = self._cell(x + radius, z + radius)
+        radius_sq = radius * radius
+        if (cx1 - cx0 + 1) * (cz1 - cz0 + 1) > len(self._cells):
+            # A wide query covers more cells than are occupied; walk those instead
+            cells = [
+                members for (cx, cz), members in self._cells.items()
+                if cx0 <= cx <= cx1 and cz0 <= cz <= cz1
+            ]
+        else:
+            cells = [
+                self._cells[(cx, cz)]
+                for cx in range(cx0, cx1 + 1)
+                for cz in range(cz0, cz1 + 1)
+                if (cx, cz) in self._cells
+            ]
+        found = []
+        for members in cells:
+            for robot_id in members:
+                px, pz, _ = self._points[robot_id]
+                distance_sq = (px - x) ** 2 + (pz - z) ** 2
+                if distance_sq <= radius_sq:
+                    found.append((robot_id, math.sqrt(distance_sq)))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def neighbors(self, robot_id, radius):
+        """Return ``[(robot_id, distance)]`` of other robots within ``radius``"""
+        x, z = self.position_of(robot_id)
+        return [item for item in self.query(x, z, radius) if item[0] != robot_id]
+
+    def overlaps(self, radius, robot_ids=None):
+        """Return sorted pairs of robots closer than ``radius`` to each other.
+
+        Only pairs involving ``robot_ids`` are checked when it is given.
+        """
+        candidates = self._points.keys() if robot_ids is None else robot_ids
+        pairs = set()
+        for robot_id in candidates:
+            if robot_id not in self._points:
+                continue
+            for other_id, distance in self.neighbors(robot_id, radius):
+                if distance < radius:
+                    pairs.add(tuple(sorted((robot_id, other_id))))
+        return sorted(pairs)
@@ -4,22 +4,47 @@
 import logging
 import os
 from flask import jsonify, request
-from routes.session_utils import decrypt, send_request
+from models.action_spec import ACTION_SPECS
+from routes.session_utils import decrypt
+from server.broadcast import emit_batch
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 ROBOT_SESSION_KEY = os.getenv("ROBOT_SESSION_KEY", "hktiit_robot_remote_proxy")
+# Most commands accepted by one /run_actions call or batch_actions event
+MAX_BATCH_COMMANDS = 500
+
+
+def parse_commands(commands):
+    """Validate a batch body's ``commands`` into ``[(robot_id, action), ...]``"""
+    if not isinstance(commands, list) or not commands:
+        raise ValueError("commands must be a non-empty list")
+    if len(commands) > MAX_BATCH_COMMANDS:
+        raise ValueError(f"commands is limited to {MAX_BATCH_COMMANDS} entries")
+    parsed = []
+    for index, command in enumerate(commands):
+        if not isinstance(command, dict):
+            raise ValueError(f"commands[{index}] must be an object")
+        robot_id = command.get("robot_id")
+        action = command.get("action")
+        if not robot_id or not isinstance(robot_id, str):
+            raise ValueError(f"commands[{index}].robot_id is required")
+        if not action or not isinstance(action, str):
+            raise ValueError(f"commands[{index}].action is required")
+        parsed.append((robot_id, action))
+    return parsed
 
 
 class ActionRoutes:
     """Robot action execution API routes"""
 
-    def __init__(self, app, socketio, sessions_manager, validation_mixin):
+    def __init__(self, app, socketio, sessions_manager, validation_mixin, robot_dispatcher):
         self.app = app
         self.socketio = socketio
         self.sessions_manager = sessions_manager
         self.validation_mixin = validation_mixin
+        self.robot_dispatcher = robot_dispatcher
         self.setup_action_routes()
 
     def setup_action_routes(self):
@@ -58,6 +83,25 @@ class ActionRoutes:
                 logger.error(f"Error in run_action: {e}")
                 return jsonify({"success": False, "error": str(e)}), 500
 
+        @self.app.route("/run_actions", methods=["POST"])
+        def run_actions():
+            """Run a batch of actions on several robots in one call"""
+            try:
+                session_key = self.validation_mixin.get_session_key_from_request()
+                is_valid, error_msg = self.validation_mixin.validate_session_key(
+                    session_key
+                )
+                if not is_valid:
+                    return jsonify({"success": False, "error": error_msg}), 400
+
+                data = request.json or {}
+                result, status = self.run_actions(session_key, data.get("commands"))
+                return jsonify(result), status
+
+            except Exception as e:
+                logger.error(f"Error in run_actions: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
+
         @self.app.route("/speech/<robot_id>", methods=["POST"])
         def speech(robot_id: str):
             """Forward speech audio URL to simulator clients for playback"""
@@ -122,24 +166,24 @@ class ActionRoutes:
             )
 
         # Execute action on all robots
-        for robot in robots.values():
-            robot.start_action(action)
+        self.sessions_manager.start_action(session_key, "all", action)
 
         # Handle real robot integration
-        self._send_real_robot_commands(session_key, robots, action, "all")
+        dispatch_id = self._send_real_robot_commands(session_key, robots, action, "all")
 
         # Emit WebSocket events
         self._emit_action_events(session_key, action, "all", robots)
 
-        return jsonify(
-            {
-                "success": True,
-                "robot_id": "all",
-                "action": action,
-                "robots_affected": list(robots.keys()),
-                "message": f'Action "{action}" executed on all robots',
-            }
-        )
+        result = {
+            "success": True,
+            "robot_id": "all",
+            "action": action,
+            "robots_affected": list(robots.keys()),
+            "message": f'Action "{action}" executed on all robots',
+        }
+        if dispatch_id is not None:
+            result["dispatch_id"] = dispatch_id
+        return jsonify(result)
 
     def _handle_single_robot_action(self, session_key, robots, robot_id, action):
         """Handle action execution on a single robot"""
@@ -155,64 +199,199 @@ class ActionRoutes:
             )
 
         # Execute action on specific robot
-        robots[robot_id].start_action(action)
+        self.sessions_manager.start_action(session_key, robot_id, action)
 
         # Handle real robot integration
-        self._send_real_robot_commands(session_key, robots, action, robot_id)
+        dispatch_id = self._send_real_robot_commands(session_key, robots, action, robot_id)
 
         # Emit WebSocket events
         self._emit_action_events(session_key, action, robot_id, robots)
 
-        return jsonify(
-            {
-                "success": True,
-                "robot_id": robot_id,
-                "action": action,
-                "robot_data": robots[robot_id].to_dict(),
-                "message": f'Action "{action}" executed on robot {robot_id}',
-            }
-        )
+        result = {
+            "success": True,
+            "robot_id": robot_id,
+            "action": action,
+            "robot_data": robots[robot_id].to_dict(),
+            "message": f'Action "{action}" executed on robot {robot_id}',
+        }
+        if dispatch_id is not None:
+            result["dispatch_id"] = dispatch_id
+        return jsonify(result)
+
+    def dispatch_action(self, session_key, robot_id, action):
+        """Start an action on one robot and propagate it like /run_action does"""
+        robots = self.sessions_manager.get_session_robots(session_key)
+        try:
+            self.sessions_manager.start_action(session_key, robot_id, action)
+        except KeyError:
+            logger.warning(f"⚠️ Robot {robot_id} not found in session {session_key}")
+            return
+        self._send_real_robot_commands(session_key, robots, action, robot_id)
+        self._emit_action_events(session_key, action, robot_id, robots)
 
-    def _send_real_robot_commands(self, session_key, robots, action, target_robot_id):
-        """Send commands to real robots if session is valid"""
-        logger.info(f"🔍 Checking if should call real robot for action: {action}")
+    def run_actions(self, session_key, commands):
+        """Apply a batch of commands atomically; returns ``(result, status)``.
+
+        Every command starts under one session lock, or none does if a
+        robot is unknown. Clients get a single frame holding one ``actions``
+        event per command, the last video switch and one state delta.
+        """
+        try:
+            commands = parse_commands(commands)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}, 400
+
+        robots = self.sessions_manager.get_session_robots(session_key)
+        try:
+            self.sessions_manager.start_actions(session_key, commands)
+        except KeyError as e:
+            missing = e.args[0]
+            return {
+                "success": False,
+                "error": f"Robots not found: {', '.join(missing)}",
+                "missing": missing,
+            }, 404
+
+        dispatch_ids = self._send_real_robot_batch(session_key, robots, commands)
+
+        events = [
+            ("actions", {"session_key": session_key, "action_name": action, "robot_id": robot_id})
+            for robot_id, action in commands
+        ]
+        video_event = None
+        for _, action in commands:
+            video_event = self._video_event(session_key, action) or video_event
+        if video_event is not None:
+            events.append(("video_source_changed", video_event))
+        delta = self.sessions_manager.state_delta(session_key)
+        if delta is not None:
+            events.append(("robot_states_delta", delta))
+            seq = delta["seq"]
+        else:
+            seq = self.sessions_manager.state_seq(session_key)
+        emit_batch(self.socketio, events, f"session_{session_key}")
+
+        if any(robot_id == "all" for robot_id, _ in commands):
+            affected = list(robots)
+        else:
+            affected = list(dict.fromkeys(robot_id for robot_id, _ in commands))
+        logger.info(
+            f"🎬 Ran {len(commands)} batched actions on {len(affected)} robots "
+            f"in session {session_key}"
+        )
+        result = {
+            "success": True,
+            "session_key": session_key,
+            "results": [
+                {"robot_id": robot_id, "action": action} for robot_id, action in commands
+            ],
+            "robots_affected": affected,
+            "seq": seq,
+        }
+        if dispatch_ids:
+            result["dispatch_ids"] = dispatch_ids
+        return result, 200
+
+    @staticmethod
+    def _real_robot_session(session_key):
+        """Return the decrypted real-robot session, or None if it is not valid"""
+        logger.info(f"🔍 Checking if session {session_key} controls a real robot")
         real_robot_session = decrypt(session_key)
-        
+
         if not real_robot_session:
             logger.warning("❌ Decryption failed or returned None for session_key")
-            return
-            
+            return None
+
         if not real_robot_session.get("is_valid"):
-            logger.warning(f"❌ Session is NOT valid. Content: {real_robot_session}")
-            return
+            logger.warning(f"❌ Session for robot {real_robot_session.get('robot')} is NOT valid")
+            return None
 
-        logger.info(f"✅ Session validated for real robot control: {real_robot_session}")
+        logger.info(f"✅ Session validated for real robot control of {real_robot_session.get('robot')}")
+        return real_robot_session
 
+    @staticmethod
+    def _real_robot_targets(real_robot_session, robots, target_robot_id):
+        """Return the real robots a command for ``target_robot_id`` goes to"""
         if target_robot_id == "all" and real_robot_session.get("robot") == "all":
             if not robots:
                 logger.warning("⚠️ 'all' robots targeted but robots list is empty in session")
-                return
-            
-            # Send action to all robots via the external API
-            for robot in robots.values():
-                robot_data = robot.to_dict()
-                logger.info(
-                    f"📤 Sending action {action} to robot {robot_data['robot_id']}"
-                )
-                send_request(
-                    method="RunAction", robot_id=robot_data["robot_id"], action=action
-                )
-            self._emit_action_events(ROBOT_SESSION_KEY, action, "all", robots)
-
-        elif real_robot_session.get("robot") == "all" and target_robot_id != "all":
-            # Send action to a specific robot when one robot is targeted, but the real_robot_session is for all robots
-            logger.info(f"Sending action {action} to robot {target_robot_id}")
-            send_request(method="RunAction", robot_id=target_robot_id, action=action)
-            self._emit_action_events(ROBOT_SESSION_KEY, action, target_robot_id, robots)
-        elif real_robot_session.get("robot") == target_robot_id:
-            logger.info(f"Sending action {action} to robot {target_robot_id}")
-            send_request(method="RunAction", robot_id=target_robot_id, action=action)
-            self._emit_action_events(ROBOT_SESSION_KEY, action, target_robot_id, robots)
+            return list(robots)
+        if real_robot_session.get("robot") == "all" and target_robot_id != "all":
+            # One robot targeted, but the real_robot_session is for all robots
+            return [target_robot_id]
+        if real_robot_session.get("robot") == target_robot_id:
+            return [target_robot_id]
+        return []
+
+    def _send_real_robot_commands(self, session_key, robots, action, target_robot_id):
+        """Send commands to real robots if session is valid.
+
+        The requests run in the background; returns the dispatch id whose
+        ``real_robot_result`` event reports them, or None if nothing was sent.
+        """
+        real_robot_session = self._real_robot_session(session_key)
+        if real_robot_session is None:
+            return None
+        robot_ids = self._real_robot_targets(real_robot_session, robots, target_robot_id)
+        if not robot_ids:
+            return None
+
+        logger.info(f"Sending action {action} to robot {target_robot_id}")
+        dispatch_id = self.robot_dispatcher.dispatch(session_key, action, robot_ids)
+        self._emit_action_events(ROBOT_SESSION_KEY, action, target_robot_id, robots)
+        return dispatch_id
+
+    def _send_real_robot_batch(self, session_key, robots, commands):
+        """Send a batch of commands to real robots; returns the dispatch ids.
+
+        The session is decrypted once and each robot gets only its last
+        command, since it replaces the earlier ones. Robots given the same
+        action share one dispatch, and the robot session gets one frame.
+        """
+        real_robot_session = self._real_robot_session(session_key)
+        if real_robot_session is None:
+            return []
+
+        latest = {}
+        events = []
+        video_event = None
+        for robot_id, action in commands:
+            robot_ids = self._real_robot_targets(real_robot_session, robots, robot_id)
+            if not robot_ids:
+                continue
+            for target in robot_ids:
+                latest[target] = action
+            events.append(("actions", {
+                "session_key": ROBOT_SESSION_KEY, "action_name": action, "robot_id": robot_id,
+            }))
+            video_event = self._video_event(ROBOT_SESSION_KEY, action) or video_event
+        if not latest:
+            return []
+
+        groups = {}
+        for robot_id, action in latest.items():
+            groups.setdefault(action, []).append(robot_id)
+        dispatch_ids = [
+            self.robot_dispatcher.dispatch(session_key, action, robot_ids)
+            for action, robot_ids in groups.items()
+        ]
+        logger.info(
+            f"🤖 Sent {len(commands)} batched actions to {len(latest)} real robots "
+            f"in {len(groups)} dispatches"
+        )
+
+        if video_event is not None:
+            events.append(("video_source_changed", video_event))
+        # As in _emit_action_events: the robot session mirrors these robots
+        if robots is not self.sessions_manager.sessions.get(
+                ROBOT_SESSION_KEY, {}).get("robots"):
+            events.append(("robot_states", self.sessions_manager.serialize_robots(robots)))
+        else:
+            delta = self.sessions_manager.state_delta(ROBOT_SESSION_KEY)
+            if delta is not None:
+                events.append(("robot_states_delta", delta))
+        emit_batch(self.socketio, events, f"session_{ROBOT_SESSION_KEY}")
+        return dispatch_ids
 
     def _emit_action_events(self, session_key, action, robot_id, robots):
         """Emit WebSocket events for action execution and video synchronization"""
@@ -228,30 +407,31 @@ class ActionRoutes:
         )
 
         # Sync Video for Domain/Technique actions
-        video_map = {
-            "domain_unlimited_void": "domain_unlimited_void.mp4",
-            "domain_malevolent_shrine": "domain_malevolent_shrine.mp4",
-            "domain_self_embodiment": "domain_self_embodiment.mp4",
-            "domain_authentic_love": "domain_authentic_love.mp4",
-            "domain_idle_death_gamble": "domain_idle_death_gamble.mp4",
-            "domain_yuji_itadori": "domain_yuji_itadori.mp4",
-            "domain_chimera_shadow_garden": "domain_chimera_shadow_garden.mp4",
-            "domain_time_cell_moon_palace": "domain_time_cell_moon_palace.mp4",
-            "lapse_blue": "technique_lapse_blue.mp4",
-            "reversal_red": "technique_reversal_red.mp4",
-            "hollow_purple": "technique_hollow_purple.mp4"
-        }
-
-        if action in video_map:
-            video_bucket_url = os.environ.get("VIDEO_BUCKET_URL", "")
-            video_src = f"{video_bucket_url}{video_map[action]}"
+        self.sync_action_video(session_key, action)
+
+        # Emit the robots that changed; the robot session mirrors another
+        # session's robots, so it still gets their full states
+        if session_key == ROBOT_SESSION_KEY and robots is not self.sessions_manager.sessions.get(
+                ROBOT_SESSION_KEY, {}).get("robots"):
+            robot_states = self.sessions_manager.serialize_robots(robots)
+            self.socketio.emit("robot_states", robot_states, room=f"session_{session_key}")
+        else:
+            self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
+
+    def sync_action_video(self, session_key, action):
+        """Switch the session's video to the clip of a Domain/Technique action"""
+        video_event = self._video_event(session_key, action)
+        if video_event is not None:
             self.socketio.emit(
-                "video_source_changed",
-                {"video_src": video_src, "session_key": session_key},
-                room=f"session_{session_key}",
+                "video_source_changed", video_event, room=f"session_{session_key}"
             )
-            logger.info(f"🎬 Synced video {video_map[action]} to session {session_key}")
 
-        # Emit robot states update
-        robot_states = {rid: robot.to_dict() for rid, robot in robots.items()}
-        self.socketio.emit("robot_states", robot_states, room=f"session_{session_key}")
+    @staticmethod
+    def _video_event(session_key, action):
+        """Return the ``video_source_changed`` payload for an action, if it has a clip"""
+        spec = ACTION_SPECS.get(action)
+        if spec is None or spec.video is None:
+            return None
+        video_bucket_url = os.environ.get("VIDEO_BUCKET_URL", "")
+        logger.info(f"🎬 Synced video {spec.video} to session {session_key}")
+        return {"video_src": f"{video_bucket_url}{spec.video}", "session_key": session_key}
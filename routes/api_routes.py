@@ -3,8 +3,9 @@
 
 import logging
 
-from constants import HumanoidAction
+from models.action_spec import ACTION_NAMES
 from flask import jsonify, render_template, request, send_from_directory
+from routes.session_utils import get_decrypt_cache_metrics, robot_api_url
 from routes.validation import ValidationMixin
 
 # Set up logger
@@ -12,10 +13,17 @@ logger = logging.getLogger(__name__)
 
 
 class APIRoutes(ValidationMixin):
-    def __init__(self, app, socketio, sessions_manager):
+    def __init__(self, app, socketio, sessions_manager, camera_controls=None,
+                 outbound_queues=None, event_streams=None, event_log=None,
+                 robot_dispatcher=None):
         self.app = app
         self.socketio = socketio
         self.sessions_manager = sessions_manager
+        self.camera_controls = camera_controls
+        self.outbound_queues = outbound_queues
+        self.event_streams = event_streams
+        self.event_log = event_log
+        self.robot_dispatcher = robot_dispatcher
         self.setup_routes()
 
     def setup_routes(self):
@@ -59,28 +67,44 @@ class APIRoutes(ValidationMixin):
 
             if session_key:
                 robots = self.sessions_manager.get_session_robots(session_key)
-                return jsonify(
-                    {
-                        "server": "running",
-                        "session_key": session_key,
-                        "robots_count": len(robots),
-                        "actions": [action.value for action in HumanoidAction],
-                        "animating_robots": [
-                            robot_id
-                            for robot_id, robot in robots.items()
-                            if robot.is_animating
-                        ],
+                status = {
+                    "server": "running",
+                    "session_key": session_key,
+                    "robots_count": len(robots),
+                    "actions": ACTION_NAMES,
+                    "animating_robots": [
+                        robot_id
+                        for robot_id, robot in list(robots.items())
+                        if robot.is_animating
+                    ],
+                }
+                if self.outbound_queues is not None:
+                    clients = self.sessions_manager.get_or_create_session(session_key)["clients"]
+                    status["client_queues"] = {
+                        sid: self.outbound_queues.client_metrics(sid) for sid in list(clients)
                     }
-                )
+                return jsonify(status)
             else:
-                return jsonify(
-                    {
-                        "server": "running",
-                        "total_sessions": len(self.sessions_manager.sessions),
-                        "session_required": True,
-                        "actions": [action.value for action in HumanoidAction],
-                    }
-                )
+                status = {
+                    "server": "running",
+                    "total_sessions": len(self.sessions_manager.sessions),
+                    "session_metrics": self.sessions_manager.get_metrics(),
+                    "decrypt_cache_metrics": get_decrypt_cache_metrics(),
+                    "session_required": True,
+                    "actions": ACTION_NAMES,
+                }
+                if self.camera_controls is not None:
+                    status["camera_control_metrics"] = self.camera_controls.get_metrics()
+                if self.outbound_queues is not None:
+                    status["client_queue_metrics"] = self.outbound_queues.get_metrics()
+                if self.event_streams is not None:
+                    status["stream_metrics"] = self.event_streams.get_metrics()
+                if self.event_log is not None:
+                    status["event_log_metrics"] = self.event_log.get_metrics()
+                if self.robot_dispatcher is not None:
+                    status["robot_dispatch_metrics"] = self.robot_dispatcher.get_metrics()
+                status["robot_api_url_metrics"] = robot_api_url.get_metrics()
+                return jsonify(status)
 
         @self.app.route("/proxy")
         def action_events_proxy():
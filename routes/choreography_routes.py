@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Choreography timeline routes for the Robot Simulator"""
+
+import logging
+from flask import jsonify, request
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class ChoreographyRoutes:
+    """Multi-robot show timeline API routes"""
+
+    def __init__(self, app, socketio, sessions_manager, validation_mixin, choreography_player):
+        self.app = app
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.validation_mixin = validation_mixin
+        self.choreography_player = choreography_player
+        self.setup_choreography_routes()
+
+    def setup_choreography_routes(self):
+        """Set up all choreography-related routes"""
+
+        @self.app.route("/api/choreography", methods=["POST"])
+        def load_choreography():
+            """Load a timeline of {offset, robot_id|group, action} entries"""
+
+            def load(session_key, data):
+                timeline = data.get("timeline")
+                if not isinstance(timeline, list):
+                    raise ValueError("timeline must be a list of entries")
+                return self.choreography_player.load(
+                    session_key,
+                    timeline,
+                    groups=data.get("groups"),
+                    autoplay=data.get("autoplay", True),
+                )
+
+            return self._handle(load)
+
+        @self.app.route("/api/choreography", methods=["GET"])
+        def get_choreography():
+            """Get the playback state of the session's choreography"""
+            return self._handle(
+                lambda session_key, data: self.choreography_player.get_state(session_key)
+            )
+
+        @self.app.route("/api/choreography", methods=["DELETE"])
+        def stop_choreography():
+            """Stop playback and unload the session's choreography"""
+
+            def stop(session_key, data):
+                self.choreography_player.stop(session_key)
+                return {"state": "stopped"}
+
+            return self._handle(stop)
+
+        @self.app.route("/api/choreography/play", methods=["POST"])
+        @self.app.route("/api/choreography/resume", methods=["POST"])
+        def play_choreography():
+            """Start or resume playback"""
+            return self._handle(
+                lambda session_key, data: self.choreography_player.play(session_key)
+            )
+
+        @self.app.route("/api/choreography/pause", methods=["POST"])
+        def pause_choreography():
+            """Pause playback at the current offset"""
+            return self._handle(
+                lambda session_key, data: self.choreography_player.pause(session_key)
+            )
+
+        @self.app.route("/api/choreography/seek", methods=["POST"])
+        def seek_choreography():
+            """Jump to {"offset": seconds}"""
+
+            def seek(session_key, data):
+                offset = data.get("offset")
+                if not isinstance(offset, (int, float)):
+                    raise ValueError("offset must be a number of seconds")
+                return self.choreography_player.seek(session_key, offset)
+
+            return self._handle(seek)
+
+    def _handle(self, operation):
+        """Validate the session, run a playback operation and wrap its result"""
+        try:
+            session_key = self.validation_mixin.get_session_key_from_request()
+            is_valid, error_msg = self.validation_mixin.validate_session_key(
+                session_key
+            )
+            if not is_valid:
+                return jsonify({"success": False, "error": error_msg}), 400
+
+            data = request.get_json(silent=True) or {}
+            state = operation(session_key, data)
+            return jsonify({"success": True, "session_key": session_key, "choreography": state})
+
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except KeyError as e:
+            return jsonify({"success": False, "error": e.args[0]}), 404
+        except Exception as e:
+            logger.error(f"Error in choreography route: {e}")
+            return jsonify({"success": False, "error": str(e)}), 500
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Action queue routes for the Robot Simulator"""
+
+import logging
+from flask import jsonify, request
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class QueueRoutes:
+    """Server-side action queue API routes"""
+
+    def __init__(self, app, socketio, sessions_manager, validation_mixin, action_queues):
+        self.app = app
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.validation_mixin = validation_mixin
+        self.action_queues = action_queues
+        self.setup_queue_routes()
+
+    def setup_queue_routes(self):
+        """Set up all queue-related routes"""
+
+        @self.app.route("/queue_action/<robot_id>", methods=["GET"])
+        def get_queue(robot_id: str):
+            """Get the action queue of a robot, or of every robot with 'all'"""
+            return self._handle(
+                robot_id, lambda session_key, data: self.action_queues.get_state(
+                    session_key, robot_id
+                )
+            )
+
+        @self.app.route("/queue_action/<robot_id>", methods=["POST"])
+        def queue_action(robot_id: str):
+            """Append actions to a robot's queue"""
+
+            def enqueue(session_key, data):
+                actions = data.get("actions") or (
+                    [data["action"]] if data.get("action") else []
+                )
+                if not isinstance(actions, list) or not all(
+                    isinstance(action, str) for action in actions
+                ):
+                    raise ValueError("actions must be a list of action names")
+                if not actions:
+                    raise ValueError("Action is required")
+                return self.action_queues.enqueue(session_key, robot_id, actions)
+
+            return self._handle(robot_id, enqueue)
+
+        @self.app.route("/queue_action/<robot_id>", methods=["DELETE"])
+        def clear_queue(robot_id: str):
+            """Drop a robot's pending actions"""
+            return self._handle(
+                robot_id, lambda session_key, data: self.action_queues.clear(
+                    session_key, robot_id
+                )
+            )
+
+        @self.app.route("/preempt_action/<robot_id>", methods=["POST"])
+        def preempt_action(robot_id: str):
+            """Clear a robot's queue and interrupt its current action"""
+
+            def preempt(session_key, data):
+                if not data.get("action"):
+                    raise ValueError("Action is required")
+                return self.action_queues.preempt(session_key, robot_id, data["action"])
+
+            return self._handle(robot_id, preempt)
+
+    def _handle(self, robot_id, operation):
+        """Validate the session, run a queue operation and wrap its result"""
+        try:
+            session_key = self.validation_mixin.get_session_key_from_request()
+            is_valid, error_msg = self.validation_mixin.validate_session_key(
+                session_key
+            )
+            if not is_valid:
+                return jsonify({"success": False, "error": error_msg}), 400
+
+            data = request.get_json(silent=True) or {}
+            queues = operation(session_key, data)
+            return jsonify({"success": True, "robot_id": robot_id, "queues": queues})
+
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        except KeyError as e:
+            return jsonify({"success": False, "error": e.args[0]}), 404
+        except Exception as e:
+            logger.error(f"Error in queue route: {e}")
+            return jsonify({"success": False, "error": str(e)}), 500
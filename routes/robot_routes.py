@@ -3,7 +3,7 @@
 
 import logging
 from flask import jsonify, request
-from constants import DEFAULT_ROBOTS
+from constants import ROBOT_RADIUS
 from models.robot import Robot3D
 
 # Set up logger
@@ -33,15 +33,13 @@ class RobotRoutes:
             if not is_valid:
                 return jsonify({"success": False, "error": error_msg}), 400
 
-            robots = self.sessions_manager.get_session_robots(session_key)
+            robot_states = self.sessions_manager.serialize_session(session_key)
             return jsonify(
                 {
                     "success": True,
                     "session_key": session_key,
-                    "robot_count": len(robots),
-                    "robots": {
-                        robot_id: robot.to_dict() for robot_id, robot in robots.items()
-                    },
+                    "robot_count": len(robot_states),
+                    "robots": robot_states,
                 }
             )
 
@@ -76,12 +74,14 @@ class RobotRoutes:
                         400,
                     )
 
-                robot = Robot3D(
-                    robot_id,
-                    data.get("position", [0, 0, 0]),
-                    data.get("color", "#4A90E2"),
+                robot = self.sessions_manager.add_robot(
+                    session_key,
+                    Robot3D(
+                        robot_id,
+                        data.get("position", [0, 0, 0]),
+                        data.get("color", "#4A90E2"),
+                    ),
                 )
-                robots[robot_id] = robot
 
                 self.socketio.emit(
                     "robot_added",
@@ -114,8 +114,9 @@ class RobotRoutes:
                 robots = self.sessions_manager.get_session_robots(session_key)
 
                 if robot_id == "all":
-                    removed_robots = list(robots.keys())
-                    robots.clear()
+                    removed_robots = self.sessions_manager.remove_all_robots(
+                        session_key
+                    )
                     self.socketio.emit(
                         "robots_removed_all",
                         {"removed_robots": removed_robots},
@@ -124,7 +125,7 @@ class RobotRoutes:
                     logger.info(f"All robots removed from session {session_key}")
                     return jsonify({"success": True, "removed_robots": removed_robots})
                 elif robot_id in robots:
-                    del robots[robot_id]
+                    self.sessions_manager.remove_robot(session_key, robot_id)
                     self.socketio.emit(
                         "robot_removed",
                         {"removed_robot": robot_id},
@@ -153,18 +154,8 @@ class RobotRoutes:
                 if not is_valid:
                     return jsonify({"success": False, "error": error_msg}), 400
 
-                robots = self.sessions_manager.get_session_robots(session_key)
-                robots.clear()
-
-                for config in DEFAULT_ROBOTS:
-                    robot = Robot3D(
-                        config["id"], config["position"].copy(), config["color"]
-                    )
-                    robots[config["id"]] = robot
-
-                robot_states = {
-                    robot_id: robot.to_dict() for robot_id, robot in robots.items()
-                }
+                self.sessions_manager.restore_default_robots(session_key)
+                robot_states = self.sessions_manager.serialize_session(session_key)
                 self.socketio.emit(
                     "robots_reset",
                     {"robots": robot_states},
@@ -177,3 +168,79 @@ class RobotRoutes:
             except Exception as e:
                 logger.error(f"Error in reset_robots: {e}")
                 return jsonify({"success": False, "error": str(e)}), 500
+
+        @self.app.route("/api/robots/<robot_id>/neighbors")
+        def get_robot_neighbors(robot_id):
+            """List robots within ?radius= of a robot, nearest first"""
+            try:
+                session_key = self.validation_mixin.get_session_key_from_request()
+                is_valid, error_msg = self.validation_mixin.validate_session_key(
+                    session_key
+                )
+                if not is_valid:
+                    return jsonify({"success": False, "error": error_msg}), 400
+
+                radius, error_msg = self.validation_mixin.get_radius_from_request(
+                    4 * ROBOT_RADIUS
+                )
+                if error_msg:
+                    return jsonify({"success": False, "error": error_msg}), 400
+
+                robots = self.sessions_manager.get_session_robots(session_key)
+                if robot_id not in robots:
+                    return (
+                        jsonify(
+                            {"success": False, "error": f"Robot {robot_id} not found"}
+                        ),
+                        404,
+                    )
+
+                neighbors = self.sessions_manager.find_neighbors(
+                    session_key, robot_id, radius
+                )
+                return jsonify(
+                    {
+                        "success": True,
+                        "robot_id": robot_id,
+                        "radius": radius,
+                        "neighbors": [
+                            {"robot_id": other_id, "distance": distance}
+                            for other_id, distance in neighbors
+                        ],
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error in get_robot_neighbors: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
+
+        @self.app.route("/api/collisions")
+        def get_collisions():
+            """List pairs of robots whose footprints overlap"""
+            try:
+                session_key = self.validation_mixin.get_session_key_from_request()
+                is_valid, error_msg = self.validation_mixin.validate_session_key(
+                    session_key
+                )
+                if not is_valid:
+                    return jsonify({"success": False, "error": error_msg}), 400
+
+                radius, error_msg = self.validation_mixin.get_radius_from_request(
+                    2 * ROBOT_RADIUS
+                )
+                if error_msg:
+                    return jsonify({"success": False, "error": error_msg}), 400
+
+                # Loads the session (or its snapshot) on first access
+                self.sessions_manager.get_session_robots(session_key)
+                pairs = self.sessions_manager.find_overlaps(session_key, radius=radius)
+                return jsonify(
+                    {
+                        "success": True,
+                        "session_key": session_key,
+                        "radius": radius,
+                        "collisions": [list(pair) for pair in pairs],
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error in get_collisions: {e}")
+                return jsonify({"success": False, "error": str(e)}), 500
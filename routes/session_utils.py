@@ -5,84 +5,75 @@ import base64
 import json
 import logging
 import os
-import time
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 from urllib.parse import unquote_plus
 from zoneinfo import ZoneInfo
 
 import requests
-import boto3
+from requests.adapters import HTTPAdapter
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-_ROBOT_API_URL = os.getenv("ROBOT_API_URL", None)
-_LAST_SSM_FETCH_TIME = 0
+from models.action_spec import ACTION_SPECS
+from server.robot_api_url import RobotAPIURL, parameter_source_from_env
+from server.robot_dispatch import ROBOT_DISPATCH_CONCURRENCY
 
-def get_robot_api_url():
-    """Dynamically fetch the Robot API URL from environment or SSM with caching"""
-    global _ROBOT_API_URL, _LAST_SSM_FETCH_TIME
-    
-    # 1. Return cached or env-set URL immediately
-    if _ROBOT_API_URL:
-        return _ROBOT_API_URL
+# Served from a cache; looked up in the background, never on the request path
+robot_api_url = RobotAPIURL(parameter_source_from_env())
 
-    # 2. Rate-limit SSM lookups to prevent freezing the server on failures (once per min)
-    now = time.time()
-    if now - _LAST_SSM_FETCH_TIME < 60:
-        return None
-    
-    _LAST_SSM_FETCH_TIME = now
 
-    try:
-        # Fallback: Try to get from SSM Parameter Store
-        ssm = boto3.client("ssm")
-        param_name = "/robotics/robot_api_url"
-        logger.info(f"🔍 ROBOT_API_URL not set. Attempting lookup from SSM: {param_name}")
-        
-        response = ssm.get_parameter(Name=param_name)
-        _ROBOT_API_URL = response["Parameter"]["Value"]
-        
-        logger.info(f"✅ Discovered API URL via SSM: {_ROBOT_API_URL}")
-        return _ROBOT_API_URL
-    except Exception as e:
-        logger.error(f"❌ Failed to fetch ROBOT_API_URL from SSM: {e}")
-        return None
+def get_robot_api_url():
+    """Return the Robot API URL from the environment or SSM, cached with a TTL"""
+    return robot_api_url.get()
+
 
 SESSION_AES_KEY = os.environ.get("SESSION_AES_KEY", "0123456789012345").encode()
 SESSION_AES_IV = os.environ.get("SESSION_AES_IV", "5432109876543210").encode()
+SESSION_TIMEZONE = ZoneInfo("Asia/Hong_Kong")
+# Session "from"/"to" are Excel serial dates, counted from this day
+EXCEL_START_DATE = datetime(1899, 12, 30, tzinfo=SESSION_TIMEZONE)
+
+# Decoded session keys (None for keys that do not decode) kept for reuse
+DECRYPT_CACHE_SIZE = int(os.environ.get("DECRYPT_CACHE_SIZE", "1024"))
+_MISSING = object()
+_decrypt_cache = OrderedDict()  # session_key -> session object without is_valid, or None
+_decrypt_cache_lock = threading.Lock()
+_decrypt_cache_metrics = dict(hits=0, misses=0)
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Kept-alive connections to the robot API, enough for every concurrent dispatch
+_robot_http = requests.Session()
+_robot_http.mount(
+    "http://", HTTPAdapter(pool_connections=4, pool_maxsize=ROBOT_DISPATCH_CONCURRENCY)
+)
+_robot_http.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=ROBOT_DISPATCH_CONCURRENCY)
+)
 
-# Mapping from Simulation/Domain actions to standard Real Robot actions
-# (Using only short combat/gesture moves - no long dances)
-# NOTE: Actions MUST start with "robot_" to be recognized by Text Control tools
-REAL_ROBOT_ACTION_MAP = {
-    "domain_unlimited_void": "robot_twist",            # Gojo: Rhythmic focus
-    "domain_malevolent_shrine": "robot_kung_fu",       # Sukuna: Sharp martial arts
-    "domain_self_embodiment": "robot_right_shot_fast", # Mahito: Powerful direct strike
-    "domain_authentic_love": "robot_bow",             # Yuta: Respectful bow
-    "domain_idle_death_gamble": "robot_wave",          # Hakari: Rhythmic waving
-    "domain_yuji_itadori": "robot_sit_ups",            # Yuji: Physical training (Sit ups)
-    "domain_chimera_shadow_garden": "robot_weightlifting", # Megumi: Shadow strength (Weightlifting)
-    "domain_time_cell_moon_palace": "robot_left_shot_fast", # Naoya: Frame-by-frame strike (Left Shot)
-    "lapse_blue": "robot_left_uppercut",              # Blue: Left hand attraction strike
-    "reversal_red": "robot_right_uppercut",           # Red: Right hand strike
-    "hollow_purple": "robot_chest"                     # Purple: 2-hand chest expansion blast
-}
 
-def send_request(method: str, robot_id: str, action: str) -> Optional[Dict[str, Any]]:
-    """Send request to external robot API with action mapping for hardware compatibility"""
+class RobotAPIError(Exception):
+    """A real-robot API call that failed; ``retryable`` unless the API rejected it"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def send_robot_command(method: str, robot_id: str, action: str) -> Dict[str, Any]:
+    """Send one command to the external robot API; raises RobotAPIError on failure"""
     api_url = get_robot_api_url()
     if not api_url:
-        logger.warning("❌ ROBOT_API_URL is NOT set and SSM lookup failed. Cannot call real robot.")
-        return None
+        raise RobotAPIError("ROBOT_API_URL is NOT set or not discovered yet")
 
     # Map the action to a standard hardware-supported action if necessary
-    hardware_action = REAL_ROBOT_ACTION_MAP.get(action, action)
+    spec = ACTION_SPECS.get(action)
+    hardware_action = spec.hardware_action if spec is not None else action
     
     target_url = f"{api_url.rstrip('/')}/{robot_id.lstrip('/')}"
     data = {"method": method, "action": hardware_action}
@@ -97,19 +88,33 @@ def send_request(method: str, robot_id: str, action: str) -> Optional[Dict[str,
     logger.info(f"🚀 CALLING REAL ROBOT (INTERNAL): {target_url} with data: {data} (Original: {action})")
     
     try:
-        response = requests.post(
+        response = _robot_http.post(
             target_url,
             json=data,
             headers=headers,
             timeout=5,
         )
-        logger.info(f"📥 API RESPONSE [{response.status_code}]: {response.text}")
-        response.raise_for_status()
-        return response.json()
     except requests.RequestException as e:
-        logger.error(f"❌ Error sending request to {target_url}: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-             logger.error(f"❌ Response details: {e.response.text}")
+        raise RobotAPIError(f"Error sending request to {target_url}: {e}") from e
+    logger.info(f"📥 API RESPONSE [{response.status_code}]: {response.text}")
+    if response.status_code >= 400:
+        # Overload and server errors may pass; any other rejection will not
+        raise RobotAPIError(
+            f"{target_url} answered {response.status_code}: {response.text}",
+            retryable=response.status_code >= 500 or response.status_code == 429,
+        )
+    try:
+        return response.json()
+    except ValueError:
+        return {"status_code": response.status_code, "text": response.text}
+
+
+def send_request(method: str, robot_id: str, action: str) -> Optional[Dict[str, Any]]:
+    """Send request to external robot API with action mapping for hardware compatibility"""
+    try:
+        return send_robot_command(method, robot_id, action)
+    except RobotAPIError as e:
+        logger.error(f"❌ {e}")
         return None
 
 
@@ -117,13 +122,48 @@ def decrypt(session_key: str) -> Optional[dict]:
     """
     Decrypts an AES encrypted string using a fixed key and IV.
 
+    Decoded sessions (and keys that fail to decode) are kept in a bounded
+    LRU cache; a cached session only has ``is_valid`` recomputed against
+    its from/to window, so it still expires on time.
+
     Args:
         session_key: The base64-encoded AES encrypted string.
 
     Returns:
         A dictionary containing the decrypted session data, or None if decryption fails.
     """
-
+    with _decrypt_cache_lock:
+        cached = _decrypt_cache.get(session_key, _MISSING)
+        if cached is not _MISSING:
+            _decrypt_cache.move_to_end(session_key)
+            _decrypt_cache_metrics["hits"] += 1
+
+    if cached is _MISSING:
+        cached = _decrypt_session(session_key)
+        with _decrypt_cache_lock:
+            _decrypt_cache_metrics["misses"] += 1
+            if DECRYPT_CACHE_SIZE > 0:
+                _decrypt_cache[session_key] = cached
+                while len(_decrypt_cache) > DECRYPT_CACHE_SIZE:
+                    _decrypt_cache.popitem(last=False)
+
+    if cached is None:
+        return None
+    # A fresh copy, so callers cannot change the cached one
+    session_object = dict(cached)
+    decoded_datetime_from = session_object.get("from")
+    decoded_datetime_to = session_object.get("to")
+    current_time = datetime.now(SESSION_TIMEZONE)
+    session_object["is_valid"] = (
+        decoded_datetime_from is not None
+        and decoded_datetime_to is not None
+        and decoded_datetime_from < current_time < decoded_datetime_to
+    )
+    return session_object
+
+
+def _decrypt_session(session_key: str) -> Optional[dict]:
+    """Decrypt and parse a session key, without the ``is_valid`` check"""
     try:
         # Convert the encrypted string to bytes
         # Use unquote_plus to handle URL-encoded characters, spaces, and plus signs
@@ -146,8 +186,6 @@ def decrypt(session_key: str) -> Optional[dict]:
         # Decode the bytes to a string
         decrypted_string = decrypted_bytes.decode("utf-8")
 
-        logger.info(f"Decrypted string: {decrypted_string}")
-
         # TODO: Quick fix for trailing double quote issue
         if decrypted_string.endswith('"'):
             decrypted_string = decrypted_string[:-1]
@@ -158,31 +196,22 @@ def decrypt(session_key: str) -> Optional[dict]:
             logger.error(f"JSON parsing error: {json_error}")
             return None
 
-        # Convert Excel serial dates to datetime and check validity
-        excel_start_date = datetime(1899, 12, 30, tzinfo=ZoneInfo("Asia/Hong_Kong"))
-        decoded_datetime_to = decoded_datetime_from = None
-
+        # Convert Excel serial dates to datetime
         if "to" in session_object:
-            decoded_datetime_to = excel_start_date + timedelta(
-                days=session_object["to"]
-            )
-            session_object["to"] = decoded_datetime_to
+            session_object["to"] = EXCEL_START_DATE + timedelta(days=session_object["to"])
 
         if "from" in session_object:
-            decoded_datetime_from = excel_start_date + timedelta(
-                days=session_object["from"]
-            )
-            session_object["from"] = decoded_datetime_from
-
-        current_time = datetime.now(ZoneInfo("Asia/Hong_Kong"))
-        session_object["is_valid"] = (
-            decoded_datetime_from is not None
-            and decoded_datetime_to is not None
-            and decoded_datetime_from < current_time < decoded_datetime_to
-        )
-        logger.info(f"Session object after decryption: {session_object}")
+            session_object["from"] = EXCEL_START_DATE + timedelta(days=session_object["from"])
+
+        logger.debug(f"🔓 Decrypted session for robot {session_object.get('robot')}")
         return session_object
 
     except Exception as e:
         logger.info(f"Decryption failed: {e}")
         return None
+
+
+def get_decrypt_cache_metrics() -> Dict[str, int]:
+    """Hit, miss and size counters of the decrypted session cache"""
+    with _decrypt_cache_lock:
+        return dict(_decrypt_cache_metrics, size=len(_decrypt_cache))
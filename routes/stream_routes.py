@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Server-Sent Events routes for the Robot Simulator"""
+
+import logging
+from flask import Response, jsonify, request
+
+from server.event_stream import DEFAULT_STREAM_EVENTS
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class StreamRoutes:
+    """Read-only event stream API routes"""
+
+    def __init__(self, app, socketio, sessions_manager, validation_mixin, event_streams):
+        self.app = app
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.validation_mixin = validation_mixin
+        self.event_streams = event_streams
+        self.setup_stream_routes()
+
+    def setup_stream_routes(self):
+        """Set up all stream-related routes"""
+
+        @self.app.route("/api/stream", methods=["GET"])
+        def stream():
+            """Stream a session's action, state and media events as SSE"""
+            session_key = self.validation_mixin.get_session_key_from_request()
+            is_valid, error_msg = self.validation_mixin.validate_session_key(session_key)
+            if not is_valid:
+                return jsonify({"success": False, "error": error_msg}), 400
+
+            events = request.args.get("events")
+            events = (
+                {event.strip() for event in events.split(",") if event.strip()}
+                if events else DEFAULT_STREAM_EVENTS
+            )
+            # EventSource sends the header on reconnects; a query parameter
+            # lets a new page resume too
+            last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+                "last_event_id"
+            )
+
+            logger.debug(
+                f"📺 SSE stream opened for session {session_key} "
+                f"(Last-Event-ID {last_event_id})"
+            )
+            return Response(
+                self.event_streams.stream(
+                    session_key, events, last_event_id,
+                    snapshot=lambda: self._snapshot(session_key),
+                ),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+    def _snapshot(self, session_key):
+        """Return ``(seq, states)`` after flushing pending changes"""
+        self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
+        return self.sessions_manager.state_snapshot(session_key)
@@ -2,8 +2,11 @@
 """Validation utilities for the Robot Simulator API"""
 
 import logging
+import math
 from flask import request
 
+from constants import MAX_QUERY_RADIUS
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,21 @@ class ValidationMixin:
             return False, "Session key cannot be empty"
         return True, None
 
+    def get_radius_from_request(self, default):
+        """Parse ``?radius=``; returns ``(radius, error_msg)``"""
+        value = request.args.get("radius")
+        if value is None:
+            return default, None
+        try:
+            radius = float(value)
+        except ValueError:
+            return None, "Radius must be a number"
+        if not math.isfinite(radius) or radius <= 0:
+            return None, "Radius must be a positive number"
+        if radius > MAX_QUERY_RADIUS:
+            return None, f"Radius is limited to {MAX_QUERY_RADIUS}"
+        return radius, None
+
     def validate_robot_data(self, data):
         """Validate robot data for creation/updates"""
         if not isinstance(data, dict):
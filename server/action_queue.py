@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Server-side per-robot action queues for the Robot Simulator"""
+
+import logging
+from collections import deque
+
+from models.action_spec import ACTION_SPECS, action_spec
+from server.scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def validate_action(action, name="action"):
+    """Raise ValueError naming ``name`` unless ``action`` is a known action"""
+    if not isinstance(action, str) or (
+        action not in ACTION_SPECS and action.lower() not in ACTION_SPECS
+    ):
+        raise ValueError(f"{name} is not a known action: {action!r}")
+
+
+class RobotActionQueue:
+    """Pending actions of one robot plus the deadline of the one playing"""
+
+    __slots__ = ("pending", "current", "deadline")
+
+    def __init__(self):
+        self.pending = deque()
+        self.current = None
+        self.deadline = None
+
+    def to_dict(self, robot_id):
+        return {
+            "robot_id": robot_id,
+            "current": self.current,
+            "pending": list(self.pending),
+        }
+
+
+class ActionQueues:
+    """Sequential action queues owned by the server, one per robot.
+
+    Queues live in each session (``session['queues']``) so they survive page
+    reloads and are shared by every tab. A queue advances when the playing
+    action's ACTION_DURATIONS deadline fires on the shared scheduler, and
+    an ``action_queue`` event is broadcast only when a queue changes.
+    """
+
+    def __init__(self, socketio, sessions_manager, dispatch, scheduler=None):
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.dispatch = dispatch
+        self.scheduler = scheduler or get_scheduler()
+
+    def _queue(self, session_key, robot_id):
+        queues = self.sessions_manager.get_or_create_session(session_key)["queues"]
+        queue = queues.get(robot_id)
+        if queue is None:
+            queue = queues[robot_id] = RobotActionQueue()
+        return queue
+
+    def _target_ids(self, session_key, robot_id):
+        robots = self.sessions_manager.get_session_robots(session_key)
+        if robot_id == "all":
+            return list(robots.keys())
+        if robot_id not in robots:
+            raise KeyError(f"Robot {robot_id} not found")
+        return [robot_id]
+
+    def get_state(self, session_key, robot_id="all"):
+        """Return ``{robot_id: queue_state}`` for one robot or the whole session"""
+        queues = self.sessions_manager.get_or_create_session(session_key)["queues"]
+        return {
+            rid: queues[rid].to_dict(rid) if rid in queues
+            else RobotActionQueue().to_dict(rid)
+            for rid in self._target_ids(session_key, robot_id)
+        }
+
+    def enqueue(self, session_key, robot_id, actions):
+        """Append actions to the queue(s); idle robots start right away"""
+        for index, action in enumerate(actions):
+            validate_action(action, f"actions[{index}]")
+        changed = []
+        with self.sessions_manager.session_lock(session_key):
+            for rid in self._target_ids(session_key, robot_id):
+                queue = self._queue(session_key, rid)
+                queue.pending.extend(actions)
+                if queue.current is None and queue.deadline is None:
+                    robot = self.sessions_manager.get_session_robots(session_key)[rid]
+                    if robot.is_animating:
+                        # Let an action started outside the queue finish first
+                        queue.deadline = self.scheduler.schedule(
+                            robot.action_duration - robot.action_elapsed,
+                            self._advance, session_key, rid, queue,
+                        )
+                    else:
+                        self._advance(session_key, rid, queue, emit=False)
+                changed.append(rid)
+        self._emit_state(session_key, changed)
+        return self.get_state(session_key, robot_id)
+
+    def clear(self, session_key, robot_id):
+        """Drop pending actions; the action already playing runs to completion"""
+        changed = []
+        with self.sessions_manager.session_lock(session_key):
+            for rid in self._target_ids(session_key, robot_id):
+                queue = self._queue(session_key, rid)
+                if queue.pending:
+                    queue.pending.clear()
+                    changed.append(rid)
+        self._emit_state(session_key, changed)
+        return self.get_state(session_key, robot_id)
+
+    def preempt(self, session_key, robot_id, action):
+        """Drop pending actions and interrupt the current one with ``action``"""
+        validate_action(action)
+        with self.sessions_manager.session_lock(session_key):
+            target_ids = self._target_ids(session_key, robot_id)
+            for rid in target_ids:
+                queue = self._queue(session_key, rid)
+                queue.pending.clear()
+                queue.pending.append(action)
+                self.scheduler.cancel(queue.deadline)
+                queue.deadline = None
+            for rid in target_ids:
+                self._advance(session_key, rid, self._queue(session_key, rid), emit=False)
+        self._emit_state(session_key, target_ids)
+        return self.get_state(session_key, robot_id)
+
+    def _advance(self, session_key, robot_id, queue, emit=True):
+        """Start the next queued action, or mark the queue idle"""
+        session = self.sessions_manager.sessions.get(session_key)
+        if session is None:
+            return
+        with session["lock"]:
+            # The queue may have been dropped (robot removed or session reset)
+            # while its deadline was pending
+            if session["queues"].get(robot_id) is not queue:
+                return
+            if robot_id not in session["robots"]:
+                session["queues"].pop(robot_id, None)
+                return
+
+            queue.deadline = None
+            queue.current = queue.pending.popleft() if queue.pending else None
+            if queue.current is not None:
+                # Dispatch off the scheduler worker so a slow real-robot call
+                # cannot delay other deadlines
+                self.socketio.start_background_task(
+                    self.dispatch, session_key, robot_id, queue.current
+                )
+                queue.deadline = self.scheduler.schedule(
+                    action_spec(queue.current).duration,
+                    self._advance, session_key, robot_id, queue,
+                )
+        if emit:
+            self._emit_state(session_key, [robot_id])
+
+    def _emit_state(self, session_key, robot_ids):
+        if not robot_ids:
+            return
+        session = self.sessions_manager.sessions.get(session_key)
+        if session is None:
+            return
+        with session["lock"]:
+            queues = {rid: session["queues"][rid].to_dict(rid) for rid in robot_ids
+                      if rid in session["queues"]}
+        self.socketio.emit(
+            "action_queue",
+            {"session_key": session_key, "queues": queues},
+            room=f"session_{session_key}",
+        )
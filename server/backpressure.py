@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Per-client outbound queues with latest-state-wins compaction"""
+
+import logging
+import os
+import threading
+from collections import deque
+
+from engineio import packet as eio_packet
+from socketio import packet as sio_packet
+
+from server.broadcast import merge_state_deltas
+from server.camera_control import merge_camera_controls
+from server.serializers import dumps, loads
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Bytes a slow client may have waiting before its oldest messages are
+# dropped; 0 sends everything straight to Engine.IO as before
+CLIENT_QUEUE_BYTES = int(os.environ.get("CLIENT_QUEUE_BYTES", str(1024 * 1024)))
+# A client whose Engine.IO queue holds this many packets counts as backed up
+ENGINEIO_HIGH_WATER = 8
+DRAIN_INTERVAL = 0.05
+
+# Only the newest of these is worth sending
+LATEST_WINS_EVENTS = {"robot_states", "video_source_changed"}
+
+
+def _merge_positions(first, second):
+    return [dict(first[0], **second[0])]
+
+
+def _merge_deltas(first, second):
+    if first[0]["seq"] != second[0]["base"]:
+        return None
+    # Keep the newer delta's event id, if it has one
+    return [merge_state_deltas(first[0], second[0]), *second[1:]]
+
+
+def _merge_camera(first, second):
+    if second[0].get("type") == "reset":
+        return second
+    if first[0].get("type") != second[0].get("type"):
+        return None
+    return [merge_camera_controls(first[0], second[0])]
+
+
+# Events folded into the queued one: merge(queued_args, new_args) -> args or None
+MERGEABLE_EVENTS = {
+    "robot_positions": _merge_positions,
+    "robot_states_delta": _merge_deltas,
+    "camera_control": _merge_camera,
+}
+
+# Over budget these go first: a later copy, a resync or the next update
+# replaces them, while a lost action or speech is gone for good
+COMPACTABLE_EVENTS = LATEST_WINS_EVENTS | MERGEABLE_EVENTS.keys()
+
+
+class ClientQueue:
+    """Messages waiting for one backed-up client, oldest first"""
+
+    __slots__ = ("entries", "bytes", "collapsed", "dropped", "partial")
+
+    def __init__(self):
+        # Each entry is [event, args, size] for a decoded event, or
+        # [None, engine_io_packets, size] for a message passed on as is
+        self.entries = deque()
+        self.bytes = 0
+        self.collapsed = 0
+        self.dropped = 0
+        self.partial = None  # binary message still collecting attachments
+
+    def metrics(self):
+        return dict(depth=len(self.entries), bytes=self.bytes,
+                    collapsed=self.collapsed, dropped=self.dropped)
+
+
+class OutboundQueues:
+    """Backpressure between Socket.IO emits and each client's connection.
+
+    Every packet python-socketio sends to a client passes through
+    ``send``. While the client's Engine.IO queue is short, the packet goes
+    straight through. Once it holds ``ENGINEIO_HIGH_WATER`` packets, the
+    client counts as backed up and further messages wait here instead:
+
+    - ``robot_states`` and ``video_source_changed`` replace any queued copy
+    - ``robot_positions``, chained ``robot_states_delta`` and
+      same-type ``camera_control`` updates are merged into the queued one
+    - everything else (``actions``, ``speech``, ...) is kept in order
+    - ``batch`` frames are unpacked so their events compact the same way
+
+    Above ``max_bytes``, the oldest compactable messages (states, deltas,
+    positions, camera) are dropped first, since newer ones replace them and
+    clients resync from the gap in delta versions; ordered messages go
+    only when nothing else is left. A drain task hands the
+    compacted queue to Engine.IO as one ``batch`` once it has room again.
+    """
+
+    def __init__(self, socketio, max_bytes=CLIENT_QUEUE_BYTES):
+        self.socketio = socketio
+        self.server = socketio.server
+        self.max_bytes = max_bytes
+        self._send = None
+        self._lock = threading.Lock()
+        self._clients = {}  # eio_sid -> ClientQueue
+        self._attachments = {}  # eio_sid -> attachments to pass straight through
+        self.metrics = dict(collapsed=0, dropped=0)
+
+    def install(self):
+        """Route python-socketio's per-client sends through this object.
+
+        Returns False, leaving sends untouched, when the installed
+        python-socketio or Engine.IO lacks the internals hooked here.
+        """
+        missing = self._missing_hook()
+        if missing is not None:
+            logger.warning(f"⚠️ Per-client outbound queues disabled: {missing} not found")
+            return False
+        self._send = self.server._send_eio_packet
+        self.server._send_eio_packet = self.send
+        self.socketio.start_background_task(self._drain_loop)
+        logger.info(f"🚦 Per-client outbound queues enabled ({self.max_bytes} bytes each)")
+        return True
+
+    def _missing_hook(self):
+        if not callable(getattr(self.server, "_send_eio_packet", None)):
+            return "socketio.Server._send_eio_packet"
+        if not isinstance(getattr(getattr(self.server, "eio", None), "sockets", None), dict):
+            return "engineio.Server.sockets"
+        if not callable(getattr(self.server.manager, "eio_sid_from_sid", None)):
+            return "socketio Manager.eio_sid_from_sid"
+        return None
+
+    def _engineio_backlog(self, eio_sid):
+        # A socket without a queue never counts as backed up
+        queue = getattr(self.server.eio.sockets.get(eio_sid), "queue", None)
+        return queue.qsize() if queue is not None else 0
+
+    def send(self, eio_sid, pkt):
+        """Send one Engine.IO packet to a client, or queue it if the client is behind"""
+        with self._lock:
+            remaining = self._attachments.get(eio_sid)
+            if remaining:
+                # Attachments follow their message straight through
+                if remaining == 1:
+                    del self._attachments[eio_sid]
+                else:
+                    self._attachments[eio_sid] = remaining - 1
+                queue = None
+            else:
+                queue = self._clients.get(eio_sid)
+                if queue is None and self._engineio_backlog(eio_sid) >= ENGINEIO_HIGH_WATER:
+                    queue = self._clients[eio_sid] = ClientQueue()
+                if queue is None:
+                    count = _attachment_count(pkt)
+                    if count:
+                        self._attachments[eio_sid] = count
+                else:
+                    self._enqueue(queue, pkt)
+                    return
+        self._send(eio_sid, pkt)
+
+    def _enqueue(self, queue, pkt):
+        if queue.partial is not None:
+            queue.partial[1].append(pkt)
+            queue.partial[2] += len(pkt.data)
+            if len(queue.partial[1]) > queue.partial[3]:
+                entry, queue.partial = queue.partial[:3], None
+                self._append(queue, entry)
+            return
+        count = _attachment_count(pkt)
+        if count:
+            queue.partial = [None, [pkt], len(pkt.data), count]
+            return
+        decoded = _decode(pkt)
+        if decoded is None:
+            self._append(queue, [None, [pkt], len(pkt.data)])
+        elif decoded[0] == "batch":
+            for item in decoded[1][0]["events"]:
+                self._add_event(queue, item["event"], item["args"])
+        else:
+            self._add_event(queue, decoded[0], decoded[1])
+
+    def _add_event(self, queue, event, args):
+        if event in LATEST_WINS_EVENTS or event in MERGEABLE_EVENTS:
+            for index in range(len(queue.entries) - 1, -1, -1):
+                queued = queue.entries[index]
+                if queued[0] != event:
+                    continue
+                if event in MERGEABLE_EVENTS:
+                    merged = MERGEABLE_EVENTS[event](queued[1], args)
+                    if merged is None:
+                        continue  # e.g. a camera update of another type
+                    args = merged
+                # The newer copy takes the old one's place at the back
+                del queue.entries[index]
+                queue.bytes -= queued[2]
+                queue.collapsed += 1
+                self.metrics["collapsed"] += 1
+                break
+        self._append(queue, [event, args, len(dumps(args)) + len(event)])
+
+    def _append(self, queue, entry):
+        queue.entries.append(entry)
+        queue.bytes += entry[2]
+        while queue.bytes > self.max_bytes and len(queue.entries) > 1:
+            victim = next(
+                (e for e in queue.entries if e[0] in COMPACTABLE_EVENTS),
+                queue.entries[0],
+            )
+            queue.entries.remove(victim)
+            queue.bytes -= victim[2]
+            queue.dropped += 1
+            self.metrics["dropped"] += 1
+
+    def _drain_loop(self):
+        while True:
+            self.socketio.sleep(DRAIN_INTERVAL)
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"❌ Outbound queue drain failed: {e}")
+
+    def drain(self):
+        """Hand every backed-up client whose connection caught up its queued messages"""
+        ready = []
+        with self._lock:
+            for eio_sid, queue in list(self._clients.items()):
+                if eio_sid not in self.server.eio.sockets:
+                    del self._clients[eio_sid]  # disconnected
+                    continue
+                if queue.partial is not None:
+                    continue
+                if self._engineio_backlog(eio_sid) >= ENGINEIO_HIGH_WATER:
+                    continue
+                del self._clients[eio_sid]
+                ready.append((eio_sid, queue.entries))
+        for eio_sid, entries in ready:
+            for pkt in self._encode(entries):
+                self._send(eio_sid, pkt)
+
+    def _encode(self, entries):
+        """Turn queued entries back into Engine.IO packets, batching decoded events"""
+        events = []
+        for event, args, _ in entries:
+            if event is not None:
+                events.append({"event": event, "args": args})
+                continue
+            yield from self._encode_events(events)
+            events = []
+            yield from args
+        yield from self._encode_events(events)
+
+    def _encode_events(self, events):
+        if not events:
+            return
+        if len(events) == 1:
+            data = [events[0]["event"], *events[0]["args"]]
+        else:
+            data = ["batch", {"events": events}]
+        encoded = self.server.packet_class(sio_packet.EVENT, data=data).encode()
+        yield eio_packet.Packet(eio_packet.MESSAGE, encoded)
+
+    def client_metrics(self, sid):
+        """Queue depth and counters for one connected client, by Socket.IO sid"""
+        if self._send is None:
+            return dict(ClientQueue().metrics(), backed_up=False, engineio_queue=0)
+        eio_sid = self.server.manager.eio_sid_from_sid(sid, "/")
+        backlog = self._engineio_backlog(eio_sid) if eio_sid else 0
+        with self._lock:
+            queue = self._clients.get(eio_sid)
+            metrics = queue.metrics() if queue is not None else ClientQueue().metrics()
+        return dict(metrics, backed_up=queue is not None, engineio_queue=backlog)
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(
+                self.metrics,
+                backed_up_clients=len(self._clients),
+                queued_bytes=sum(queue.bytes for queue in self._clients.values()),
+            )
+
+
+def _attachment_count(pkt):
+    """Binary attachments that follow a Socket.IO message packet"""
+    data = pkt.data
+    if not isinstance(data, str) or data[:1] not in ("5", "6"):
+        return 0
+    dash = data.find("-")
+    return int(data[1:dash]) if dash > 1 else 0
+
+
+def _decode(pkt):
+    """Return ``(event, args)`` for a plain event on the default namespace"""
+    data = pkt.data
+    if not isinstance(data, str) or not data.startswith('2["'):
+        return None
+    try:
+        event, *args = loads(data[1:])
+    except ValueError:
+        return None
+    return event, args
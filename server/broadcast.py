@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Per-session coalescing of room broadcasts for the Robot Simulator"""
+
+import logging
+import os
+import threading
+
+from server.scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Events emitted to a session room within this window go out as one batch;
+# 0 sends every event immediately
+BROADCAST_WINDOW_MS = float(os.environ.get("BROADCAST_WINDOW_MS", "25"))
+# A batch this large is sent right away instead of waiting out the window
+MAX_BATCH_EVENTS = 64
+
+
+def merge_state_deltas(first, second):
+    """Compose two consecutive ``robot_states_delta`` payloads into one"""
+    changed = {robot_id: dict(fields) for robot_id, fields in first["changed"].items()}
+    for robot_id in second["removed"]:
+        changed.pop(robot_id, None)
+    for robot_id, fields in second["changed"].items():
+        changed.setdefault(robot_id, {}).update(fields)
+    removed = [robot_id for robot_id in first["removed"] if robot_id not in second["changed"]]
+    removed += [robot_id for robot_id in second["removed"] if robot_id not in removed]
+    return {"seq": second["seq"], "base": first["base"], "changed": changed, "removed": removed}
+
+
+class CoalescingSocketIO:
+    """Wraps SocketIO so emits to ``session_*`` rooms are buffered per room.
+
+    The first event for a room opens a window of ``window`` seconds; every
+    event emitted to that room until it closes is sent, in order, as a
+    single ``batch`` event. Adjacent ``robot_positions`` and
+    ``robot_states_delta`` events are merged on the way in. A lone event is
+    sent unwrapped. Everything else (``on``, ``start_background_task``,
+    emits to other targets) goes straight to the wrapped SocketIO.
+    """
+
+    def __init__(self, socketio, window=BROADCAST_WINDOW_MS / 1000.0,
+                 low_latency=None, scheduler=None):
+        self._socketio = socketio
+        self.window = window
+        self.low_latency = low_latency  # callable(session_key) -> bool
+        self.scheduler = scheduler or get_scheduler()
+        self._lock = threading.Lock()
+        self._buffers = {}  # room -> [[event, args], ...]
+
+    def __getattr__(self, name):
+        return getattr(self._socketio, name)
+
+    def emit(self, event, *args, room=None, to=None, **kwargs):
+        room = to or room
+        if (not isinstance(room, str) or not room.startswith("session_")
+                or kwargs or (self.low_latency and self.low_latency(room[len("session_"):]))):
+            if isinstance(room, str):
+                # Keep per-room ordering with anything already buffered
+                self.flush(room)
+            return self._socketio.emit(event, *args, to=room, **kwargs)
+
+        with self._lock:
+            buffer = self._buffers.get(room)
+            if buffer is None:
+                buffer = self._buffers[room] = []
+                self.scheduler.schedule(self.window, self.flush, room)
+            if buffer and buffer[-1][0] == event and len(args) == 1:
+                last = buffer[-1][1]
+                if event == "robot_positions":
+                    last[0] = dict(last[0], **args[0])
+                    return
+                if event == "robot_states_delta" and last[0]["seq"] == args[0]["base"]:
+                    last[0] = merge_state_deltas(last[0], args[0])
+                    return
+            buffer.append([event, list(args)])
+            full = len(buffer) >= MAX_BATCH_EVENTS
+        if full:
+            self.flush(room)
+
+    def flush(self, room):
+        """Send a room's buffered events now"""
+        with self._lock:
+            buffer = self._buffers.pop(room, None)
+        if buffer:
+            _send_buffer(self._socketio, buffer, room)
+
+    def emit_batch(self, events, room):
+        """Send ``[(event, payload), ...]`` now, in one frame with anything buffered"""
+        with self._lock:
+            buffer = self._buffers.pop(room, None) or []
+        buffer.extend([event, [payload]] for event, payload in events)
+        if buffer:
+            _send_buffer(self._socketio, buffer, room)
+
+
+def emit_batch(socketio, events, room):
+    """Send ``[(event, payload), ...]`` to a room as a single frame"""
+    if isinstance(socketio, CoalescingSocketIO):
+        socketio.emit_batch(events, room)
+    elif events:
+        _send_buffer(socketio, [[event, [payload]] for event, payload in events], room)
+
+
+def _send_buffer(socketio, buffer, room):
+    if len(buffer) == 1:
+        event, args = buffer[0]
+        socketio.emit(event, *args, to=room)
+        return
+    socketio.emit(
+        "batch",
+        {"events": [{"event": event, "args": args} for event, args in buffer]},
+        to=room,
+    )
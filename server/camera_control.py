@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Rate-limited, merged camera_control forwarding for the Robot Simulator"""
+
+import logging
+import os
+import threading
+
+from server.scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Most camera_control updates forwarded to a session per second; 0 forwards
+# every packet as it arrives
+CAMERA_CONTROL_HZ = float(os.environ.get("CAMERA_CONTROL_HZ", "30"))
+
+# Largest merged delta per field, so a burst cannot throw the camera across
+# the scene. In the units of static/js/robot3d.js: rotate 60 -> 3 rad,
+# pan 40 -> one camera distance, zoom 250 -> 500 units
+CAMERA_DELTA_LIMITS = {
+    "rotate": {"dx": 60.0, "dy": 60.0},
+    "pan": {"dx": 40.0, "dy": 40.0},
+    "zoom": {"delta": 250.0},
+}
+CAMERA_CONTROL_TYPES = set(CAMERA_DELTA_LIMITS) | {"reset"}
+
+
+def merge_camera_controls(first, second):
+    """Sum two forwarded updates of the same type into one, clamped"""
+    limits = CAMERA_DELTA_LIMITS.get(second["type"], {})
+    params = {
+        field: max(-limit, min(limit, first["params"].get(field, 0) + second["params"].get(field, 0)))
+        for field, limit in limits.items()
+    }
+    return dict(second, params=params,
+                merged=first.get("merged", 1) + second.get("merged", 1))
+
+
+class CameraControlAccumulator:
+    """Merges each session's camera_control deltas and forwards them at a capped rate.
+
+    The first packet after a quiet period is forwarded immediately and opens
+    an interval of ``1 / max_rate`` seconds. Packets arriving during the
+    interval are summed per type (``rotate``, ``pan``, ``zoom``), clamped to
+    ``CAMERA_DELTA_LIMITS`` and forwarded together when it ends. A ``reset``
+    supersedes any deltas still pending before it.
+    """
+
+    def __init__(self, socketio, max_rate=CAMERA_CONTROL_HZ, scheduler=None):
+        self.socketio = socketio
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.scheduler = scheduler or get_scheduler()
+        self._lock = threading.Lock()
+        self._pending = {}  # session_key -> {type: update}, None when nothing is waiting
+        self.metrics = dict(received=0, forwarded=0, merged=0, dropped=0, clamped=0)
+
+    def submit(self, session_key, data):
+        """Accept one camera_control packet; returns False if it was malformed"""
+        update = self._parse(data)
+        with self._lock:
+            self.metrics["received"] += 1
+            if update is None:
+                self.metrics["dropped"] += 1
+                return False
+            if not self.interval:
+                self._clamp(update)
+                self.metrics["forwarded"] += 1
+            elif session_key not in self._pending:
+                # Quiet session: forward now and hold later packets for an interval
+                self._pending[session_key] = None
+                self.scheduler.schedule(self.interval, self.flush, session_key)
+                self._clamp(update)
+                self.metrics["forwarded"] += 1
+            else:
+                self._merge(session_key, update)
+                return True
+        self._emit(session_key, [update])
+        return True
+
+    def flush(self, session_key):
+        """Forward what a session accumulated during the last interval"""
+        with self._lock:
+            pending = self._pending.get(session_key)
+            if not pending:
+                # Nothing arrived during the interval; the session is quiet again
+                self._pending.pop(session_key, None)
+                return
+            self._pending[session_key] = None
+            self.scheduler.schedule(self.interval, self.flush, session_key)
+            updates = list(pending.values())
+            for update in updates:
+                self._clamp(update)
+            self.metrics["forwarded"] += len(updates)
+        self._emit(session_key, updates)
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(self.metrics, pending_sessions=len(self._pending))
+
+    @staticmethod
+    def _parse(data):
+        """Return ``{"type", "params", "merged"}`` for a valid packet, else None"""
+        control_type = data.get("type")
+        if control_type not in CAMERA_CONTROL_TYPES:
+            return None
+        if control_type == "reset":
+            return {"type": control_type, "params": {}, "merged": 1}
+        params = data.get("params")
+        if not isinstance(params, dict):
+            return None
+        try:
+            params = {
+                field: float(params.get(field, 0))
+                for field in CAMERA_DELTA_LIMITS[control_type]
+            }
+        except (TypeError, ValueError):
+            return None
+        return {"type": control_type, "params": params, "merged": 1}
+
+    def _merge(self, session_key, update):
+        pending = self._pending[session_key]
+        if update["type"] == "reset":
+            # Deltas queued before a reset would be undone by it
+            if pending:
+                self.metrics["dropped"] += len(pending)
+            self._pending[session_key] = {"reset": update}
+            return
+        if pending is None:
+            pending = self._pending[session_key] = {}
+        queued = pending.get(update["type"])
+        if queued is None:
+            pending[update["type"]] = update
+            return
+        for field, value in update["params"].items():
+            queued["params"][field] += value
+        queued["merged"] += 1
+        self.metrics["merged"] += 1
+
+    def _clamp(self, update):
+        limits = CAMERA_DELTA_LIMITS.get(update["type"], {})
+        params = update["params"]
+        for field, limit in limits.items():
+            if abs(params[field]) > limit:
+                params[field] = max(-limit, min(limit, params[field]))
+                self.metrics["clamped"] += 1
+
+    def _emit(self, session_key, updates):
+        for update in updates:
+            self.socketio.emit(
+                "camera_control",
+                dict(update, session_key=session_key),
+                room=f"session_{session_key}",
+            )
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Choreography timeline engine for multi-robot shows"""
+
+import bisect
+import logging
+import time
+
+from models.action_spec import action_spec
+from server.action_queue import validate_action
+from server.scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Entries whose offsets fall within this window are dispatched together
+STEP_WINDOW = 0.001
+# Most entries accepted in one timeline
+MAX_TIMELINE_ENTRIES = 1000
+
+
+class Choreography:
+    """A parsed timeline: entries grouped into steps sorted by offset"""
+
+    def __init__(self, timeline, groups=None):
+        self.groups = self._parse_groups(groups or {})
+        if len(timeline) > MAX_TIMELINE_ENTRIES:
+            raise ValueError(f"timeline is limited to {MAX_TIMELINE_ENTRIES} entries")
+        entries = sorted(
+            (self._parse_entry(index, entry) for index, entry in enumerate(timeline)),
+            key=lambda entry: entry[0],
+        )
+        if not entries:
+            raise ValueError("timeline must contain at least one entry")
+
+        # steps: [(offset, [(target, action), ...])]
+        self.steps = []
+        for offset, target, action in entries:
+            if self.steps and offset - self.steps[-1][0] <= STEP_WINDOW:
+                self.steps[-1][1].append((target, action))
+            else:
+                self.steps.append((offset, [(target, action)]))
+        self.offsets = [offset for offset, _ in self.steps]
+        self.duration = max(
+            offset + action_spec(action).duration
+            for offset, _, action in entries
+        )
+
+        self.state = "stopped"
+        self.cursor = 0
+        self.origin = None      # monotonic time of offset 0 while playing
+        self.position = 0.0     # offset while paused or stopped
+        self.deadline = None
+
+    @staticmethod
+    def _parse_groups(groups):
+        if not isinstance(groups, dict) or not all(
+            isinstance(members, list) for members in groups.values()
+        ):
+            raise ValueError("groups must map group names to lists of robot ids")
+        return {name: list(members) for name, members in groups.items()}
+
+    def _parse_entry(self, index, entry):
+        if not isinstance(entry, dict):
+            raise ValueError(f"timeline[{index}] must be an object")
+        offset = entry.get("offset")
+        action = entry.get("action")
+        target = entry.get("robot_id", entry.get("group", "all"))
+        if not isinstance(offset, (int, float)) or offset < 0:
+            raise ValueError(f"timeline[{index}].offset must be a non-negative number")
+        if not isinstance(action, str) or not action:
+            raise ValueError(f"timeline[{index}].action is required")
+        validate_action(action, f"timeline[{index}].action")
+        if isinstance(target, list):
+            target = tuple(target)
+        elif not isinstance(target, str):
+            raise ValueError(f"timeline[{index}].robot_id must be a string or list")
+        return float(offset), target, action
+
+    def resolve(self, target, robots):
+        """Return "all" or the list of existing robot ids a target refers to"""
+        if target == "all":
+            return "all"
+        if isinstance(target, tuple):
+            robot_ids = target
+        elif target in self.groups:
+            robot_ids = self.groups[target]
+        else:
+            robot_ids = (target,)
+        return [robot_id for robot_id in robot_ids if robot_id in robots]
+
+    def current_offset(self, now):
+        if self.state == "playing":
+            return now - self.origin
+        return self.position
+
+    def to_dict(self, now):
+        return {
+            "state": self.state,
+            "offset": round(self.current_offset(now), 3),
+            "duration": self.duration,
+            "next_step": self.cursor if self.cursor < len(self.steps) else None,
+            "steps": len(self.steps),
+        }
+
+
+class ChoreographyPlayer:
+    """Plays one choreography per session on the shared deadline scheduler.
+
+    Each step is dispatched at ``origin + offset`` rather than after a
+    relative sleep, so timing does not drift across a long show. All
+    actions due at the same moment are applied together and announced
+    with one ``choreography_step`` event and one ``robot_states_delta`` event.
+    """
+
+    def __init__(self, socketio, sessions_manager, sync_video=None, scheduler=None):
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.sync_video = sync_video
+        self.scheduler = scheduler or get_scheduler()
+
+    def _show(self, session_key):
+        show = self.sessions_manager.get_or_create_session(session_key)["choreography"]
+        if show is None:
+            raise KeyError("No choreography loaded for this session")
+        return show
+
+    def load(self, session_key, timeline, groups=None, autoplay=True):
+        """Replace the session's choreography and optionally start it"""
+        show = Choreography(timeline, groups)
+        with self.sessions_manager.session_lock(session_key):
+            self.stop(session_key)
+            self.sessions_manager.get_or_create_session(session_key)["choreography"] = show
+            if autoplay:
+                return self.play(session_key)
+            return self.get_state(session_key)
+
+    def get_state(self, session_key):
+        return self._show(session_key).to_dict(time.monotonic())
+
+    def play(self, session_key):
+        """Start or resume from the current offset"""
+        with self.sessions_manager.session_lock(session_key):
+            show = self._show(session_key)
+            if show.state == "finished":
+                show.cursor = 0
+                show.position = 0.0
+            if show.state != "playing":
+                show.state = "playing"
+                show.origin = time.monotonic() - show.position
+                # Resuming part-way: restart what was under way at this offset
+                self._restore_actions(session_key, show, show.position)
+                self._schedule_next(session_key, show)
+                self._emit_state(session_key, show)
+            return show.to_dict(time.monotonic())
+
+    def pause(self, session_key):
+        with self.sessions_manager.session_lock(session_key):
+            show = self._show(session_key)
+            if show.state == "playing":
+                show.position = time.monotonic() - show.origin
+                show.state = "paused"
+                self.scheduler.cancel(show.deadline)
+                show.deadline = None
+                self._emit_state(session_key, show)
+            return show.to_dict(time.monotonic())
+
+    def seek(self, session_key, offset):
+        """Jump to ``offset`` seconds; actions under way there resume mid-action once playing"""
+        with self.sessions_manager.session_lock(session_key):
+            show = self._show(session_key)
+            offset = min(max(0.0, float(offset)), show.duration)
+            self.scheduler.cancel(show.deadline)
+            show.deadline = None
+            show.cursor = bisect.bisect_left(show.offsets, offset - STEP_WINDOW)
+            show.position = offset
+            if show.state == "finished":
+                show.state = "paused"
+            if show.state == "playing":
+                # A paused or stopped show leaves the robots alone until resumed
+                self._restore_actions(session_key, show, offset)
+                show.origin = time.monotonic() - offset
+                self._schedule_next(session_key, show)
+            self._emit_state(session_key, show)
+            return show.to_dict(time.monotonic())
+
+    def stop(self, session_key):
+        """Stop playback and drop the session's choreography"""
+        session = self.sessions_manager.get_or_create_session(session_key)
+        with session["lock"]:
+            show = session["choreography"]
+            if show is None:
+                return
+            self.scheduler.cancel(show.deadline)
+            show.state = "stopped"
+            session["choreography"] = None
+        self._emit_state(session_key, show)
+
+    def _schedule_next(self, session_key, show):
+        if show.cursor >= len(show.steps):
+            show.state = "finished"
+            show.position = show.duration
+            show.deadline = None
+            return
+        delay = show.origin + show.offsets[show.cursor] - time.monotonic()
+        show.deadline = self.scheduler.schedule(delay, self._fire, session_key, show)
+
+    def _fire(self, session_key, show):
+        session = self.sessions_manager.sessions.get(session_key)
+        if session is None:
+            return
+        with session["lock"]:
+            if session["choreography"] is not show or show.state != "playing":
+                return
+
+            # Take every step that is due, so a late wakeup catches up in one batch
+            now = time.monotonic()
+            due_until = now - show.origin + STEP_WINDOW
+            dispatched = []
+            while show.cursor < len(show.steps) and show.offsets[show.cursor] <= due_until:
+                offset, entries = show.steps[show.cursor]
+                elapsed = max(0.0, now - show.origin - offset)
+                dispatched.extend(self._apply(session, show, entries, elapsed))
+                show.cursor += 1
+            self._schedule_next(session_key, show)
+
+        self._publish(session_key, dispatched)
+        self._broadcast(session_key, session, dispatched, now - show.origin)
+        if show.state == "finished":
+            self._emit_state(session_key, show)
+
+    def _apply(self, session, show, entries, elapsed=0.0):
+        robots = session["robots"]
+        dispatched = []
+        for target, action in entries:
+            robot_ids = show.resolve(target, robots)
+            if robot_ids == "all":
+                self.sessions_manager.start_action_all(robots, action, elapsed)
+            else:
+                for robot_id in robot_ids:
+                    robots[robot_id].start_action(action, elapsed)
+            dispatched.extend(
+                {"robot_id": robot_id, "action_name": action, "elapsed": elapsed}
+                for robot_id in (["all"] if robot_ids == "all" else robot_ids)
+            )
+        return dispatched
+
+    def _restore_actions(self, session_key, show, offset):
+        """Restart, part-way through, the actions that are still running at ``offset``"""
+        session = self.sessions_manager.sessions[session_key]
+        robots = session["robots"]
+        latest = {}
+        for step_offset, entries in show.steps[: show.cursor]:
+            for target, action in entries:
+                robot_ids = show.resolve(target, robots)
+                for robot_id in (robots.keys() if robot_ids == "all" else robot_ids):
+                    latest[robot_id] = (step_offset, action)
+
+        dispatched = []
+        for robot_id, (step_offset, action) in latest.items():
+            elapsed = offset - step_offset
+            if elapsed < action_spec(action).duration:
+                robots[robot_id].start_action(action, elapsed)
+                dispatched.append(
+                    {"robot_id": robot_id, "action_name": action, "elapsed": elapsed}
+                )
+        self._publish(session_key, dispatched)
+        self._broadcast(session_key, session, dispatched, offset)
+
+    def _publish(self, session_key, dispatched):
+        """Replicate the robots a step just moved to the other workers"""
+        if not dispatched:
+            return
+        robot_ids = {entry["robot_id"] for entry in dispatched}
+        self.sessions_manager.publish_state(
+            session_key, None if "all" in robot_ids else robot_ids)
+
+    def _broadcast(self, session_key, session, dispatched, offset):
+        if not dispatched:
+            return
+        room = f"session_{session_key}"
+        self.socketio.emit(
+            "choreography_step",
+            {"session_key": session_key, "offset": round(offset, 3), "steps": dispatched},
+            room=room,
+        )
+        if self.sync_video:
+            for action in dict.fromkeys(step["action_name"] for step in dispatched):
+                self.sync_video(session_key, action)
+        self.sessions_manager.broadcast_state_delta(self.socketio, session_key)
+
+    def _emit_state(self, session_key, show):
+        state = show.to_dict(time.monotonic())
+        state["session_key"] = session_key
+        self.socketio.emit("choreography_state", state, room=f"session_{session_key}")
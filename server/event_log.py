@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Per-session ring buffer of recent room events for resuming clients"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Events kept per session for clients and streams resuming after a drop
+EVENT_LOG_SIZE = int(os.environ.get("EVENT_LOG_SIZE", "256"))
+# A session log without new events for this long is dropped by ``sweep``
+EVENT_LOG_IDLE = 300.0
+
+# Events worth replaying; positions and camera moves are superseded by the
+# next update anyway, so they are neither numbered nor kept
+LOGGED_EVENTS = frozenset({
+    "actions", "action_queue", "choreography_step",
+    "robot_states_delta", "robot_added", "robot_removed", "robots_removed_all", "robots_reset",
+    "video_source_changed", "video_control", "speech", "real_robot_result",
+})
+
+
+class SessionLog:
+    """One session's numbered events, oldest first"""
+
+    __slots__ = ("lock", "floor", "entries", "last_active")
+
+    def __init__(self, size, floor):
+        # Held while an event is numbered and emitted, so a client joining
+        # under it sees each event either in its replay or live, never both
+        self.lock = threading.RLock()
+        # Events up to this id are not all here (before the log, or evicted)
+        self.floor = floor
+        self.entries = deque(maxlen=size)  # (event_id, event, args)
+        self.last_active = time.monotonic()
+
+
+class SessionEventLog:
+    """Numbers and keeps the events emitted to each ``session_*`` room.
+
+    ``install`` taps ``SocketIO.emit``: every logged event, on its own or
+    inside a ``batch`` frame, gets a trailing ``{"event_id", "epoch"}``
+    argument and is kept in its session's ring buffer. Clients remember the
+    last one they saw and send it back on ``join_session`` to receive only
+    what they missed (``since``). Ids increase across all sessions, so a
+    log dropped and recreated never reuses one; ``epoch`` changes with every
+    process, so ids from a restarted server or another worker never match.
+    Listeners (the SSE streams) are called with every room event, logged or
+    not, in emit order.
+    """
+
+    def __init__(self, size=EVENT_LOG_SIZE):
+        self.size = size
+        self.epoch = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._logs = {}  # session_key -> SessionLog
+        self._listeners = []  # callable(session_key, event, args, event_id)
+        self.metrics = dict(recorded=0, replayed=0, resynced=0)
+
+    def install(self, socketio):
+        """Number and record everything ``socketio`` emits to session rooms"""
+        emit = socketio.emit
+
+        def emit_and_record(event, data=None, *args, **kwargs):
+            room = kwargs.get("to") or kwargs.get("room")
+            if not isinstance(room, str) or not room.startswith("session_"):
+                return emit(event, data, *args, **kwargs)
+            session_key = room[len("session_"):]
+            # A tuple is sent as several arguments
+            event_args = data if isinstance(data, tuple) else (data,)
+            with self._get_log(session_key).lock:
+                event_args = self.record_room(session_key, event, event_args)
+                data = event_args[0] if len(event_args) == 1 else tuple(event_args)
+                return emit(event, data, *args, **kwargs)
+
+        socketio.emit = emit_and_record
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _get_log(self, session_key):
+        log = self._logs.get(session_key)
+        if log is None:
+            with self._lock:
+                log = self._logs.get(session_key)
+                if log is None:
+                    log = self._logs[session_key] = SessionLog(self.size, self._last_id)
+        return log
+
+    def locked(self, session_key):
+        """The session's log lock: nothing is emitted to its room while held"""
+        return self._get_log(session_key).lock
+
+    def record_room(self, session_key, event, args):
+        """Record a room emit; returns its arguments with event ids added"""
+        if event != "batch":
+            return self.record(session_key, event, args)
+        events = [
+            {"event": item["event"], "args": self.record(session_key, item["event"], item["args"])}
+            for item in args[0]["events"]
+        ]
+        return (dict(args[0], events=events), *args[1:])
+
+    def record(self, session_key, event, args):
+        """Record one event; returns its arguments, stamped if it was logged"""
+        log = self._get_log(session_key)
+        with log.lock:
+            event_id = None
+            if event in LOGGED_EVENTS:
+                with self._lock:
+                    self._last_id += 1
+                    event_id = self._last_id
+                if len(log.entries) == log.entries.maxlen:
+                    log.floor = log.entries[0][0]
+                log.entries.append((event_id, event, args))
+                log.last_active = time.monotonic()
+                self.metrics["recorded"] += 1
+            for listener in self._listeners:
+                try:
+                    listener(session_key, event, args, event_id)
+                except Exception as e:
+                    logger.error(f"❌ Event log listener failed: {e}")
+        return self.stamp(args, event_id) if event_id is not None else args
+
+    def stamp(self, args, event_id):
+        return (*args, {"event_id": event_id, "epoch": self.epoch})
+
+    def last_id(self):
+        """Id of the newest event recorded; a snapshot taken now includes it"""
+        return self._last_id
+
+    def since(self, session_key, epoch, last_event_id):
+        """Return ``[(event_id, event, args)]`` after ``last_event_id``.
+
+        Returns None when the client has to start from a snapshot instead:
+        the id is from another epoch, or the events after it were evicted.
+        """
+        log = self._get_log(session_key)
+        with log.lock:
+            missed = None
+            if (epoch == self.epoch and isinstance(last_event_id, int)
+                    and log.floor <= last_event_id <= self._last_id):
+                missed = [entry for entry in log.entries if entry[0] > last_event_id]
+        if missed is None:
+            self.metrics["resynced"] += 1
+        else:
+            self.metrics["replayed"] += len(missed)
+        return missed
+
+    def sweep(self, now=None):
+        """Drop the logs of sessions that have been quiet for a while"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            stale = [
+                session_key for session_key, log in self._logs.items()
+                if now - log.last_active > EVENT_LOG_IDLE
+            ]
+            for session_key in stale:
+                del self._logs[session_key]
+        return len(stale)
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(
+                self.metrics,
+                epoch=self.epoch,
+                sessions=len(self._logs),
+                entries=sum(len(log.entries) for log in self._logs.values()),
+            )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Server-Sent Events streams of session room events for read-only observers"""
+
+import logging
+import os
+import queue
+import threading
+
+from server.event_log import LOGGED_EVENTS
+from server.serializers import dumps
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Seconds between comment lines that keep idle streams (and proxies) alive
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15"))
+# Events a subscriber may fall behind before it is disconnected; it then
+# reconnects and resumes from the event log
+STREAM_SUBSCRIBER_BACKLOG = 1024
+STREAM_RETRY_MS = 3000
+
+# Streamed when the observer does not pick events itself
+DEFAULT_STREAM_EVENTS = LOGGED_EVENTS
+
+
+def format_event(event, args, event_id=None):
+    """Encode one event as an SSE message; several arguments become a list"""
+    data = args[0] if len(args) == 1 else list(args)
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {dumps(data)}\n\n"
+
+
+class StreamSubscriber:
+    __slots__ = ("events", "queue")
+
+    def __init__(self, events):
+        self.events = events
+        # None in the queue ends the stream
+        self.queue = queue.Queue(maxsize=STREAM_SUBSCRIBER_BACKLOG + 1)
+
+
+class EventStreams:
+    """Fans the events recorded by a SessionEventLog out to SSE streams.
+
+    Each event is encoded once per session and handed to every stream of
+    the session that asked for it. SSE ids are ``<epoch>-<event_id>`` from
+    the log, so a reconnecting stream's ``Last-Event-ID`` resumes from the
+    log's history, or falls back to a snapshot like a socket client.
+    """
+
+    def __init__(self, event_log, heartbeat=STREAM_HEARTBEAT):
+        self.event_log = event_log
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._subscribers = {}  # session_key -> set of StreamSubscriber
+        self.metrics = dict(delivered=0, resumed=0, resynced=0, dropped=0)
+        event_log.add_listener(self.publish)
+
+    def event_id(self, event_id):
+        return f"{self.event_log.epoch}-{event_id}"
+
+    def publish(self, session_key, event, args, event_id):
+        subscribers = self._subscribers.get(session_key)
+        if not subscribers:
+            return  # nobody is watching
+        message = format_event(
+            event, args, self.event_id(event_id) if event_id is not None else None
+        )
+        with self._lock:
+            for subscriber in list(subscribers):
+                if event not in subscriber.events:
+                    continue
+                if subscriber.queue.qsize() >= STREAM_SUBSCRIBER_BACKLOG:
+                    # Too far behind: end the stream; it resumes from the log
+                    subscribers.discard(subscriber)
+                    subscriber.queue.put_nowait(None)
+                    self.metrics["dropped"] += 1
+                    continue
+                subscriber.queue.put_nowait(message)
+                self.metrics["delivered"] += 1
+
+    def subscribe(self, session_key, events=DEFAULT_STREAM_EVENTS, last_event_id=None):
+        """Start following a session; returns ``(subscriber, missed, resumed)``.
+
+        ``missed`` holds the messages after ``last_event_id`` still in the
+        log; ``resumed`` is False when the observer needs a snapshot first
+        (new stream, or events it missed were already dropped).
+        """
+        subscriber = StreamSubscriber(frozenset(events))
+        epoch, _, event_id = (last_event_id or "").partition("-")
+        with self.event_log.locked(session_key):
+            missed = None
+            if event_id.isdigit():
+                missed = self.event_log.since(session_key, epoch, int(event_id))
+            with self._lock:
+                self._subscribers.setdefault(session_key, set()).add(subscriber)
+                self.metrics["resumed" if missed is not None else "resynced"] += 1
+        messages = [
+            format_event(event, args, self.event_id(entry_id))
+            for entry_id, event, args in missed or ()
+            if event in subscriber.events
+        ]
+        return subscriber, messages, missed is not None
+
+    def unsubscribe(self, session_key, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(session_key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[session_key]
+
+    def stream(self, session_key, events=DEFAULT_STREAM_EVENTS, last_event_id=None,
+               snapshot=None):
+        """Yield the SSE messages of a session until the client goes away.
+
+        ``snapshot`` is a callable returning ``(seq, states)``; it is sent as
+        a ``robot_states`` event whenever the stream cannot resume.
+        """
+        subscriber, missed, resumed = self.subscribe(session_key, events, last_event_id)
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            if not resumed and snapshot is not None:
+                # Resuming from this id replays at worst events the snapshot has
+                last_id = self.event_log.last_id()
+                seq, states = snapshot()
+                yield format_event(
+                    "robot_states", (states, {"seq": seq}), self.event_id(last_id)
+                )
+            yield from missed
+            while True:
+                try:
+                    message = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(session_key, subscriber)
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(
+                self.metrics,
+                sessions=len(self._subscribers),
+                subscribers=sum(len(s) for s in self._subscribers.values()),
+            )
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Cross-process message bus for Socket.IO rooms and session state.
+
+Every worker attaches a Socket.IO pub/sub client manager, so a room emit
+made on one worker reaches the sockets connected to all the others. The
+same channel carries ``session_state`` messages that replicate robot
+changes, robot by robot, between workers (see
+``SessionManager.publish_state``).
+
+Backends are chosen by the ``MESSAGE_QUEUE`` URL:
+
+- ``unix:///path/to/bus.sock``: the local broker in this module, for
+  running several workers on one machine
+  (``python -m server.message_bus /path/to/bus.sock``)
+- ``redis://``, ``amqp://`` / other Kombu URLs, ``zmq+tcp://``: the
+  python-socketio managers for those services
+"""
+
+import logging
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+
+from socketio import KombuManager, PubSubManager, RedisManager, ZmqManager
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Unset keeps rooms local to this process
+MESSAGE_QUEUE = os.environ.get("MESSAGE_QUEUE", "")
+
+SUBSCRIBE = b"subscribe\n"
+# A subscriber this far behind is disconnected rather than buffered forever
+MAX_SUBSCRIBER_BACKLOG = 16 * 1024 * 1024
+
+
+class SessionSyncMixin:
+    """Adds session-state replication to a Socket.IO pub/sub manager"""
+
+    def __init__(self, *args, on_session_state=None, on_state_delta=None,
+                 on_room_event=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_session_state = on_session_state
+        self.on_state_delta = on_state_delta
+        self.on_room_event = on_room_event
+
+    def publish_session(self, session_key, state):
+        self._publish({
+            "method": "session_state",
+            "host_id": self.host_id,
+            "session_key": session_key,
+            "state": state,
+        })
+
+    def _listen(self):
+        # Peel off session messages; everything else goes to Socket.IO
+        for message in super()._listen():
+            data = message
+            if not isinstance(message, dict):
+                try:
+                    data = self.json.loads(message)
+                except ValueError:
+                    continue
+            if not isinstance(data, dict):
+                continue
+            if data.get("method") != "session_state":
+                self._follow_state_delta(data)
+                self._follow_room_event(data)
+                yield data
+                continue
+            if data.get("host_id") == self.host_id or self.on_session_state is None:
+                continue
+            try:
+                self.on_session_state(data["session_key"], data["state"])
+            except Exception as e:
+                logger.error(f"❌ Failed to apply session state: {e}")
+
+    def _follow_state_delta(self, data):
+        # Keep this worker's broadcast version in step with the sender's
+        if (data.get("method") != "emit" or data.get("host_id") == self.host_id
+                or self.on_state_delta is None):
+            return
+        room = data.get("room") or ""
+        if not room.startswith("session_"):
+            return
+        if data.get("event") == "robot_states_delta":
+            deltas = [data["data"][0]]
+        elif data.get("event") == "batch":
+            deltas = [item["args"][0] for item in data["data"][0]["events"]
+                      if item["event"] == "robot_states_delta"]
+        else:
+            return
+        try:
+            for delta in deltas:
+                self.on_state_delta(room[len("session_"):], delta)
+        except Exception as e:
+            logger.error(f"❌ Failed to follow state delta: {e}")
+
+    def _follow_room_event(self, data):
+        # Let local observers see the rooms' events emitted by other workers
+        if (data.get("method") != "emit" or data.get("host_id") == self.host_id
+                or self.on_room_event is None):
+            return
+        room = data.get("room") or ""
+        if not room.startswith("session_"):
+            return
+        try:
+            self.on_room_event(room[len("session_"):], data["event"], data["data"])
+        except Exception as e:
+            logger.error(f"❌ Failed to follow room event: {e}")
+
+
+class UnixSocketManager(PubSubManager):
+    """Pub/sub manager that talks to the local Unix socket broker"""
+
+    name = "unix"
+
+    def __init__(self, url="unix:///tmp/robot-bus.sock", channel="socketio",
+                 write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger,
+                         json=json)
+        self.path = url[len("unix://"):]
+        self._send_lock = threading.Lock()
+        self._sock = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def _publish(self, data):
+        frame = self.json.dumps(data).encode("utf-8") + b"\n"
+        with self._send_lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    self._sock.sendall(frame)
+                    return
+                except OSError as e:
+                    self._sock = None
+                    if attempt:
+                        logger.error(f"❌ Message bus publish failed: {e}")
+
+    def _listen(self):
+        while True:
+            try:
+                sock = self._connect()
+                sock.sendall(SUBSCRIBE)
+            except OSError as e:
+                logger.warning(f"⚠️ Message bus unavailable ({e}); retrying")
+                time.sleep(1)
+                continue
+            with sock, sock.makefile("rb") as reader:
+                for line in reader:
+                    yield line
+            logger.warning("⚠️ Message bus connection closed; reconnecting")
+
+
+class _SessionUnixSocketManager(SessionSyncMixin, UnixSocketManager):
+    pass
+
+
+class _SessionRedisManager(SessionSyncMixin, RedisManager):
+    pass
+
+
+class _SessionKombuManager(SessionSyncMixin, KombuManager):
+    pass
+
+
+class _SessionZmqManager(SessionSyncMixin, ZmqManager):
+    pass
+
+
+def create_client_manager(url, on_session_state=None, on_state_delta=None,
+                          on_room_event=None, json=None):
+    """Return a Socket.IO client manager for ``url`` that also syncs sessions"""
+    if url.startswith("unix://"):
+        manager_class = _SessionUnixSocketManager
+    elif url.startswith(("redis://", "rediss://", "unix+redis://")):
+        manager_class = _SessionRedisManager
+    elif url.startswith("zmq"):
+        manager_class = _SessionZmqManager
+    else:
+        manager_class = _SessionKombuManager
+    logger.info(f"📡 Message bus: {manager_class.__name__.lstrip('_')} at {url}")
+    return manager_class(url, on_session_state=on_session_state,
+                         on_state_delta=on_state_delta, on_room_event=on_room_event,
+                         json=json)
+
+
+def run_broker(path):
+    """Fan every published line out to all subscribers until interrupted"""
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(128)
+    listener.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    inbound = {}      # connection -> partial line
+    subscribers = {}  # connection -> pending outbound bytes
+    logger.info(f"📡 Message bus broker listening on {path}")
+
+    def close(conn):
+        selector.unregister(conn)
+        inbound.pop(conn, None)
+        subscribers.pop(conn, None)
+        conn.close()
+
+    def flush(conn):
+        try:
+            sent = conn.send(subscribers[conn])
+        except BlockingIOError:
+            return
+        except OSError:
+            close(conn)
+            return
+        subscribers[conn] = subscribers[conn][sent:]
+        selector.modify(conn, selectors.EVENT_READ | (
+            selectors.EVENT_WRITE if subscribers[conn] else 0))
+
+    while True:
+        for key, events in selector.select():
+            conn = key.fileobj
+            if conn is listener:
+                client, _ = listener.accept()
+                client.setblocking(False)
+                inbound[client] = b""
+                selector.register(client, selectors.EVENT_READ)
+                continue
+            if events & selectors.EVENT_WRITE and conn in subscribers:
+                flush(conn)
+            if not events & selectors.EVENT_READ or conn not in inbound:
+                continue
+            try:
+                chunk = conn.recv(65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                close(conn)
+                continue
+            data = inbound[conn] + chunk
+            lines, _, inbound[conn] = data.rpartition(b"\n")
+            if not lines:
+                continue
+            lines += b"\n"
+            if lines.startswith(SUBSCRIBE):
+                subscribers[conn] = b""
+                lines = lines[len(SUBSCRIBE):]
+                if not lines:
+                    continue
+            for subscriber in list(subscribers):
+                if len(subscribers[subscriber]) > MAX_SUBSCRIBER_BACKLOG:
+                    logger.warning("⚠️ Dropping a subscriber that fell behind")
+                    close(subscriber)
+                    continue
+                subscribers[subscriber] += lines
+                flush(subscriber)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    run_broker(sys.argv[1] if len(sys.argv) > 1 else "/tmp/robot-bus.sock")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Server-authoritative movement integration for the Robot Simulator"""
+
+import logging
+import os
+import time
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+MOVEMENT_TICK_HZ = float(os.environ.get("MOVEMENT_TICK_HZ", "10"))
+
+
+class MovementIntegrator:
+    """Advances robot poses for movement actions on a fixed tick.
+
+    Each tick advances every moving robot in every session (one vectorized
+    step for table-backed sessions) and broadcasts a single
+    ``robot_positions`` event per session with the new poses, so clients
+    only interpolate between server positions. Moved robots are re-indexed
+    in the session's spatial hash and any overlaps they cause are reported
+    as ``robot_collisions``.
+    """
+
+    def __init__(self, socketio, sessions_manager, tick_hz=MOVEMENT_TICK_HZ):
+        self.socketio = socketio
+        self.sessions_manager = sessions_manager
+        self.interval = 1.0 / tick_hz
+        self._last_moved = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"❌ Movement tick failed: {e}")
+            # Schedule against the fixed grid so ticks do not drift
+            next_tick += self.interval
+            self.socketio.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def tick(self, now=None):
+        """Advance all sessions once and broadcast the poses that changed"""
+        now = time.monotonic() if now is None else now
+        last_moved = self._last_moved
+        self._last_moved = {}
+
+        for session_key, session in list(self.sessions_manager.sessions.items()):
+            with session['lock']:
+                robots = session['robots']
+                moved = self.sessions_manager.advance_movement(robots, now)
+                poses = dict(moved)
+
+                # Robots settled by their action deadline between ticks still
+                # need their final pose broadcast once
+                for robot_id in last_moved.get(session_key, ()):
+                    if robot_id not in poses and robot_id in robots:
+                        robot = robots[robot_id]
+                        poses[robot_id] = {'position': robot.position,
+                                           'rotation': robot.rotation}
+                if poses:
+                    self.sessions_manager.update_positions(session_key, poses)
+
+            if moved:
+                self._last_moved[session_key] = set(moved)
+            if poses:
+                self.socketio.emit(
+                    "robot_positions", poses, room=f"session_{session_key}"
+                )
+                collisions = self.sessions_manager.find_overlaps(session_key, poses)
+                if collisions:
+                    self.socketio.emit(
+                        "robot_collisions",
+                        {"collisions": [list(pair) for pair in collisions]},
+                        room=f"session_{session_key}",
+                    )
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Cached discovery of the real-robot API URL, refreshed in the background"""
+
+import logging
+import os
+import threading
+import time
+
+import boto3
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Where the URL comes from: "env", "file:<path>" or "ssm:<parameter name>";
+# unset means ROBOT_API_URL when it is set, else the SSM parameter below
+ROBOT_API_URL_SOURCE = os.environ.get("ROBOT_API_URL_SOURCE", "")
+ROBOT_API_URL_PARAMETER = "/robotics/robot_api_url"
+# Seconds a discovered URL is served before it is looked up again
+ROBOT_API_URL_TTL = float(os.environ.get("ROBOT_API_URL_TTL", "300"))
+# Seconds before a failed lookup is tried again, doubled per failure up to
+# the TTL; the last URL stays in use meanwhile
+ROBOT_API_URL_RETRY = float(os.environ.get("ROBOT_API_URL_RETRY", "10"))
+
+
+class EnvParameterSource:
+    """Reads the URL from an environment variable"""
+
+    remote = False
+
+    def __init__(self, name="ROBOT_API_URL"):
+        self.name = name
+
+    def __call__(self):
+        value = os.environ.get(self.name)
+        if not value:
+            raise LookupError(f"{self.name} is not set")
+        return value
+
+    def __str__(self):
+        return f"env:{self.name}"
+
+
+class FileParameterSource:
+    """Reads the URL from a local file, e.g. a mounted secret or a test stand-in"""
+
+    remote = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        with open(self.path, encoding="utf-8") as f:
+            value = f.read().strip()
+        if not value:
+            raise LookupError(f"{self.path} is empty")
+        return value
+
+    def __str__(self):
+        return f"file:{self.path}"
+
+
+class SSMParameterSource:
+    """Reads the URL from AWS SSM Parameter Store with one reused client"""
+
+    remote = True
+
+    def __init__(self, name=ROBOT_API_URL_PARAMETER):
+        self.name = name
+        self._client = None
+
+    def __call__(self):
+        if self._client is None:
+            self._client = boto3.client("ssm")
+        response = self._client.get_parameter(Name=self.name)
+        return response["Parameter"]["Value"]
+
+    def __str__(self):
+        return f"ssm:{self.name}"
+
+
+def parameter_source_from_env():
+    """Build the source named by ROBOT_API_URL_SOURCE"""
+    kind, _, target = ROBOT_API_URL_SOURCE.partition(":")
+    if kind == "file":
+        return FileParameterSource(target)
+    if kind == "ssm":
+        return SSMParameterSource(target or ROBOT_API_URL_PARAMETER)
+    if kind == "env" or os.environ.get("ROBOT_API_URL"):
+        return EnvParameterSource(target or "ROBOT_API_URL")
+    return SSMParameterSource()
+
+
+class RobotAPIURL:
+    """The robot API URL, served from a cache that is refreshed off the request path.
+
+    ``get`` never waits on the source: it returns the cached URL, and
+    once the URL is older than ``ttl`` it starts a refresh in the
+    background and keeps serving the old one meanwhile
+    (stale-while-revalidate). A failed lookup keeps the last URL and is
+    retried after ``retry`` seconds, backing off to ``ttl`` while the
+    source stays down. ``run`` refreshes ahead of the TTL
+    so requests normally never see a stale URL. Local sources (env,
+    file) are read once up front, so the first request already has a URL.
+
+    Background refreshes are started with ``spawn(fn)``, e.g. the
+    server's ``start_background_task``; until one is set, a due refresh
+    runs inline.
+    """
+
+    def __init__(self, source, ttl=ROBOT_API_URL_TTL, retry=ROBOT_API_URL_RETRY,
+                 clock=time.monotonic, spawn=None):
+        self.source = source
+        self.ttl = ttl
+        self.retry = retry
+        self.clock = clock
+        self.spawn = spawn
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._failures = 0  # consecutive failed lookups
+        self.last_error = None
+        self.metrics = dict(lookups=0, failures=0, changes=0, background_refreshes=0)
+        if not getattr(source, "remote", True):
+            self.refresh()
+
+    def get(self):
+        """Return the cached URL at once, starting a refresh if it is due"""
+        with self._lock:
+            due = not self._refreshing and self.clock() >= self._next_refresh
+            if due:
+                self._refreshing = True
+                self.metrics["background_refreshes"] += 1
+        if due:
+            if self.spawn is not None:
+                self.spawn(self._refresh)
+            else:
+                self._refresh()
+        return self._value
+
+    def refresh(self):
+        """Look the URL up now; returns it, or the previous one if the lookup fails"""
+        with self._lock:
+            self._refreshing = True
+        return self._refresh()
+
+    def _refresh(self):
+        try:
+            value = self.source()
+        except Exception as e:
+            with self._lock:
+                self.metrics["lookups"] += 1
+                self.metrics["failures"] += 1
+                self.last_error = str(e)
+                self._failures += 1
+                self._next_refresh = self.clock() + min(
+                    self.ttl, self.retry * 2 ** (self._failures - 1)
+                )
+                self._refreshing = False
+            logger.error(f"❌ Failed to fetch ROBOT_API_URL from {self.source}: {e}")
+            return self._value
+        with self._lock:
+            self.metrics["lookups"] += 1
+            if value != self._value:
+                self.metrics["changes"] += 1
+                logger.info(f"✅ Discovered API URL via {self.source}: {value}")
+            self._value = value
+            self._fetched_at = self.clock()
+            self._next_refresh = self._fetched_at + self.ttl
+            self.last_error = None
+            self._failures = 0
+            self._refreshing = False
+        return value
+
+    def run(self, sleep):
+        """Keep the URL fresh; meant for a background task, ``sleep`` yields"""
+        while True:
+            with self._lock:
+                # Refresh a little before the TTL runs out; retries run on time
+                early = min(5.0, self.ttl / 10) if self.last_error is None else 0.0
+                wait = self._next_refresh - self.clock() - early
+                due = wait <= 0 and not self._refreshing
+                if due:
+                    self._refreshing = True
+            if due:
+                self._refresh()
+            else:
+                # Wake up now and then in case a refresh from ``get`` moved the deadline
+                sleep(min(max(wait, 0.1), self.ttl))
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(
+                self.metrics,
+                source=str(self.source),
+                configured=self._value is not None,
+                age=(
+                    round(self.clock() - self._fetched_at, 1)
+                    if self._fetched_at is not None else None
+                ),
+                last_error=self.last_error,
+            )
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Per-robot outbound command queues in front of the real-robot API"""
+
+import logging
+import os
+import random
+import threading
+import time
+
+from server.scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Real-robot requests in flight at once, across all robots
+ROBOT_DISPATCH_CONCURRENCY = int(os.environ.get("ROBOT_DISPATCH_CONCURRENCY", "16"))
+# Delay before retrying a failed command, doubled per failure up to the max
+ROBOT_RETRY_BASE = float(os.environ.get("ROBOT_RETRY_BASE", "0.5"))
+ROBOT_RETRY_MAX = float(os.environ.get("ROBOT_RETRY_MAX", "30"))
+# A command still undelivered after this many seconds is dropped as stale
+ROBOT_COMMAND_TTL = float(os.environ.get("ROBOT_COMMAND_TTL", "60"))
+# Consecutive failures that open the circuit, and seconds it stays open
+ROBOT_BREAKER_FAILURES = int(os.environ.get("ROBOT_BREAKER_FAILURES", "5"))
+ROBOT_BREAKER_COOLDOWN = float(os.environ.get("ROBOT_BREAKER_COOLDOWN", "15"))
+
+# Outcomes of a command for one robot
+SENT = "sent"
+FAILED = "failed"  # the API rejected it; not retried
+SUPERSEDED = "superseded"  # a newer command for the robot replaced it
+EXPIRED = "expired"  # not delivered within ROBOT_COMMAND_TTL
+
+
+class Dispatch:
+    """One action sent to a set of real robots, until every outcome is known"""
+
+    __slots__ = ("dispatch_id", "session_key", "action", "started", "results", "remaining")
+
+    def __init__(self, dispatch_id, session_key, action, robot_ids):
+        self.dispatch_id = dispatch_id
+        self.session_key = session_key
+        self.action = action
+        self.started = time.monotonic()
+        self.results = {robot_id: None for robot_id in robot_ids}
+        self.remaining = len(self.results)
+
+    def to_dict(self):
+        succeeded = sum(1 for status in self.results.values() if status == SENT)
+        return {
+            "dispatch_id": self.dispatch_id,
+            "session_key": self.session_key,
+            "action": self.action,
+            "results": [
+                {"robot_id": robot_id, "success": status == SENT, "status": status}
+                for robot_id, status in self.results.items()
+            ],
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+        }
+
+
+class RobotOutbox:
+    """Commands on their way to one real robot"""
+
+    __slots__ = ("command", "in_flight", "sending", "retry", "attempts")
+
+    def __init__(self):
+        # (dispatch, action, queued_at); only the newest command waits
+        self.command = None
+        self.in_flight = None  # command being sent right now
+        self.sending = False  # a task is draining this outbox
+        self.retry = None  # ScheduledCall of the next attempt
+        self.attempts = 0  # failures since the last delivery
+
+
+class CircuitBreaker:
+    """Fails fast while the robot API keeps failing.
+
+    After ``failures`` consecutive failures the circuit opens and nothing
+    is sent for ``cooldown`` seconds. Then it is half-open: one request is
+    let through as a trial, and closes the circuit on success or opens it
+    for another cooldown on failure. Not thread-safe; the dispatcher calls
+    it under its own lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failures=ROBOT_BREAKER_FAILURES, cooldown=ROBOT_BREAKER_COOLDOWN,
+                 clock=time.monotonic):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial = False  # the half-open trial request is out
+        self.opens = 0
+
+    def wait_time(self):
+        """Seconds until a request may be sent; 0 means send it now"""
+        if self.state == self.CLOSED:
+            return 0.0
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.cooldown - self.clock()
+            if remaining > 0:
+                return remaining
+            self.state = self.HALF_OPEN
+            self.trial = False
+        if self.trial:
+            return ROBOT_RETRY_BASE  # check again once the trial is likely back
+        self.trial = True
+        return 0.0
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("✅ Robot API reachable again; circuit closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial = False
+        if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failures):
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.opens += 1
+            logger.warning(
+                f"⛔ Robot API failed {self.consecutive_failures} times; "
+                f"circuit open for {self.cooldown:g}s"
+            )
+
+    def to_dict(self):
+        return dict(state=self.state, consecutive_failures=self.consecutive_failures,
+                    opens=self.opens)
+
+
+class RobotDispatcher:
+    """Delivers real-robot commands without holding up the caller.
+
+    ``dispatch`` returns a dispatch id at once and puts the action in each
+    robot's outbox. Each outbox is drained by its own background task, at
+    most ``concurrency`` requests in flight across all robots, so sending
+    to every robot takes about as long as the slowest one.
+
+    - Only the newest command of a robot waits: a new one supersedes any
+      command not yet sent, so a robot that comes back gets the latest
+      action instead of a backlog.
+    - A failed command is retried after an exponential backoff with jitter
+      (``ROBOT_RETRY_BASE`` doubling up to ``ROBOT_RETRY_MAX``) until it is
+      delivered, rejected by the API, superseded or older than
+      ``ROBOT_COMMAND_TTL``.
+    - A CircuitBreaker stops all requests while the API keeps failing;
+      commands wait in their outboxes instead of each paying the timeout.
+
+    Once every robot of a dispatch has an outcome, a ``real_robot_result``
+    event reports them to the session that asked. ``send(method,
+    robot_id, action)`` raises on failure; an exception whose
+    ``retryable`` attribute is False is not retried.
+
+    Outboxes live in memory only: commands still waiting when the process
+    stops are lost, not resent after a restart. They would mostly be past
+    ``ROBOT_COMMAND_TTL`` by then anyway.
+    """
+
+    def __init__(self, socketio, send, concurrency=ROBOT_DISPATCH_CONCURRENCY,
+                 scheduler=None, breaker=None):
+        self.socketio = socketio
+        self.send = send
+        self.scheduler = scheduler or get_scheduler()
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._in_flight = {}  # dispatch_id -> Dispatch
+        self._outboxes = {}  # robot_id -> RobotOutbox
+        self.last_error = None
+        self.metrics = dict(dispatched=0, sent=0, failed=0, retried=0,
+                            superseded=0, expired=0, short_circuited=0)
+
+    def dispatch(self, session_key, action, robot_ids):
+        """Queue ``action`` for each robot; returns the dispatch id"""
+        robot_ids = list(dict.fromkeys(robot_ids))
+        if not robot_ids:
+            return None
+        finished = []
+        start = []
+        now = time.monotonic()
+        with self._lock:
+            self._last_id += 1
+            dispatch = Dispatch(self._last_id, session_key, action, robot_ids)
+            self._in_flight[dispatch.dispatch_id] = dispatch
+            self.metrics["dispatched"] += 1
+            for robot_id in robot_ids:
+                outbox = self._outboxes.get(robot_id)
+                if outbox is None:
+                    outbox = self._outboxes[robot_id] = RobotOutbox()
+                if outbox.command is not None:
+                    finished += self._finish(outbox.command[0], robot_id, SUPERSEDED)
+                outbox.command = (dispatch, action, now)
+                # A running drain or a pending retry picks the command up
+                if not outbox.sending and outbox.retry is None:
+                    outbox.sending = True
+                    start.append(robot_id)
+        for done in finished:
+            self._complete(done)
+        for robot_id in start:
+            self.socketio.start_background_task(self._drain, robot_id)
+        logger.info(
+            f"📤 Dispatch {dispatch.dispatch_id}: {action} to {len(robot_ids)} real robot(s)"
+        )
+        return dispatch.dispatch_id
+
+    def _finish(self, dispatch, robot_id, status):
+        """Record a robot's outcome; returns ``[dispatch]`` once all are in"""
+        dispatch.results[robot_id] = status
+        dispatch.remaining -= 1
+        self.metrics[status] += 1
+        if dispatch.remaining:
+            return []
+        del self._in_flight[dispatch.dispatch_id]
+        return [dispatch]
+
+    def _drain(self, robot_id):
+        """Send a robot's newest command until none is left or it must wait"""
+        outbox = self._outboxes[robot_id]
+        while True:
+            finished = []
+            with self._lock:
+                command = outbox.command
+                if command is None:
+                    # Nothing left to send, even after an expired or rejected
+                    # command; a later command starts with a fresh outbox
+                    del self._outboxes[robot_id]
+                    return
+                dispatch, action, queued_at = command
+                outbox.command = None
+                if time.monotonic() - queued_at > ROBOT_COMMAND_TTL:
+                    finished = self._finish(dispatch, robot_id, EXPIRED)
+                else:
+                    wait = self.breaker.wait_time()
+                    if wait > 0:
+                        # Circuit open: keep the command without calling the API
+                        outbox.command = command
+                        self.metrics["short_circuited"] += 1
+                        self._schedule_retry(outbox, robot_id, wait)
+                        return
+                    outbox.in_flight = command
+            if outbox.in_flight is None:
+                for done in finished:
+                    self._complete(done)
+                continue
+
+            error = None
+            try:
+                with self._slots:
+                    self.send("RunAction", robot_id, action)
+            except Exception as e:
+                error = e
+
+            retry_in = None
+            with self._lock:
+                outbox.in_flight = None
+                if error is None:
+                    self.breaker.record_success()
+                    outbox.attempts = 0
+                    finished = self._finish(dispatch, robot_id, SENT)
+                elif not getattr(error, "retryable", True):
+                    # The API is up; it refused this command
+                    self.breaker.record_success()
+                    self.last_error = str(error)
+                    finished = self._finish(dispatch, robot_id, FAILED)
+                else:
+                    self.breaker.record_failure()
+                    self.last_error = str(error)
+                    outbox.attempts += 1
+                    if outbox.command is None:
+                        outbox.command = command
+                        self.metrics["retried"] += 1
+                    else:
+                        finished = self._finish(dispatch, robot_id, SUPERSEDED)
+                    retry_in = self._backoff(outbox.attempts)
+                    self._schedule_retry(outbox, robot_id, retry_in)
+            for done in finished:
+                self._complete(done)
+            if retry_in is not None:
+                logger.warning(
+                    f"⚠️ Real robot {robot_id} failed ({error}); "
+                    f"retry {outbox.attempts} in {retry_in:.1f}s"
+                )
+                return
+
+    @staticmethod
+    def _backoff(attempts):
+        delay = min(ROBOT_RETRY_MAX, ROBOT_RETRY_BASE * 2 ** (attempts - 1))
+        # Jitter keeps robots that failed together from retrying in lockstep
+        return delay * random.uniform(0.5, 1.0)
+
+    def _schedule_retry(self, outbox, robot_id, delay):
+        outbox.sending = False
+        outbox.retry = self.scheduler.schedule(delay, self._retry, robot_id)
+
+    def _retry(self, robot_id):
+        with self._lock:
+            outbox = self._outboxes.get(robot_id)
+            if outbox is None or outbox.sending:
+                return
+            outbox.retry = None
+            outbox.sending = True
+        # Off the scheduler worker, like queued actions
+        self.socketio.start_background_task(self._drain, robot_id)
+
+    def _complete(self, dispatch):
+        result = dispatch.to_dict()
+        logger.info(
+            f"📥 Dispatch {dispatch.dispatch_id} done in {result['elapsed_ms']} ms: "
+            f"{result['succeeded']} ok, {result['failed']} not delivered"
+        )
+        self.socketio.emit(
+            "real_robot_result", result, room=f"session_{dispatch.session_key}"
+        )
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(
+                self.metrics,
+                breaker=self.breaker.to_dict(),
+                last_error=self.last_error,
+                in_flight=len(self._in_flight),
+                pending_robots=sum(d.remaining for d in self._in_flight.values()),
+                queued=sum(1 for o in self._outboxes.values() if o.command is not None),
+                retrying=sum(1 for o in self._outboxes.values() if o.retry is not None),
+                robots={
+                    robot_id: {
+                        "pending": outbox.command[1] if outbox.command else None,
+                        "sending": outbox.in_flight is not None,
+                        "attempts": outbox.attempts,
+                    }
+                    for robot_id, outbox in self._outboxes.items()
+                },
+            )
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Shared deadline scheduler for the Robot Simulator"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class ScheduledCall:
+    """Handle for a callback registered with the ActionScheduler"""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class ActionScheduler:
+    """Single timer heap that owns every pending action deadline.
+
+    One worker (a greenlet once eventlet has monkey patched ``threading``)
+    sleeps until the earliest deadline instead of one sleeping thread per
+    action. Inserts are O(log n); cancellation is O(1) and cancelled
+    entries are dropped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._cancelled = 0
+        self._worker = None
+
+    def __len__(self):
+        """Number of pending (not cancelled) deadlines"""
+        with self._cond:
+            return len(self._heap) - self._cancelled
+
+    def schedule(self, delay, callback, *args):
+        """Run ``callback(*args)`` after ``delay`` seconds and return its handle"""
+        call = ScheduledCall(self.clock() + max(0.0, delay), callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (call.deadline, next(self._counter), call))
+            self._ensure_worker()
+            # Only wake the worker when the new deadline is now the earliest
+            if self._heap[0][2] is call:
+                self._cond.notify()
+        return call
+
+    def cancel(self, call):
+        """Cancel a pending call; returns False if it already ran or was cancelled"""
+        if call is None:
+            return False
+        with self._cond:
+            if call.cancelled or call.callback is None:
+                return False
+            call.cancelled = True
+            self._cancelled += 1
+            # Rebuild once tombstones dominate so memory stays bounded
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="action-scheduler", daemon=True
+            )
+            self._worker.start()
+
+    def _pop_due(self):
+        """Block until the earliest live deadline expires and pop it"""
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                    self._cancelled -= 1
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                call = heapq.heappop(self._heap)[2]
+                callback, args = call.callback, call.args
+                # Mark as fired so a late cancel() is a no-op
+                call.callback = None
+                call.args = ()
+                return callback, args
+
+    def _run(self):
+        while True:
+            callback, args = self._pop_due()
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"❌ Scheduled callback {callback!r} failed: {e}")
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide ActionScheduler, creating it on first use"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = ActionScheduler()
+    return _default_scheduler
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Payload serializers shared by the HTTP API and Socket.IO.
+
+Text payloads are encoded with orjson when it is installed and with the
+standard library otherwise. Clients can also negotiate a binary channel on
+``join_session``: ``robot_states`` snapshots are then sent to them as one
+msgpack-encoded binary attachment instead of JSON.
+"""
+
+import dataclasses
+import decimal
+import json
+import logging
+import uuid
+from datetime import date
+
+from flask.json.provider import JSONProvider
+from socketio.packet import BINARY_ACK, BINARY_EVENT, EVENT, Packet
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; text falls back to the json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients asking for it get JSON
+    msgpack = None
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Encode the types Flask's own provider accepts and orjson does not"""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    if hasattr(obj, "tolist"):  # NumPy scalars and arrays
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, indent=False):
+    """Encode ``obj`` as UTF-8 JSON bytes"""
+    if orjson is not None:
+        option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False,
+        indent=2 if indent else None, separators=None if indent else (",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(obj, **kwargs):
+    """Encode ``obj`` as a JSON string; ``json.dumps`` keyword arguments are ignored"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(s, **kwargs):
+    """Decode a JSON string or bytes"""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class SocketIOJSON:
+    """``json``-module interface for engine.io and the message bus"""
+
+    dumps = staticmethod(dumps)
+    loads = staticmethod(loads)
+
+
+class FastPacket(Packet):
+    """Socket.IO packet that finds binary payloads by trying to encode them.
+
+    The stock packet walks every value of the payload looking for bytes
+    before encoding it, which costs more than the encoding itself for
+    large ``robot_states``. Here the payload is encoded up front; only
+    when that fails (bytes are not JSON) does the packet fall back to the
+    binary path. The encoded text is reused by ``encode``.
+    """
+
+    json = SocketIOJSON
+
+    def __init__(self, packet_type=EVENT, data=None, namespace=None, id=None,
+                 binary=None, encoded_packet=None):
+        self._encoded_data = None
+        if binary is None and data is not None and encoded_packet is None:
+            try:
+                self._encoded_data = self.json.dumps(data)
+                binary = False
+            except TypeError:
+                binary = True
+        super().__init__(packet_type, data, namespace, id, binary, encoded_packet)
+
+    def encode(self):
+        if self._encoded_data is None or self.packet_type in (BINARY_EVENT, BINARY_ACK):
+            return super().encode()
+        encoded_packet = str(self.packet_type)
+        if self.namespace is not None and self.namespace != "/":
+            encoded_packet += self.namespace + ","
+        if self.id is not None:
+            encoded_packet += str(self.id)
+        return encoded_packet + self._encoded_data
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by this module.
+
+    Unlike Flask's default provider, keys keep their insertion order.
+    Responses are pretty-printed in debug mode, as with ``jsonify``.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, indent=self._app.debug)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def negotiate_encoding(requested):
+    """Return the encoding to use for a client that asked for ``requested``"""
+    if requested == MSGPACK:
+        if msgpack is not None:
+            return MSGPACK
+        logger.debug("⚠️ msgpack requested but not installed; using JSON")
+    return JSON
+
+
+def pack(obj):
+    """Encode ``obj`` for the binary channel"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
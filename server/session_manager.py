@@ -1,43 +1,662 @@
 #!/usr/bin/env python3
 """Session management for the Robot Simulator"""
 
+import logging
+import os
+import threading
 import time
-from collections import defaultdict
-from constants import DEFAULT_ROBOTS
-from models.robot import Robot3D
+from contextlib import contextmanager
+from collections import OrderedDict
+from constants import DEFAULT_ROBOTS, ROBOT_RADIUS, SPATIAL_CELL_SIZE
+from models.action_spec import action_spec
+from models.robot import Robot3D, action_origin_pose
+from models.robot_table import RobotTable
+from models.spatial_hash import SpatialHash
 
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# "dict" keeps one Robot3D object per robot; "table" stores a session's
+# robots in NumPy columns for swarm scenes with thousands of robots
+ROBOT_STORE = os.environ.get("ROBOT_STORE", "dict").lower()
+
+# Idle sessions (no connected clients, nothing playing) are evicted after
+# SESSION_TTL seconds, or earlier in LRU order once a cap is exceeded
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "3600"))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "1000"))
+MAX_SESSION_MEMORY_MB = float(os.environ.get("MAX_SESSION_MEMORY_MB", "256"))
+
+# Session creation is serialized per shard of the key space, so creating
+# one session never waits on another shard
+SESSION_SHARDS = int(os.environ.get("SESSION_SHARDS", "16"))
+
+# Rough footprint used for the memory cap, measured with tracemalloc
+SESSION_BASE_BYTES = 2048
+ROBOT_BYTES = 2048
+
+
+class SessionLock:
+    """Re-entrant session lock that knows how deeply it is held"""
+
+    __slots__ = ("_lock", "depth")
 
-class SessionManager:
     def __init__(self):
-        self.sessions = defaultdict(dict)
+        self._lock = threading.RLock()
+        self.depth = 0  # only changed by the holder
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not self._lock.acquire(blocking, timeout):
+            return False
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SessionManager:
+    """Owns every session and serializes mutations of each one.
+
+    Each session carries its own re-entrant ``lock``; writers hold it while
+    mutating robots, queues or the spatial index, and serialization takes
+    it too, so callers in one session never block another session. Lookups
+    of an existing session are lock-free; creation is double-checked under
+    one of ``SESSION_SHARDS`` shard locks.
+
+    With a snapshot ``store``, a session missing from memory is restored
+    from its last snapshot on first access, and evicted sessions are saved
+    first, so eviction spills idle sessions to disk instead of losing them.
+
+    With a message ``bus``, every mutation publishes the session's state so
+    other worker processes serving the same session apply it locally.
+    """
+
+    def __init__(self, robot_store=ROBOT_STORE, ttl=SESSION_TTL,
+                 max_sessions=MAX_SESSIONS, max_memory_mb=MAX_SESSION_MEMORY_MB,
+                 shards=SESSION_SHARDS, store=None):
+        # Ordered least recently used first
+        self.sessions = OrderedDict()
+        self.client_sessions = {}  # sid -> set of session keys it joined
+        self.robot_store = robot_store
+        if robot_store == "table" and not RobotTable.available():
+            logger.warning("⚠️ ROBOT_STORE=table requires NumPy; using dict store")
+            self.robot_store = "dict"
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._shard_locks = [threading.Lock() for _ in range(max(1, shards))]
+        self.store = store
+        self.bus = None
+        self.metrics = {
+            'sessions_created': 0,
+            'sessions_restored': 0,
+            'evicted_ttl': 0,
+            'evicted_session_cap': 0,
+            'evicted_memory_cap': 0,
+        }
+
+    def _new_robot_store(self):
+        return RobotTable() if self.robot_store == "table" else {}
 
     def get_or_create_session(self, session_key):
-        if session_key not in self.sessions:
-            robots = {}
-            for config in DEFAULT_ROBOTS:
-                robot = Robot3D(
-                    config['id'], config['position'].copy(), config['color'])
-                robots[config['id']] = robot
-
-            self.sessions[session_key] = {
+        session = self.sessions.get(session_key)
+        if session is not None:
+            session['last_active'] = time.monotonic()
+            self.sessions.move_to_end(session_key)
+            return session
+
+        with self._shard_lock(session_key):
+            # Another caller may have created it while we waited
+            session = self.sessions.get(session_key)
+            if session is not None:
+                return session
+            robots = self._new_robot_store()
+            spatial = SpatialHash(SPATIAL_CELL_SIZE)
+            snapshot = self.store.load(session_key) if self.store else None
+            if snapshot is not None:
+                self._restore_robots(robots, spatial, snapshot)
+                self.metrics['sessions_restored'] += 1
+            else:
+                self._add_default_robots(robots, spatial)
+
+            session = self.sessions[session_key] = {
                 'robots': robots,
+                'spatial': spatial,
+                'queues': {},
+                'choreography': None,
                 'clients': set(),
-                'created_at': time.time()
+                'low_latency': False,
+                'lock': SessionLock(),
+                # Version of the robot states last broadcast, and those states
+                'state_seq': 0,
+                'state_baseline': {},
+                # Replication: this worker's publish counter, and per robot
+                # the (worker, version) of the last change applied from the bus
+                'publish_version': 0,
+                'replicas': {},
+                'created_at': time.time(),
+                'last_active': time.monotonic()
             }
-        return self.sessions[session_key]
+            self.metrics['sessions_created'] += 1
+        self._enforce_caps(keep=session_key)
+        return session
+
+    def _shard_lock(self, session_key):
+        return self._shard_locks[hash(session_key) % len(self._shard_locks)]
+
+    @contextmanager
+    def session_lock(self, session_key):
+        """Hold a session's lock, creating the session if needed"""
+        with self.get_or_create_session(session_key)['lock']:
+            yield
+
+    @staticmethod
+    def _add_default_robots(robots, spatial):
+        for config in DEFAULT_ROBOTS:
+            robot = Robot3D(
+                config['id'], config['position'].copy(), config['color'])
+            robots[config['id']] = robot
+            spatial.update(config['id'], robot.position)
+
+    @staticmethod
+    def _restore_robots(robots, spatial, snapshot):
+        for state in snapshot['robots']:
+            robot = Robot3D(state['id'], state['position'], state['color'])
+            robot.rotation = state['rotation']
+            robot.is_visible = state['is_visible']
+            robot.movement_count = state['movement_count']
+            action = state.get('action')
+            if action is not None:
+                # start_action() below counts the movement again
+                robot.movement_count -= action_spec(action).is_movement
+            SessionManager._discard_robots(robots, [state['id']])
+            robots[state['id']] = robot
+            if action is not None:
+                robots[state['id']].start_action(action, state['elapsed'])
+            spatial.update(state['id'], robot.position)
+
+    @staticmethod
+    def _discard_robots(robots, robot_ids):
+        """Remove robots, cancelling the scheduled end of their actions"""
+        for robot_id in robot_ids:
+            robot = robots.pop(robot_id, None)
+            if robot is not None:
+                robot.cancel_completion()
+
+    @staticmethod
+    def snapshot_session(session):
+        """Return the persistent part of a session: its robots' poses and looks"""
+        with session['lock']:
+            return {
+                'robots': [
+                    {
+                        'id': robot_id,
+                        'position': list(robot.position),
+                        'rotation': list(robot.rotation),
+                        'color': robot.color,
+                        'is_visible': bool(robot.is_visible),
+                        'movement_count': int(robot.movement_count),
+                    }
+                    for robot_id, robot in list(session['robots'].items())
+                ],
+            }
+
+    def session_state(self, session, robot_ids=None):
+        """Snapshot plus the actions under way, for replicating a session.
+
+        Only ``robot_ids`` are included when given. Moving robots are
+        rewound to where their movement started, so the receiver can replay
+        it part-way through without overshooting.
+        """
+        with session['lock']:
+            robots = session['robots']
+            for robot_id, pose in self.advance_movement(robots).items():
+                session['spatial'].update(robot_id, pose['position'])
+            state = self.snapshot_session(session)
+            if robot_ids is not None:
+                state['robots'] = [
+                    robot_state for robot_state in state['robots']
+                    if robot_state['id'] in robot_ids
+                ]
+            for robot_state in state['robots']:
+                robot = robots[robot_state['id']]
+                if not robot.is_animating:
+                    continue
+                action = robot.current_action
+                robot_state['action'] = action.value
+                robot_state['elapsed'] = robot.action_elapsed
+                robot_state['position'], robot_state['rotation'] = action_origin_pose(
+                    action, robot_state['position'], robot_state['rotation'],
+                    robot.action_progress)
+            return state
+
+    def publish_state(self, session_key, robot_ids=None, removed=(), replace=False):
+        """Send changed robots to the other workers, if a bus is attached.
+
+        ``robot_ids`` are the robots added or changed (None for all of
+        them) and ``removed`` those deleted; ``replace`` tells the receivers
+        to drop every robot not in the message. Each message carries this
+        worker's per-session ``version``, so a receiver applies a robot's
+        changes at most once and never goes back to an older one.
+        """
+        if self.bus is None:
+            return
+        session = self.sessions.get(session_key)
+        if session is None:
+            return
+        with session['lock']:
+            state = self.session_state(session, robot_ids)
+            session['publish_version'] += 1
+            state.update(
+                origin=self.bus.host_id,
+                version=session['publish_version'],
+                removed=list(removed),
+                replace=replace,
+            )
+        self.bus.publish_session(session_key, state)
+
+    def apply_state(self, session_key, state):
+        """Apply robot changes published by another worker.
+
+        Robots not named in the message are left alone, so workers changing
+        different robots of one session do not overwrite each other.
+        """
+        session = self.get_or_create_session(session_key)
+        origin = state.get('origin')
+        version = state.get('version', 0)
+        with session['lock']:
+            robots = session['robots']
+            replicas = session['replicas']
+            if state.get('replace', False):
+                self._discard_robots(robots, list(robots.keys()))
+                session['spatial'].clear()
+                replicas.clear()
+            self._discard_robots(robots, state.get('removed', ()))
+            for robot_id in state.get('removed', ()):
+                session['spatial'].remove(robot_id)
+                replicas.pop(robot_id, None)
+
+            changed = []
+            for robot_state in state['robots']:
+                last = replicas.get(robot_state['id'])
+                if last is not None and last[0] == origin and last[1] >= version:
+                    continue
+                replicas[robot_state['id']] = (origin, version)
+                changed.append(robot_state)
+            self._restore_robots(robots, session['spatial'], {'robots': changed})
+
+            for robot_id in list(session['queues']):
+                if robot_id not in robots:
+                    del session['queues'][robot_id]
+
+    def save_snapshots(self):
+        """Write every changed session to the snapshot store; returns rows written"""
+        if self.store is None:
+            return 0
+        return self.store.save_many({
+            session_key: self.snapshot_session(session)
+            for session_key, session in list(self.sessions.items())
+        })
+
+    def add_client(self, session_key, sid):
+        """Record that a socket joined a session"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            session['clients'].add(sid)
+        self.client_sessions.setdefault(sid, set()).add(session_key)
+
+    def remove_client(self, sid):
+        """Forget a disconnected socket in every session it joined"""
+        for session_key in self.client_sessions.pop(sid, ()):
+            session = self.sessions.get(session_key)
+            if session is not None:
+                with session['lock']:
+                    session['clients'].discard(sid)
+                    session['last_active'] = time.monotonic()
+
+    def set_low_latency(self, session_key, enabled):
+        """Send this session's broadcasts immediately instead of coalescing them"""
+        self.get_or_create_session(session_key)['low_latency'] = bool(enabled)
+
+    def is_low_latency(self, session_key):
+        session = self.sessions.get(session_key)
+        return session is not None and session['low_latency']
+
+    @staticmethod
+    def is_idle(session):
+        """True when no client is connected and nothing is playing or queued"""
+        if session['clients']:
+            return False
+        show = session['choreography']
+        if show is not None and show.state == 'playing':
+            return False
+        if any(queue.current is not None or queue.pending
+               for queue in list(session['queues'].values())):
+            return False
+        robots = session['robots']
+        if isinstance(robots, RobotTable):
+            return not robots.any_animating()
+        return not any(robot.is_animating for robot in list(robots.values()))
+
+    @staticmethod
+    def estimate_bytes(session):
+        return SESSION_BASE_BYTES + ROBOT_BYTES * len(session['robots'])
+
+    def _evict(self, session_key, session, reason):
+        """Drop a session if it is still idle; never waits on a busy session"""
+        shard_lock = self._shard_lock(session_key)
+        if not shard_lock.acquire(blocking=False):
+            return False
+        try:
+            if not session['lock'].acquire(blocking=False):
+                return False
+            try:
+                # Re-entrant: a caller holding this session's lock (and now
+                # creating another session) must not see it evicted under it
+                if session['lock'].depth > 1:
+                    return False
+                if self.sessions.get(session_key) is not session or not self.is_idle(session):
+                    return False
+                if self.store is not None:
+                    self.store.save_many({session_key: self.snapshot_session(session)})
+                    self.store.forget(session_key)
+                del self.sessions[session_key]
+            finally:
+                session['lock'].release()
+        finally:
+            shard_lock.release()
+        self.metrics[reason] += 1
+        logger.debug(f"🧹 Evicted session {session_key} ({reason})")
+        return True
+
+    def _enforce_caps(self, keep=None):
+        """Evict idle sessions in LRU order while over the count or memory cap"""
+        sessions = list(self.sessions.items())
+        total_bytes = sum(self.estimate_bytes(session) for _, session in sessions)
+        count = len(sessions)
+        if count <= self.max_sessions and total_bytes <= self.max_memory_bytes:
+            return
+        for session_key, session in sessions:
+            over_count = count > self.max_sessions
+            over_memory = total_bytes > self.max_memory_bytes
+            if not over_count and not over_memory:
+                return
+            # The session just requested must survive its own creation
+            if session_key == keep or not self.is_idle(session):
+                continue
+            size = self.estimate_bytes(session)
+            if self._evict(session_key, session,
+                           'evicted_session_cap' if over_count else 'evicted_memory_cap'):
+                count -= 1
+                total_bytes -= size
+        if count <= self.max_sessions and total_bytes <= self.max_memory_bytes:
+            return
+        logger.warning(f"⚠️ Session caps exceeded with no idle session to evict "
+                       f"({len(self.sessions)} sessions, ~{total_bytes // 1024} KiB)")
+
+    def evict_idle_sessions(self, now=None):
+        """Evict idle sessions untouched for longer than the TTL; returns the count"""
+        now = time.monotonic() if now is None else now
+        evicted = sum(
+            self._evict(session_key, session, 'evicted_ttl')
+            for session_key, session in list(self.sessions.items())
+            if now - session['last_active'] > self.ttl
+        )
+        self._enforce_caps()
+        return evicted
+
+    def get_metrics(self):
+        return dict(
+            self.metrics,
+            active_sessions=len(self.sessions),
+            connected_clients=len(self.client_sessions),
+            estimated_memory_bytes=sum(
+                self.estimate_bytes(session) for session in list(self.sessions.values())),
+        )
 
     def get_session_robots(self, session_key):
         return self.get_or_create_session(session_key)['robots']
 
+    def add_robot(self, session_key, robot):
+        """Add a robot to a session and index its position"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            session['robots'][robot.robot_id] = robot
+            session['spatial'].update(robot.robot_id, robot.position)
+            stored = session['robots'][robot.robot_id]
+        self.publish_state(session_key, [robot.robot_id])
+        return stored
+
+    def remove_robot(self, session_key, robot_id):
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            if robot_id not in session['robots']:
+                raise KeyError(robot_id)
+            self._discard_robots(session['robots'], [robot_id])
+            session['spatial'].remove(robot_id)
+            session['queues'].pop(robot_id, None)
+        self.publish_state(session_key, [], removed=[robot_id])
+
+    def remove_all_robots(self, session_key):
+        """Remove every robot from a session and return their ids"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            removed = list(session['robots'].keys())
+            self._discard_robots(session['robots'], removed)
+            session['spatial'].clear()
+            session['queues'].clear()
+        self.publish_state(session_key, [], removed=removed)
+        return removed
+
+    def restore_default_robots(self, session_key):
+        """Replace a session's robots with freshly created default robots"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            self._discard_robots(session['robots'], list(session['robots'].keys()))
+            session['spatial'].clear()
+            session['queues'].clear()
+            self._add_default_robots(session['robots'], session['spatial'])
+        self.publish_state(session_key, replace=True)
+        return session['robots']
+
+    def start_action(self, session_key, robot_id, action, elapsed=0.0):
+        """Start an action on one robot, or on every robot for ``"all"``"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            robots = session['robots']
+            if robot_id == "all":
+                self.start_action_all(robots, action, elapsed)
+            elif robot_id in robots:
+                robots[robot_id].start_action(action, elapsed)
+            else:
+                raise KeyError(f"Robot {robot_id} not found")
+        self.publish_state(session_key, None if robot_id == "all" else [robot_id])
+
+    def start_actions(self, session_key, commands, elapsed=0.0):
+        """Start ``[(robot_id, action), ...]`` in order, all or none.
+
+        Raises KeyError listing the unknown robot ids before any action
+        starts; the state is published once for the whole batch.
+        """
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            robots = session['robots']
+            missing = sorted({
+                robot_id for robot_id, _ in commands
+                if robot_id != "all" and robot_id not in robots
+            })
+            if missing:
+                raise KeyError(missing)
+            for robot_id, action in commands:
+                if robot_id == "all":
+                    self.start_action_all(robots, action, elapsed)
+                else:
+                    robots[robot_id].start_action(action, elapsed)
+        robot_ids = {robot_id for robot_id, _ in commands}
+        self.publish_state(session_key, None if "all" in robot_ids else robot_ids)
+
+    def update_positions(self, session_key, poses):
+        """Re-index robots after their poses changed"""
+        session = self.sessions.get(session_key)
+        if session is None:
+            return  # evicted since the caller looked it up
+        with session['lock']:
+            for robot_id, pose in poses.items():
+                if robot_id in session['robots']:
+                    session['spatial'].update(robot_id, pose['position'])
+
+    def find_neighbors(self, session_key, robot_id, radius):
+        """Return ``[(robot_id, distance)]`` of robots within ``radius`` of a robot"""
+        session = self.sessions.get(session_key)
+        if session is None:
+            return []
+        with session['lock']:
+            return session['spatial'].neighbors(robot_id, radius)
+
+    def find_overlaps(self, session_key, robot_ids=None, radius=2 * ROBOT_RADIUS):
+        """Return pairs of robots whose footprints overlap; never creates the session"""
+        session = self.sessions.get(session_key)
+        if session is None:
+            return []
+        with session['lock']:
+            return session['spatial'].overlaps(radius, robot_ids)
+
+    @staticmethod
+    def start_action_all(robots, action, elapsed=0.0):
+        """Start an action on every robot, vectorized for table-backed sessions"""
+        if isinstance(robots, RobotTable):
+            robots.start_action_all(action, elapsed)
+        else:
+            for robot in list(robots.values()):
+                robot.start_action(action, elapsed)
+
+    @staticmethod
+    def advance_movement(robots, now=None):
+        """Advance moving robots; returns ``{robot_id: pose}`` for those that moved"""
+        if isinstance(robots, RobotTable):
+            return robots.advance_movement(now)
+        return {
+            robot_id: {'position': robot.position, 'rotation': robot.rotation}
+            for robot_id, robot in list(robots.items())
+            if robot.advance_movement(now)
+        }
+
+    @staticmethod
+    def serialize_robots(robots):
+        """Return ``{robot_id: state_dict}`` for a session's robots"""
+        if isinstance(robots, RobotTable):
+            return robots.to_dicts()
+        # Iterate a snapshot so a concurrent add or remove cannot break it
+        return {robot_id: robot.to_dict() for robot_id, robot in list(robots.items())}
+
+    def serialize_session(self, session_key):
+        """Serialize a session's robots under its lock"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            return self.serialize_robots(session['robots'])
+
+    def state_delta(self, session_key):
+        """Diff the robots against the last broadcast and advance the version.
+
+        Returns ``{'seq', 'base', 'changed', 'removed'}`` where ``changed``
+        maps each changed robot to its changed fields (all fields for new
+        robots), or None if nothing changed since the last broadcast.
+        """
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            current = self.serialize_robots(session['robots'])
+            baseline = session['state_baseline']
+            changed = {}
+            for robot_id, state in current.items():
+                old = baseline.get(robot_id)
+                # Cached Robot3D dicts are reused while a robot is unchanged
+                if old is state:
+                    continue
+                if old is None:
+                    changed[robot_id] = dict(state)
+                    continue
+                fields = {key: value for key, value in state.items() if old.get(key) != value}
+                if fields:
+                    changed[robot_id] = fields
+            removed = [robot_id for robot_id in baseline if robot_id not in current]
+            if not changed and not removed:
+                return None
+            session['state_baseline'] = current
+            session['state_seq'] += 1
+            return {
+                'seq': session['state_seq'],
+                'base': session['state_seq'] - 1,
+                'changed': changed,
+                'removed': removed,
+            }
+
+    def broadcast_state_delta(self, socketio, session_key):
+        """Emit ``robot_states_delta`` to the session's room if any robot changed"""
+        delta = self.state_delta(session_key)
+        if delta is not None:
+            logger.debug(
+                f"📡 Broadcasting 'robot_states_delta' v{delta['seq']} to session_{session_key} "
+                f"with {len(delta['changed'])} changed robots"
+            )
+            socketio.emit("robot_states_delta", delta, room=f"session_{session_key}")
+        return delta
+
+    def state_snapshot(self, session_key):
+        """Return ``(seq, states)``: the full robot states at the last broadcast version"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            return session['state_seq'], dict(session['state_baseline'])
+
+    def state_seq(self, session_key):
+        """Return the state version last broadcast to a session, 0 if it is gone"""
+        session = self.sessions.get(session_key)
+        if session is None:
+            return 0
+        with session['lock']:
+            return session['state_seq']
+
+    def apply_state_delta(self, session_key, delta):
+        """Follow a delta broadcast by another worker so local snapshots match it"""
+        session = self.get_or_create_session(session_key)
+        with session['lock']:
+            if delta['base'] == session['state_seq']:
+                baseline = dict(session['state_baseline'])
+            else:
+                # Missed part of the history; rebuild from the replicated robots
+                baseline = self.serialize_robots(session['robots'])
+            for robot_id in delta['removed']:
+                baseline.pop(robot_id, None)
+            for robot_id, fields in delta['changed'].items():
+                baseline[robot_id] = dict(baseline.get(robot_id, {}), **fields)
+            session['state_baseline'] = baseline
+            session['state_seq'] = delta['seq']
+
     def reset_session(self, session_key):
         """Reset all robots in a session to their initial positions and states"""
-        if session_key in self.sessions:
-            robots = self.sessions[session_key]['robots']
-            for robot_id, robot in robots.items():
-                # Find the default configuration for this robot
-                default_config = next((config for config in DEFAULT_ROBOTS
-                                       if config['id'] == robot_id), None)
-                if default_config:
-                    robot.reset_to_initial_state(
-                        default_config['position'].copy())
+        session = self.sessions.get(session_key)
+        if session is not None:
+            with session['lock']:
+                robots = session['robots']
+                if isinstance(robots, RobotTable):
+                    robots.reset({config['id']: config['position']
+                                  for config in DEFAULT_ROBOTS})
+                else:
+                    for robot_id, robot in robots.items():
+                        # Find the default configuration for this robot
+                        default_config = next((config for config in DEFAULT_ROBOTS
+                                               if config['id'] == robot_id), None)
+                        if default_config:
+                            robot.reset_to_initial_state(
+                                default_config['position'].copy())
+                session['spatial'].rebuild(robots)
+                session['queues'].clear()
+            self.publish_state(session_key)
         return self.get_session_robots(session_key)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""On-disk session snapshots for the Robot Simulator"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Unset disables snapshots; point it at a mounted volume in production
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("SNAPSHOT_INTERVAL", "30"))
+# Seconds a snapshot is kept after its last change; 0 keeps them forever
+SNAPSHOT_RETENTION = float(os.environ.get("SNAPSHOT_RETENTION", "604800"))
+# WAL needs shared memory next to the file; network volumes such as Cloud
+# Storage FUSE only work with a rollback journal ("delete")
+SNAPSHOT_JOURNAL_MODE = os.environ.get("SNAPSHOT_JOURNAL_MODE", "wal").lower()
+
+
+class SessionSnapshotStore:
+    """Keyed store of compressed session snapshots.
+
+    Backed by SQLite, in WAL mode by default: each save appends to the
+    write-ahead log and the log is periodically folded into the
+    checkpointed database.
+    Loads are a primary-key lookup, so opening the store and restoring one
+    session cost the same however many dormant sessions it holds.
+
+    Encoding and SQLite calls go through ``offload(fn, *args)``, e.g.
+    ``eventlet.tpool.execute``, so large saves and fsyncs do not stall the
+    event loop. ``prune`` deletes snapshots no longer worth restoring.
+    """
+
+    def __init__(self, path, offload=None, journal_mode=SNAPSHOT_JOURNAL_MODE):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.offload = offload
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if journal_mode not in ("wal", "delete", "truncate", "persist"):
+            raise ValueError(f"Unsupported snapshot journal mode: {journal_mode!r}")
+        self._db.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_key TEXT PRIMARY KEY, saved_at REAL, data BLOB)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_saved_at ON sessions (saved_at)"
+        )
+        # Digest of the last blob written per session in memory, to skip
+        # unchanged ones; dropped again by ``forget`` when a session is evicted
+        self._saved = {}
+
+    def _run(self, fn, *args):
+        return self.offload(fn, *args) if self.offload else fn(*args)
+
+    @staticmethod
+    def encode(snapshot):
+        return zlib.compress(
+            json.dumps(snapshot, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def decode(blob):
+        return json.loads(zlib.decompress(blob))
+
+    def load(self, session_key):
+        """Return the snapshot saved for a session, or None"""
+        with self._lock:
+            row = self._run(self._select, session_key)
+        if row is None:
+            return None
+        self._saved[session_key] = zlib.crc32(row[0])
+        try:
+            return self.decode(row[0])
+        except (zlib.error, ValueError) as e:
+            logger.error(f"❌ Corrupt snapshot for session {session_key}: {e}")
+            return None
+
+    def save_many(self, snapshots):
+        """Write ``{session_key: snapshot}`` in one transaction; returns rows written"""
+        with self._lock:
+            digests = self._run(self._write_changed, snapshots)
+        self._saved.update(digests)
+        return len(digests)
+
+    def forget(self, session_key):
+        """Stop tracking a session that left memory; its row stays on disk"""
+        self._saved.pop(session_key, None)
+
+    def prune(self, max_age):
+        """Delete snapshots unchanged for ``max_age`` seconds; returns rows deleted"""
+        if max_age <= 0:
+            return 0
+        with self._lock:
+            deleted = self._run(self._delete_before, time.time() - max_age)
+        # A session still in memory is written again by the next save
+        for session_key in deleted:
+            self._saved.pop(session_key, None)
+        return len(deleted)
+
+    def checkpoint(self):
+        """Fold the write-ahead log into the database file; a no-op outside WAL mode"""
+        with self._lock:
+            self._run(self._db.execute, "PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # The helpers below run under self._lock, possibly on an offload thread
+
+    def _select(self, session_key):
+        return self._db.execute(
+            "SELECT data FROM sessions WHERE session_key = ?", (session_key,)
+        ).fetchone()
+
+    def _write_changed(self, snapshots):
+        """Encode the snapshots and write those that changed; returns their digests"""
+        rows = []
+        digests = {}
+        for session_key, snapshot in snapshots.items():
+            blob = self.encode(snapshot)
+            digest = zlib.crc32(blob)
+            if self._saved.get(session_key) != digest:
+                rows.append((session_key, time.time(), blob))
+                digests[session_key] = digest
+        if not rows:
+            return digests
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return digests
+
+    def _delete_before(self, cutoff):
+        self._db.execute("BEGIN")
+        try:
+            deleted = [row[0] for row in self._db.execute(
+                "SELECT session_key FROM sessions WHERE saved_at < ?", (cutoff,)
+            )]
+            self._db.execute("DELETE FROM sessions WHERE saved_at < ?", (cutoff,))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -3,15 +3,37 @@
 
 import os
 import logging
+import signal
+from eventlet import tpool
 from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from handlers.websocket_handlers import WebSocketHandlers
 from routes.api_routes import APIRoutes
 from routes.robot_routes import RobotRoutes
+from routes.stream_routes import StreamRoutes
 from routes.action_routes import ActionRoutes
+from routes.session_utils import robot_api_url, send_robot_command
+from routes.choreography_routes import ChoreographyRoutes
+from routes.queue_routes import QueueRoutes
 from routes.video_routes import VideoRoutes
+from server.action_queue import ActionQueues
+from server.backpressure import CLIENT_QUEUE_BYTES, OutboundQueues
+from server.broadcast import BROADCAST_WINDOW_MS, CoalescingSocketIO
+from server.camera_control import CameraControlAccumulator
+from server.choreography import ChoreographyPlayer
+from server.event_log import SessionEventLog
+from server.event_stream import EventStreams
+from server.message_bus import MESSAGE_QUEUE, create_client_manager
+from server.movement import MovementIntegrator
+from server.robot_dispatch import RobotDispatcher
+from server.serializers import FastJSONProvider, FastPacket, SocketIOJSON
 from server.session_manager import SessionManager
+from server.snapshot_store import (
+    SNAPSHOT_INTERVAL, SNAPSHOT_PATH, SNAPSHOT_RETENTION, SessionSnapshotStore,
+)
+
+SESSION_SWEEP_INTERVAL = float(os.environ.get("SESSION_SWEEP_INTERVAL", "60"))
 
 
 def setup_logging():
@@ -54,6 +76,7 @@ class RobotWebSocketServer:
         self.app = Flask(
             __name__, template_folder="../templates", static_folder="../static"
         )
+        self.app.json = FastJSONProvider(self.app)
 
         # Get debug mode from environment
         debug_mode = os.environ.get("DEBUG", "False").lower() in (
@@ -75,6 +98,28 @@ class RobotWebSocketServer:
         #     automatic_options=True
         # )
 
+        self.snapshot_store = (
+            # SQLite runs on eventlet's native thread pool, off the event loop
+            SessionSnapshotStore(SNAPSHOT_PATH, offload=tpool.execute)
+            if SNAPSHOT_PATH else None
+        )
+        self.sessions_manager = SessionManager(store=self.snapshot_store)
+        self._shutting_down = False
+        self.event_log = SessionEventLog()
+        self.event_streams = EventStreams(self.event_log)
+
+        # Share rooms and session state with other workers when configured
+        socketio_options = {}
+        if MESSAGE_QUEUE:
+            self.sessions_manager.bus = create_client_manager(
+                MESSAGE_QUEUE,
+                on_session_state=self.sessions_manager.apply_state,
+                on_state_delta=self.sessions_manager.apply_state_delta,
+                on_room_event=self.event_log.record_room,
+                json=SocketIOJSON,
+            )
+            socketio_options["client_manager"] = self.sessions_manager.bus
+
         # Configure SocketIO with debug settings
         self.socketio = SocketIO(
             self.app,
@@ -85,23 +130,75 @@ class RobotWebSocketServer:
             async_mode="eventlet",
             ping_timeout=60,
             ping_interval=25,
-            max_http_buffer_size=1e8 # 100MB
+            max_http_buffer_size=1e8, # 100MB
+            json=SocketIOJSON,
+            serializer=FastPacket,
+            **socketio_options
+        )
+
+        # Room broadcasts, batched or not, are numbered for resuming
+        # clients and fanned out to SSE observers
+        self.event_log.install(self.socketio)
+
+        # Slow clients get compacted per-client queues instead of unbounded buffers
+        self.outbound_queues = (
+            OutboundQueues(self.socketio) if CLIENT_QUEUE_BYTES > 0 else None
+        )
+
+        # Room broadcasts from the components below are coalesced per session
+        self.broadcaster = (
+            CoalescingSocketIO(
+                self.socketio, low_latency=self.sessions_manager.is_low_latency
+            )
+            if BROADCAST_WINDOW_MS > 0 else self.socketio
         )
 
         # Initialize components
-        self.sessions_manager = SessionManager()
-        self.api_routes = APIRoutes(self.app, self.socketio, self.sessions_manager)
+        self.camera_controls = CameraControlAccumulator(self.broadcaster)
+        self.robot_dispatcher = RobotDispatcher(self.broadcaster, send_robot_command)
+        self.api_routes = APIRoutes(
+            self.app, self.broadcaster, self.sessions_manager,
+            camera_controls=self.camera_controls,
+            outbound_queues=self.outbound_queues,
+            event_streams=self.event_streams,
+            event_log=self.event_log,
+            robot_dispatcher=self.robot_dispatcher,
+        )
         self.robot_routes = RobotRoutes(
-            self.app, self.socketio, self.sessions_manager, self.api_routes
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes
         )
         self.action_routes = ActionRoutes(
-            self.app, self.socketio, self.sessions_manager, self.api_routes
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes,
+            self.robot_dispatcher,
         )
         self.video_routes = VideoRoutes(
-            self.app, self.socketio, self.sessions_manager, self.api_routes
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes
+        )
+        self.action_queues = ActionQueues(
+            self.broadcaster, self.sessions_manager, self.action_routes.dispatch_action
+        )
+        self.queue_routes = QueueRoutes(
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes,
+            self.action_queues,
+        )
+        self.choreography_player = ChoreographyPlayer(
+            self.broadcaster, self.sessions_manager,
+            sync_video=self.action_routes.sync_action_video,
+        )
+        self.choreography_routes = ChoreographyRoutes(
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes,
+            self.choreography_player,
+        )
+        self.stream_routes = StreamRoutes(
+            self.app, self.broadcaster, self.sessions_manager, self.api_routes,
+            self.event_streams,
         )
         self.websocket_handlers = WebSocketHandlers(
-            self.socketio, self.sessions_manager
+            self.broadcaster, self.sessions_manager, self.action_queues,
+            self.camera_controls, self.action_routes.run_actions, self.event_log,
+        )
+        self.movement_integrator = MovementIntegrator(
+            self.broadcaster, self.sessions_manager
         )
 
         # Add manual CORS handling to prevent duplicate headers
@@ -149,6 +246,55 @@ class RobotWebSocketServer:
 
             return response
 
+    def _sweep_sessions(self):
+        """Periodically evict idle sessions past their TTL or over the caps"""
+        while True:
+            self.socketio.sleep(SESSION_SWEEP_INTERVAL)
+            try:
+                evicted = self.sessions_manager.evict_idle_sessions()
+                if evicted:
+                    self.logger.info(f"🧹 Evicted {evicted} idle sessions")
+                self.event_log.sweep()
+            except Exception as e:
+                self.logger.error(f"❌ Session sweep failed: {e}")
+
+    def _snapshot_sessions(self):
+        """Periodically persist changed sessions"""
+        while True:
+            self.socketio.sleep(SNAPSHOT_INTERVAL)
+            try:
+                saved = self.sessions_manager.save_snapshots()
+                if saved:
+                    self.logger.debug(f"💾 Saved {saved} session snapshots")
+                pruned = self.snapshot_store.prune(SNAPSHOT_RETENTION)
+                if pruned:
+                    self.logger.info(f"🧹 Deleted {pruned} expired session snapshots")
+            except Exception as e:
+                self.logger.error(f"❌ Session snapshot failed: {e}")
+
+    def _handle_sigterm(self, signum, frame):
+        """Hand the shutdown snapshot to a green thread.
+
+        The handler can interrupt a green thread that holds a session lock,
+        so it takes no locks and does no I/O itself.
+        """
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+        self.socketio.start_background_task(self._shutdown, signum)
+
+    def _shutdown(self, signum):
+        """Snapshot every session, then exit on the signal that asked for it"""
+        try:
+            saved = self.sessions_manager.save_snapshots()
+            self.snapshot_store.checkpoint()
+            self.logger.info(f"💾 Saved {saved} session snapshots before shutdown")
+        except Exception as e:
+            self.logger.error(f"❌ Shutdown snapshot failed: {e}")
+        # Re-deliver the signal with the default handler so the process exits
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
     def run(self):
         debug_mode = os.environ.get("DEBUG", "False").lower() in (
             "true",
@@ -163,6 +309,26 @@ class RobotWebSocketServer:
         )
         self.logger.info(f"🔧 Debug mode: {debug_mode}")
 
+        self.movement_integrator.start()
+        if self.outbound_queues is not None:
+            self.outbound_queues.install()
+        if self.sessions_manager.bus is not None:
+            # Socket.IO starts the bus listener on the first connection; a
+            # worker must apply other workers' session state before that
+            server = self.socketio.server
+            if not server.manager_initialized:
+                server.manager_initialized = True
+                server.manager.initialize()
+        self.socketio.start_background_task(self._sweep_sessions)
+        # Discover the real-robot API URL now and keep it fresh, so no
+        # request waits on the lookup
+        robot_api_url.spawn = self.socketio.start_background_task
+        self.socketio.start_background_task(robot_api_url.run, self.socketio.sleep)
+        if self.snapshot_store is not None:
+            self.logger.info(f"💾 Session snapshots enabled at {SNAPSHOT_PATH}")
+            self.socketio.start_background_task(self._snapshot_sessions)
+            signal.signal(signal.SIGTERM, self._handle_sigterm)
+
         try:
             self.socketio.run(
                 self.app,
@@ -170,6 +336,9 @@ class RobotWebSocketServer:
                 port=self.port,
                 debug=debug_mode,  # Use environment-based debug setting
                 allow_unsafe_werkzeug=True,
+                # Write each SSE message as it is yielded instead of
+                # holding them until 4 KB accumulate
+                minimum_chunk_size=0,
             )
         except Exception as e:
             self.logger.error(f"❌ Server error: {e}")
@@ -42,25 +42,17 @@ const actions = {
 // Idle action
 const idleAction = { "name": null, "sleep_time": 0 };
 
+// The simulator server queues and paces the robot's actions (see
+// /queue_action); the executor runs each action the server starts and
+// mirrors the server's queue from `action_queue` events
 class ActionExecutor {
     constructor(robotId, simulatorEndpoint, sessionKey) {
         this.robotId = robotId;
         this.simulatorEndpoint = simulatorEndpoint;
         this.sessionKey = sessionKey;
-        this.actionQueue = [];
+        this.serverQueue = { current: null, pending: [] };
         this.currentAction = { ...idleAction };
-        this.isRunning = false;
-        this.immediateStopEvent = false;
-        this.queueLock = false;
-        this.stopEvent = false;
-        this.consumerInterval = null;
         this.currentActionTimeout = null;
-
-        this.startConsumer();
-    }
-
-    generateId() {
-        return Date.now().toString(36) + Math.random().toString(36).substr(2);
     }
 
     async runAction(actionName, p1, p2) {
@@ -129,126 +121,57 @@ class ActionExecutor {
         }
     }
 
-    async executeAction(actionItem) {
-        const actionName = actionItem.name;
+    // Run an action the server started; a newer one interrupts it, as on the server
+    async executeAction(actionName) {
         const action = actions[actionName];
+        if (!action) {
+            console.error(`Action '${actionName}' not found in actions dictionary.`);
+            return;
+        }
 
+        if (this.currentActionTimeout) {
+            clearTimeout(this.currentActionTimeout);
+            console.log(`Interrupting action ${this.currentAction.name} for ${actionName}`);
+            await this.runStopAction();
+        }
         this.currentAction = {
             name: action.name,
             sleep_time: action.sleep_time
         };
-
-        try {
-            console.log(`Sending action ${actionName} to robot...`);
-            await this.runAction(actionName, action.action[0], action.action[1]);
-
-            const sleepTime = action.sleep_time * 1000; // Convert to milliseconds
-            console.log(`Waiting ${action.sleep_time} seconds for action ${actionName} to complete...`);
-
-            let elapsed = 0;
-            const checkInterval = 100; // Check every 100ms
-
-            return new Promise((resolve) => {
-                this.currentActionTimeout = setInterval(() => {
-                    if (this.immediateStopEvent) {
-                        console.log(`Stopping action execution for ${actionName}`);
-                        clearInterval(this.currentActionTimeout);
-                        this.immediateStopEvent = false;
-                        this.runStopAction();
-                        this.currentAction = { ...idleAction };
-                        resolve();
-                        return;
-                    }
-
-                    elapsed += checkInterval;
-                    if (elapsed >= sleepTime) {
-                        console.log(`Action ${actionName} completed after ${elapsed / 1000} seconds`);
-                        clearInterval(this.currentActionTimeout);
-                        this.currentAction = { ...idleAction };
-                        resolve();
-                    }
-                }, checkInterval);
-            });
-
-        } catch (error) {
-            console.error(`Error executing action ${actionName}:`, error);
+        this.currentActionTimeout = setTimeout(() => {
+            console.log(`Action ${actionName} completed after ${action.sleep_time} seconds`);
             this.currentAction = { ...idleAction };
-            throw error; // Re-throw to ensure proper error handling in processQueue
-        }
-    }
-
-    removeActionById(actionId) {
-        if (this.queueLock) return;
-
-        this.queueLock = true;
-        this.actionQueue = this.actionQueue.filter(item => item.id !== actionId);
-        this.queueLock = false;
-    }
-
-    startConsumer() {
-        // Wait for 5-second alignment (like Python version)
-        const delay = 5000 - (Date.now() % 5000);
-        console.log(`ActionExecutor: Starting consumer in ${delay}ms to align with 5-second intervals`);
+            this.currentActionTimeout = null;
+        }, action.sleep_time * 1000);
 
-        setTimeout(() => {
-            console.log('ActionExecutor: Consumer started, processing queue every 1 second');
-            this.consumerInterval = setInterval(() => {
-                this.processQueue();
-            }, 1000); // Process queue every second like Python
-        }, delay);
+        console.log(`Sending action ${actionName} to robot...`);
+        await this.runAction(actionName, action.action[0], action.action[1]);
     }
 
-    async processQueue() {
-        if (this.stopEvent) {
-            clearInterval(this.consumerInterval);
-            return;
-        }
-
-        if (this.immediateStopEvent) {
-            console.log("Immediate stop triggered, clearing queue and setting to idle.");
-            this.clearActionQueue();
-            this.currentAction = { ...idleAction };
-            this.isRunning = false;
-            this.immediateStopEvent = false;
-            return;
-        }
-
-        if (this.actionQueue.length > 0 && !this.isRunning) {
-            // Get the first action but don't remove it yet (like Python version)
-            const actionItem = this.actionQueue[0];
-            this.isRunning = true;
-
-            console.log(`Starting action: ${actionItem.name}, queue length: ${this.actionQueue.length}`);
-
-            try {
-                // Execute action and wait for its sleep_time to complete
-                await this.executeAction(actionItem);
-
-                console.log(`Completed action: ${actionItem.name}`);
-
-                // Now remove the completed action from queue
-                this.removeActionById(actionItem.id);
-
-                // Add delay before processing next action (like Python version)
-                setTimeout(() => {
-                    this.isRunning = false;
-                }, 500);
-            } catch (error) {
-                console.error(`Error processing action ${actionItem.name}:`, error);
-                this.removeActionById(actionItem.id);
-                this.isRunning = false;
+    async queueRequest(method, route, body = null) {
+        const url = `/${route}/${this.robotId}?session_key=${this.sessionKey}`;
+        try {
+            const response = await fetch(url, {
+                method: method,
+                headers: { "Content-Type": "application/json" },
+                body: body ? JSON.stringify(body) : undefined
+            });
+            const result = await response.json();
+            if (!result.success) {
+                console.error(`Action queue request failed: ${result.error}`);
+            } else if (result.queues[this.robotId]) {
+                this.handleQueueState(result.queues[this.robotId]);
             }
-        } else if (this.actionQueue.length === 0) {
-            this.isRunning = false;
+            return result;
+        } catch (error) {
+            console.error(`Error reaching the action queue:`, error);
+            return null;
         }
     }
 
     addActionToQueue(actionName) {
-        const actionId = this.generateId();
-
         if (actionName === "stop") {
-            this.stop();
-            return;
+            return this.stop();
         }
 
         if (!(actionName in actions)) {
@@ -256,54 +179,34 @@ class ActionExecutor {
             return;
         }
 
-        if (!this.queueLock) {
-            this.queueLock = true;
-            this.actionQueue.push({ id: actionId, name: actionName });
-            this.queueLock = false;
-        }
+        return this.queueRequest("POST", "queue_action", { action: actionName });
     }
 
-    removeActionFromQueue(actionId) {
-        this.removeActionById(actionId);
+    clearActionQueue() {
+        return this.queueRequest("DELETE", "queue_action");
     }
 
-    clearActionQueue() {
-        if (!this.queueLock) {
-            this.queueLock = true;
-            this.actionQueue = [];
-            this.queueLock = false;
-        }
+    handleQueueState(queue) {
+        this.serverQueue = queue;
     }
 
     getQueueStatus() {
         return {
-            queue: [...this.actionQueue],
+            queue: this.serverQueue.pending.map(name => ({ name: name })),
             current_action: this.currentAction,
-            is_running: this.isRunning
+            is_running: this.currentAction.name !== null || this.serverQueue.current !== null
         };
     }
 
     stop() {
         console.log("Immediate stop requested: clearing queue and interrupting current action.");
-        this.immediateStopEvent = true;
-        this.clearActionQueue();
-
-        // Add stand action after clearing
-        if (!this.queueLock) {
-            this.queueLock = true;
-            const standId = this.generateId();
-            this.actionQueue.push({ id: standId, name: "stand" });
-            this.queueLock = false;
-        }
+        // Stand replaces everything queued or playing on the server
+        return this.queueRequest("POST", "preempt_action", { action: "stand" });
     }
 
     shutdown() {
-        this.stopEvent = true;
-        if (this.consumerInterval) {
-            clearInterval(this.consumerInterval);
-        }
         if (this.currentActionTimeout) {
-            clearInterval(this.currentActionTimeout);
+            clearTimeout(this.currentActionTimeout);
         }
     }
 
@@ -420,6 +323,11 @@ class ActionEventsProxy {
             this.socket.emit('join_session', {
                 session_key: this.sessionKey
             });
+
+            // Pick up the robot's queue as the server has it
+            if (this.actionExecutor) {
+                this.actionExecutor.queueRequest("GET", "queue_action");
+            }
         });
 
         this.socket.on('disconnect', () => {
@@ -441,7 +349,10 @@ class ActionEventsProxy {
             'robot_action',
             'action_result',
             'robot_states',
+            'robot_states_delta',
             'actions',
+            'choreography_step',
+            'action_queue',
             'reset_session',
             'reset_result',
             'change_video_source',
@@ -459,21 +370,47 @@ class ActionEventsProxy {
                 console.log(`📡 Received ${eventType}:`, data);
                 this.addEvent(eventType, data);
 
+                // A choreography step carries several actions; only this robot's apply
+                if (eventType === 'choreography_step' && data && data.steps) {
+                    const robotId = new URLSearchParams(window.location.search).get('robot_id') || this.robotId;
+                    data.steps
+                        .filter(step => step.robot_id === 'all' || step.robot_id === robotId)
+                        .forEach(step => this.runOnRobot(step.action_name));
+                    return;
+                }
+
+                // Mirror this robot's server-side queue
+                if (eventType === 'action_queue' && data && data.queues && this.actionExecutor) {
+                    const robotId = new URLSearchParams(window.location.search).get('robot_id') || this.robotId;
+                    if (data.queues[robotId]) {
+                        this.actionExecutor.handleQueueState(data.queues[robotId]);
+                        this.updateActionStatus();
+                    }
+                    return;
+                }
+
                 // Handle actions events by executing the action
                 if (eventType === 'actions' && data && data.action_name) {
                     console.log(`🎯 Auto-executing action from WebSocket: ${data.action_name}`);
                     const robotId = new URLSearchParams(window.location.search).get('robot_id') || this.robotId;
                     if (data.robot_id === "all")
-                        this.executeAction(data.action_name);
+                        this.runOnRobot(data.action_name);
                     if (data.robot_id && data.robot_id !== robotId) {
                         // Ignore actions for other robots
                         return;
                     }
-                    this.executeAction(data.action_name);
+                    this.runOnRobot(data.action_name);
                 }
             });
         });
 
+        // Events the server coalesced into one frame; replay them in order
+        this.socket.on('batch', (batch) => {
+            batch.events.forEach(({ event, args }) => {
+                this.socket.listeners(event).forEach(listener => listener(...args));
+            });
+        });
+
         console.log(`✅ Subscribed to ${eventTypes.length} event types`);
     }
 
@@ -543,7 +480,7 @@ class ActionEventsProxy {
             case 'action_result':
                 return event.type === 'action_result';
             case 'robot_states':
-                return event.type === 'robot_states';
+                return event.type.startsWith('robot_states');
             case 'error':
                 return event.type.includes('error');
             case 'video':
@@ -621,7 +558,7 @@ class ActionEventsProxy {
             case 'action_result':
                 return eventType === 'action_result';
             case 'robot_states':
-                return eventType === 'robot_states';
+                return eventType.startsWith('robot_states');
             case 'error':
                 return eventType.includes('error');
             case 'video':
@@ -723,13 +660,23 @@ class ActionEventsProxy {
     }
 
     // ActionExecutor integration methods
+    runOnRobot(actionName) {
+        if (!this.actionExecutor) {
+            console.error('❌ ActionExecutor not initialized');
+            return;
+        }
+
+        this.actionExecutor.executeAction(actionName);
+    }
+
+    // Queue an action on the server; it reaches the robot as an `actions` event
     executeAction(actionName) {
         if (!this.actionExecutor) {
             console.error('❌ ActionExecutor not initialized');
             return;
         }
 
-        console.log(`🎯 Executing action: ${actionName}`);
+        console.log(`🎯 Queuing action: ${actionName}`);
         this.actionExecutor.addActionToQueue(actionName);
 
         // Add event for tracking
@@ -8,6 +8,10 @@ class HumanoidSimulator {
         this.socket = null;
         this.scene3d = null;
         this.robots = new Map();
+        /** @type {?number} Version of the last robot state snapshot or delta applied */
+        this.stateSeq = null;
+        /** @type {?{epoch: string, id: number}} Last numbered session event seen, sent back on rejoin */
+        this.lastEvent = null;
         this.isConnected = false;
         this.retryCount = 0;
         this.maxRetries = 5;
@@ -18,9 +22,8 @@ class HumanoidSimulator {
         /** @type {string} Persistent random key for controlled cache busting */
         this.videoCacheKey = localStorage.getItem('video_cache_key') || 'v1';
 
-        // Action queue system for sequential processing
-        this.actionQueue = [];
-        this.isProcessingQueue = false;
+        /** @type {Object<string, {robot_id: string, current: ?string, pending: string[]}>} Server-side action queues, kept current by `action_queue` events */
+        this.actionQueues = {};
 
         // Resize debouncing
         this.resizeTimeout = null;
@@ -248,7 +251,21 @@ class HumanoidSimulator {
 
                 // Join the session
                 console.log(`� Joining session: ${this.sessionKey}`);
-                this.socket.emit('join_session', { session_key: this.sessionKey });
+                // Ask for binary snapshots when the msgpack decoder is loaded
+                const join = { session_key: this.sessionKey };
+                if (window.MessagePack) {
+                    join.encoding = 'msgpack';
+                }
+                // After a drop, ask only for the events we missed
+                if (this.lastEvent) {
+                    join.last_event_id = this.lastEvent.id;
+                    join.epoch = this.lastEvent.epoch;
+                    if (this.stateSeq !== null) {
+                        join.seq = this.stateSeq;
+                    }
+                }
+                this.socket.emit('join_session', join);
+                this.refreshActionQueues();
             });
 
             this.socket.on('disconnect', () => {
@@ -258,11 +275,44 @@ class HumanoidSimulator {
                 this.attemptReconnect();
             });
 
-            this.socket.on('robot_states', (robotStates) => {
+            this.socket.on('robot_states', (robotStates, meta) => {
+                if (meta && meta.encoding === 'msgpack') {
+                    robotStates = window.MessagePack.decode(new Uint8Array(robotStates));
+                }
                 console.log('📡 Real robot states received:', Object.keys(robotStates).length, 'robots');
+                // Full snapshots carry the state version that deltas build on
+                if (meta && meta.seq !== undefined) {
+                    this.stateSeq = meta.seq;
+                }
                 this.updateRobotStates(robotStates);
             });
 
+            // Numbered events and snapshots end with {event_id, epoch}
+            this.socket.onAny((event, ...args) => this.trackEvent(args[args.length - 1]));
+
+            // Events the server coalesced into one frame; replay them in order
+            this.socket.on('batch', (batch) => {
+                batch.events.forEach(({ event, args }) => {
+                    this.trackEvent(args[args.length - 1]);
+                    this.socket.listeners(event).forEach(listener => listener(...args));
+                });
+            });
+
+            // Only the robots (and fields) that changed since version delta.base
+            this.socket.on('robot_states_delta', (delta) => {
+                this.applyStateDelta(delta);
+            });
+
+            // Server-authoritative poses for robots running movement actions
+            this.socket.on('robot_positions', (poses) => {
+                this.updateRobotPositions(poses);
+            });
+
+            // The server runs the action queues; keep a copy for getQueueStatus
+            this.socket.on('action_queue', (data) => {
+                Object.assign(this.actionQueues, data.queues);
+            });
+
             this.socket.on('action_result', (result) => {
                 console.log('📨 Action result:', result);
                 this.handleActionResult(result);
@@ -342,6 +392,12 @@ class HumanoidSimulator {
                 this.handleServerActionRequest(data);
             });
 
+            // Consolidated actions from a server-side choreography step
+            this.socket.on('choreography_step', (data) => {
+                console.log('🎼 Choreography step received:', data);
+                (data.steps || []).forEach(step => this.handleServerActionRequest(step));
+            });
+
             // Speech playback handler for Polly TTS audio
             this.socket.on('speech', (data) => {
                 console.log('🔊 Speech audio received:', data);
@@ -414,6 +470,65 @@ class HumanoidSimulator {
         }
     }
 
+    trackEvent(meta) {
+        if (meta && typeof meta === 'object' && meta.event_id !== undefined && meta.epoch) {
+            this.lastEvent = { epoch: meta.epoch, id: meta.event_id };
+        }
+    }
+
+    applyStateDelta(delta) {
+        if (this.stateSeq === null || this.stateSeq === undefined || !this.scene3d) {
+            return; // Waiting for the snapshot requested on join
+        }
+        if (delta.seq <= this.stateSeq) {
+            return; // Already included in our snapshot
+        }
+        if (delta.base !== this.stateSeq) {
+            console.warn(`⚠️ Missed robot state updates (have v${this.stateSeq}, got v${delta.seq}); resyncing`);
+            this.socket.emit('get_robot_states', {
+                session_key: this.sessionKey,
+                seq: this.stateSeq
+            });
+            this.stateSeq = null;
+            return;
+        }
+
+        delta.removed.forEach(robotId => {
+            this.scene3d.removeRobot(robotId);
+            this.robots.delete(robotId);
+        });
+        const robotCount = this.robots.size;
+        Object.entries(delta.changed).forEach(([robotId, fields]) => {
+            const robotData = Object.assign({}, this.robots.get(robotId), fields, { robot_id: robotId });
+            if (this.robots.has(robotId)) {
+                this.scene3d.updateRobot(robotData);
+            } else {
+                this.scene3d.addRobot(robotData);
+            }
+            this.robots.set(robotId, robotData);
+        });
+        this.stateSeq = delta.seq;
+        if (delta.removed.length || this.robots.size !== robotCount) {
+            this.updateRobotCount();
+        }
+    }
+
+    updateRobotPositions(poses) {
+        if (!this.scene3d) return;
+
+        // Robots that are animating locally interpolate on their own and
+        // ignore these; idle robots snap to the server pose
+        Object.entries(poses).forEach(([robotId, pose]) => {
+            if (this.robots.has(robotId)) {
+                this.scene3d.updateRobot({
+                    robot_id: robotId,
+                    position: pose.position,
+                    rotation: pose.rotation
+                });
+            }
+        });
+    }
+
     setupUIEvents() {
         console.log('🎮 Setting up UI events...');
 
@@ -1079,85 +1194,44 @@ class HumanoidSimulator {
     }
 
     // Action Queue Management Methods
+    // The queues live on the server, which plays each robot's actions in
+    // order and broadcasts them as `actions` events like any other action
     queueAction(robotId, action) {
-        const queueItem = {
-            robotId: robotId,
-            action: action,
-            timestamp: Date.now()
-        };
-
-        this.actionQueue.push(queueItem);
-        console.log(`📋 Action queued: ${action} for ${robotId}. Queue length: ${this.actionQueue.length}`);
-
-        // Start processing if not already processing
-        if (!this.isProcessingQueue) {
-            this.processActionQueue();
-        }
+        return this.queueActions(robotId, [action]);
     }
 
-    async processActionQueue() {
-        if (this.isProcessingQueue || this.actionQueue.length === 0) {
-            return;
-        }
-
-        // Check if a single action is in progress
-        if (this.isActionInProgress) {
-            console.log('⏸️ Queue processing paused - waiting for current action to complete');
-            return;
-        }
-
-        this.isProcessingQueue = true;
-        console.log('🏃 Starting action queue processing...');
-
-        while (this.actionQueue.length > 0) {
-            const queueItem = this.actionQueue.shift();
-            const { robotId, action } = queueItem;
-
-            console.log(`⚡ Processing action: ${action} for ${robotId}`);
-
-            // Start action execution (disable buttons)
-            this.startActionExecution(robotId, action);
+    queueActions(robotId, actions) {
+        console.log(`📋 Queuing ${actions.join(', ')} for ${robotId}`);
+        return this.queueRequest('POST', robotId, { actions: actions });
+    }
 
-            // Send action to backend API instead of local processing
-            try {
-                const response = await fetch(`/run_action/${robotId}?session_key=${this.sessionKey}`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        action: action
-                    })
-                });
+    async queueRequest(method, robotId, body = null) {
+        try {
+            const response = await fetch(`/queue_action/${robotId}?session_key=${this.sessionKey}`, {
+                method: method,
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: body ? JSON.stringify(body) : undefined
+            });
 
-                const data = await response.json();
-                if (data.success) {
-                    console.log(`✅ Action ${action} sent successfully to ${robotId} via backend`);
-                } else {
-                    console.error(`❌ Failed to send action via backend: ${data.error}`);
-                }
-            } catch (error) {
-                console.error(`❌ Error sending action via backend: ${error}`);
+            const data = await response.json();
+            if (data.success) {
+                Object.assign(this.actionQueues, data.queues);
+            } else {
+                console.error(`❌ Action queue request failed: ${data.error}`);
+                this.showNotification(`Action queue: ${data.error}`, 'error');
             }
-
-            // Update last action display
-            this.updateLastAction(robotId, action);
-
-            // Get action duration
-            const duration = this.getActionDuration(action);
-            console.log(`⏱️ Waiting ${duration} seconds for action: ${action}`);
-
-            // Wait for the action to complete
-            await this.sleep(duration * 1000);
-
-            // Complete the action (re-enable buttons)
-            this.enableActionButtons();
-
-            console.log(`✅ Action completed: ${action} for ${robotId}`);
+            return data;
+        } catch (error) {
+            console.error(`❌ Error reaching the action queue: ${error}`);
+            return null;
         }
+    }
 
-        this.isProcessingQueue = false;
-        console.log('🏁 Action queue processing completed');
+    refreshActionQueues() {
+        this.actionQueues = {};
+        return this.queueRequest('GET', 'all');
     }
 
     getActionDuration(action) {
@@ -1165,20 +1239,18 @@ class HumanoidSimulator {
         return this.actionDurations[actionKey] || this.actionDurations['default'];
     }
 
-    sleep(ms) {
-        return new Promise(resolve => setTimeout(resolve, ms));
-    }
-
     clearActionQueue() {
-        this.actionQueue = [];
-        console.log('🗑️ Action queue cleared');
+        console.log('🗑️ Clearing action queues');
+        return this.queueRequest('DELETE', 'all');
     }
 
     getQueueStatus() {
+        const queues = Object.values(this.actionQueues);
+        const next = queues.find(queue => queue.pending.length > 0);
         return {
-            queueLength: this.actionQueue.length,
-            isProcessing: this.isProcessingQueue,
-            nextAction: this.actionQueue.length > 0 ? this.actionQueue[0] : null
+            queueLength: queues.reduce((total, queue) => total + queue.pending.length, 0),
+            isProcessing: queues.some(queue => queue.current),
+            nextAction: next ? { robotId: next.robot_id, action: next.pending[0] } : null
         };
     }
 
@@ -1191,9 +1263,8 @@ class HumanoidSimulator {
 
         console.log(`📋 Queuing ${actions.length} actions for ${robotId}:`, actions);
 
-        actions.forEach(action => {
-            this.queueAction(robotId, action);
-        });
+        // One request, so no other client's actions land in between
+        this.queueActions(robotId, actions);
 
         // Calculate total duration
         let totalDuration = 0;
@@ -1579,9 +1650,6 @@ class HumanoidSimulator {
         // Clear the action queue
         this.clearActionQueue();
 
-        // Stop queue processing
-        this.isProcessingQueue = false;
-
         // Clear action state and re-enable buttons
         this.enableActionButtons();
 
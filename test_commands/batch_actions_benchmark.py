@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Batch Actions Benchmark
+Runs the same commands through one /run_action call each and through one
+/run_actions batch, for a session that controls real robots, and compares
+throughput, real-robot dispatches and the frames the viewers and the robot
+session receive. Robot API calls are replaced by a no-op, so only the
+server's own cost is measured
+
+Run from the repository root; no server, robot or AWS account needed:
+    python test_commands/batch_actions_benchmark.py
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import base64
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from models.robot import Robot3D
+from routes import session_utils
+from routes.action_routes import ROBOT_SESSION_KEY
+from server.websocket_server import RobotWebSocketServer
+
+COMMAND_COUNTS = (50, 200, 500)
+ACTIONS = ("wave", "bow", "kung_fu", "dance_two")
+
+
+def real_robot_key(label):
+    """Encrypt a session key that controls every real robot for the next day"""
+    now = (datetime.now(session_utils.SESSION_TIMEZONE)
+           - session_utils.EXCEL_START_DATE) / timedelta(days=1)
+    payload = json.dumps({"robot": "all", "from": now - 1, "to": now + 1, "label": label})
+    padder = padding.PKCS7(128).padder()
+    data = padder.update(payload.encode()) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(session_utils.SESSION_AES_KEY),
+                       modes.CBC(session_utils.SESSION_AES_IV)).encryptor()
+    return base64.b64encode(encryptor.update(data) + encryptor.finalize()).decode()
+
+
+def frames(client):
+    """Return ``(frames, events)`` received by a Socket.IO test client"""
+    received = client.get_received()
+    events = sum(
+        len(frame["args"][0]["events"]) if frame["name"] == "batch" else 1
+        for frame in received
+    )
+    return len(received), events
+
+
+def run(server, count, batched):
+    app, socketio = server.app, server.socketio
+    session_key = real_robot_key(f"{count}-{batched}")
+    server.sessions_manager.get_or_create_session(session_key)
+    for index in range(7, count + 1):
+        server.sessions_manager.add_robot(
+            session_key, Robot3D(f"robot_{index}", [index, 0, 0], "#FF5733"))
+    commands = [
+        {"robot_id": f"robot_{index}", "action": ACTIONS[index % len(ACTIONS)]}
+        for index in range(1, count + 1)
+    ]
+
+    viewer = socketio.test_client(app)
+    viewer.emit("join_session", {"session_key": session_key})
+    robot_session = socketio.test_client(app)
+    robot_session.emit("join_session", {"session_key": ROBOT_SESSION_KEY})
+    viewer.get_received()
+    robot_session.get_received()
+    dispatched = server.robot_dispatcher.metrics["dispatched"]
+
+    client = app.test_client()
+    query = f"session_key={quote(session_key)}"
+    start = time.perf_counter()
+    if batched:
+        response = client.post(f"/run_actions?{query}", json={"commands": commands})
+        assert response.status_code == 200, response.json
+    else:
+        for command in commands:
+            response = client.post(f"/run_action/{command['robot_id']}?{query}",
+                                   json={"action": command["action"]})
+            assert response.status_code == 200, response.json
+    elapsed = time.perf_counter() - start
+    # Let the dispatcher's background drains and batched emits finish
+    eventlet.sleep(0.2)
+
+    row = (elapsed, server.robot_dispatcher.metrics["dispatched"] - dispatched,
+           frames(viewer), frames(robot_session))
+    viewer.disconnect()
+    robot_session.disconnect()
+    return row
+
+
+def main():
+    server = RobotWebSocketServer(0)
+    logging.getLogger().setLevel(logging.WARNING)
+    server.robot_dispatcher.send = lambda method, robot_id, action: {"success": True}
+
+    print(f"{'commands':>8}  {'path':<10} {'ms':>9} {'cmd/s':>9} {'dispatches':>10}"
+          f"  {'viewer frames/events':>20}  {'robot session frames/events':>27}")
+    for count in COMMAND_COUNTS:
+        for batched in (False, True):
+            elapsed, dispatches, viewer, robot_session = run(server, count, batched)
+            print(f"{count:>8}  {'batch' if batched else 'one-by-one':<10} "
+                  f"{elapsed * 1e3:>9.1f} {count / elapsed:>9.0f} {dispatches:>10}"
+                  f"  {f'{viewer[0]}/{viewer[1]}':>20}  {f'{robot_session[0]}/{robot_session[1]}':>27}")
+
+
+if __name__ == "__main__":
+    main()
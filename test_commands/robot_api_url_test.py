@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Robot API URL Cache Test
+Drives RobotAPIURL with a file source, a hand-advanced clock and a spawn
+that holds background refreshes until the test runs them, and checks
+stale-while-revalidate, URL rotation and the backoff after failed lookups
+
+Run from the repository root; no server, AWS account or real robot needed:
+    python test_commands/robot_api_url_test.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.robot_api_url import FileParameterSource, RobotAPIURL
+
+TTL = 300.0
+RETRY = 10.0
+
+
+class FakeClock:
+    """A monotonic clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class HeldTasks:
+    """A spawn that keeps background tasks until ``run_all``"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def __call__(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run_all(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks:
+            fn(*args)
+        return len(tasks)
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def write(path, url):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(url + "\n")
+
+
+def main():
+    # The failed lookups below are on purpose; keep their errors out of the output
+    logging.disable(logging.ERROR)
+    path = os.path.join(tempfile.mkdtemp(), "robot_api_url")
+    write(path, "http://robots-a.example")
+    clock = FakeClock()
+    tasks = HeldTasks()
+    url = RobotAPIURL(FileParameterSource(path), ttl=TTL, retry=RETRY,
+                      clock=clock, spawn=tasks)
+
+    # Local sources are read up front; a fresh URL needs no lookup
+    check("local source read before the first request", url.get() == "http://robots-a.example")
+    check("fresh URL served without a refresh", not tasks.tasks)
+
+    # Stale-while-revalidate: the old URL is served while the refresh runs
+    write(path, "http://robots-b.example")
+    clock.advance(TTL)
+    check("stale URL served at once", url.get() == "http://robots-a.example")
+    url.get()
+    check("one background refresh for many requests", len(tasks.tasks) == 1)
+    tasks.run_all()
+    check("rotated URL picked up by the refresh", url.get() == "http://robots-b.example")
+    check("rotation counted", url.get_metrics()["changes"] == 2)
+
+    # Failed lookups keep the last URL and back off: retry, 2 x retry, ... up to the TTL
+    os.remove(path)
+    clock.advance(TTL)
+    url.get()
+    waits = []
+    for _ in range(7):
+        tasks.run_all()
+        check_at = clock()
+        while not tasks.tasks:
+            clock.advance(1)
+            url.get()
+        waits.append(clock() - check_at)
+    check("last URL kept while the source is down", url.get() == "http://robots-b.example")
+    print(f"   waits between failed lookups: {waits}")
+    check("failed lookups back off up to the TTL",
+          waits == [RETRY, 2 * RETRY, 4 * RETRY, 8 * RETRY, 16 * RETRY, TTL, TTL])
+    check("error reported", url.get_metrics()["last_error"] is not None)
+
+    # Recovery: the next retry finds the URL and the backoff starts over
+    write(path, "http://robots-c.example")
+    tasks.run_all()
+    check("recovered after the source is back", url.get() == "http://robots-c.example")
+    metrics = url.get_metrics()
+    check("error cleared", metrics["last_error"] is None)
+    clock.advance(TTL - 1)
+    url.get()
+    check("next refresh a full TTL later", not tasks.tasks)
+
+    print(f"   counters: " + ", ".join(
+        f"{name}={metrics[name]}" for name in (
+            "lookups", "failures", "changes", "background_refreshes")
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Real-Robot Outbox Test
+Runs the RobotDispatcher against a local stub standing in for the robot API
+(like robot_proxy_server.py) that can be switched between healthy, down and
+rejecting, and checks retry, coalescing, the circuit breaker and expiry
+
+Run from the repository root; no server or real robot needed:
+    python test_commands/robot_outbox_test.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Short timings so the scenarios finish in seconds
+os.environ.setdefault("ROBOT_RETRY_BASE", "0.05")
+os.environ.setdefault("ROBOT_RETRY_MAX", "0.2")
+os.environ.setdefault("ROBOT_BREAKER_FAILURES", "3")
+os.environ.setdefault("ROBOT_BREAKER_COOLDOWN", "0.5")
+os.environ.setdefault("ROBOT_COMMAND_TTL", "2")
+
+STUB_PORT = 9031
+os.environ["ROBOT_API_URL"] = f"http://127.0.0.1:{STUB_PORT}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.session_utils import send_robot_command
+from server.robot_dispatch import CircuitBreaker, RobotDispatcher
+
+
+class StubRobotAPI(BaseHTTPRequestHandler):
+    """Answers like the robot API; ``status`` picks healthy (200), down (503) or rejecting (400)"""
+
+    status = 200
+    received = []  # (robot_id, action) of every request, delivered or not
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with StubRobotAPI.lock:
+            StubRobotAPI.received.append((self.path.strip("/"), body["action"], self.status))
+        payload = json.dumps({"status": "ok" if self.status == 200 else "error"}).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class RecordingSocketIO:
+    """Collects the events the dispatcher emits"""
+
+    def __init__(self):
+        self.results = {}  # dispatch_id -> real_robot_result payload
+
+    def emit(self, event, data, room=None):
+        if event == "real_robot_result":
+            self.results[data["dispatch_id"]] = data
+
+    def start_background_task(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the dispatcher")
+        time.sleep(0.01)
+
+
+def delivered():
+    return [(robot_id, action) for robot_id, action, status in StubRobotAPI.received
+            if status == 200]
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", STUB_PORT), StubRobotAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    socketio = RecordingSocketIO()
+    dispatcher = RobotDispatcher(socketio, send_robot_command, breaker=CircuitBreaker())
+
+    # Healthy API: every robot gets the command
+    dispatch_id = dispatcher.dispatch("test", "wave", ["robot_1", "robot_2", "robot_3"])
+    wait_for(lambda: dispatch_id in socketio.results)
+    check("healthy API delivers to every robot", socketio.results[dispatch_id]["succeeded"] == 3)
+
+    # API down: the first command is retried, later ones supersede it
+    StubRobotAPI.status = 503
+    StubRobotAPI.received.clear()
+    first = dispatcher.dispatch("test", "wave", ["robot_1"])
+    wait_for(lambda: len(StubRobotAPI.received) >= 3)
+    second = dispatcher.dispatch("test", "bow", ["robot_1"])
+    last = dispatcher.dispatch("test", "left_kick", ["robot_1"])
+    wait_for(lambda: first in socketio.results and second in socketio.results)
+    check("superseded commands are reported, not sent",
+          [socketio.results[d]["results"][0]["status"] for d in (first, second)]
+          == ["superseded", "superseded"])
+    wait_for(lambda: dispatcher.breaker.state != "closed")
+    metrics = dispatcher.get_metrics()
+    print(f"   while down: {metrics['breaker']}, queued {metrics['queued']}, "
+          f"retried {metrics['retried']}")
+    check("circuit opens after repeated failures", metrics["breaker"]["opens"] >= 1)
+    calls_while_open = len(StubRobotAPI.received)
+    time.sleep(0.3)
+    check("open circuit fails fast without calling the API",
+          len(StubRobotAPI.received) == calls_while_open)
+
+    # API back: only the newest command is delivered
+    StubRobotAPI.status = 200
+    wait_for(lambda: last in socketio.results)
+    check("latest command delivered once the robot is reachable",
+          delivered() == [("robot_1", "left_kick")]
+          and socketio.results[last]["results"][0]["status"] == "sent")
+    check("circuit closes again", dispatcher.breaker.state == "closed")
+
+    # Rejected commands are not retried
+    StubRobotAPI.status = 400
+    StubRobotAPI.received.clear()
+    rejected = dispatcher.dispatch("test", "bow", ["robot_2"])
+    wait_for(lambda: rejected in socketio.results)
+    time.sleep(0.2)
+    check("rejected command fails without retries",
+          socketio.results[rejected]["results"][0]["status"] == "failed"
+          and len(StubRobotAPI.received) == 1)
+
+    # Commands undelivered for ROBOT_COMMAND_TTL are dropped
+    StubRobotAPI.status = 503
+    stale = dispatcher.dispatch("test", "wave", ["robot_3"])
+    wait_for(lambda: stale in socketio.results, timeout=10)
+    check("stale command expires", socketio.results[stale]["results"][0]["status"] == "expired")
+    wait_for(lambda: "robot_3" not in dispatcher.get_metrics()["robots"])
+    check("expired command leaves no outbox behind", True)
+
+    metrics = dispatcher.get_metrics()
+    print(f"   counters: " + ", ".join(
+        f"{name}={metrics[name]}" for name in (
+            "dispatched", "sent", "failed", "retried", "superseded", "expired",
+            "short_circuited")
+    ))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Robot Table Store Test
+Runs the same session operations on the dict store and on ROBOT_STORE=table
+and checks that RobotView behaves like Robot3D: field setters and versions,
+snapshot restore, state deltas and replicated session_state messages
+
+Run from the repository root (needs NumPy); no server needed:
+    python test_commands/robot_table_test.py
+"""
+
+import copy
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.robot import Robot3D
+from models.robot_table import RobotTable
+from server.session_manager import SessionManager
+from server.snapshot_store import SessionSnapshotStore
+
+SESSION = "table"
+# Fields that depend on the moment they are read
+TIMING = ("action_progress", "action_elapsed")
+
+
+class LoopbackBus:
+    """Stand-in for the message bus that delivers to one peer at once"""
+
+    def __init__(self, host_id, peer):
+        self.host_id = host_id
+        self.peer = peer
+
+    def publish_session(self, session_key, state):
+        self.peer.apply_state(session_key, copy.deepcopy(state))
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def states(manager):
+    return {
+        robot_id: {key: value for key, value in state.items() if key not in TIMING}
+        for robot_id, state in manager.serialize_session(SESSION).items()
+    }
+
+
+def mutate(manager):
+    """The same edits for both stores"""
+    manager.add_robot(SESSION, Robot3D("extra", [5, 0, 7], "#123456"))
+    manager.remove_robot(SESSION, "robot_2")
+    robot = manager.get_session_robots(SESSION)["robot_1"]
+    robot.rotation = [0, 1.5, 0]
+    robot.movement_count = 4
+    manager.start_action(SESSION, "robot_3", "go_forward")
+    manager.start_action(SESSION, "robot_4", "wave")
+
+
+def main():
+    if not RobotTable.available():
+        print("⚠️ NumPy is not installed; the table store is unavailable")
+        return
+
+    # RobotView field setters and versions
+    table = SessionManager(robot_store="table")
+    view = table.get_session_robots(SESSION)["robot_1"]
+    version = view.version
+    view.movement_count = 3
+    check("movement_count settable", view.movement_count == 3)
+    check("setter bumps version", view.version > version)
+    version = view.version
+    view.touch()
+    check("touch bumps version", view.version > version)
+    version = view.version
+    table.start_action(SESSION, "robot_1", "turn_left")
+    check("start_action bumps version", view.version > version)
+    view.cancel_completion()
+
+    # Same operations, same states
+    reference = SessionManager(robot_store="dict")
+    table = SessionManager(robot_store="table")
+    for manager in (reference, table):
+        mutate(manager)
+    check("table store matches dict store", states(table) == states(reference))
+
+    # Snapshot restore
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    store = SessionSnapshotStore(path)
+    table = SessionManager(robot_store="table", store=store)
+    mutate(table)
+    table.save_snapshots()
+    store.close()
+    restored = SessionManager(robot_store="table", store=SessionSnapshotStore(path))
+    robots = restored.get_session_robots(SESSION)
+    check("restored into a table", isinstance(robots, RobotTable))
+    check("restored robots, poses and counts",
+          sorted(robots) == sorted(table.get_session_robots(SESSION))
+          and robots["extra"].position == [5, 0, 7]
+          and robots["robot_1"].rotation == [0, 1.5, 0]
+          and robots["robot_1"].movement_count == 4)
+
+    # State deltas followed by a worker with the other store
+    table = SessionManager(robot_store="table")
+    follower = SessionManager(robot_store="dict")
+    follower.get_or_create_session(SESSION)
+    for step in (mutate, lambda manager: manager.reset_session(SESSION)):
+        step(table)
+        delta = table.state_delta(SESSION)
+        check("delta produced", delta is not None)
+        follower.apply_state_delta(SESSION, delta)
+        _, followed = follower.state_snapshot(SESSION)
+        _, source = table.state_snapshot(SESSION)
+        check(f"delta v{delta['seq']} followed", followed == source)
+
+    # session_state replication from a table worker to a table worker
+    table = SessionManager(robot_store="table")
+    replica = SessionManager(robot_store="table")
+    table.bus = LoopbackBus("worker-0", replica)
+    replica.get_or_create_session(SESSION)
+    # Only changes made through the manager are published
+    table.add_robot(SESSION, Robot3D("extra", [5, 0, 7], "#123456"))
+    table.remove_robot(SESSION, "robot_2")
+    table.start_action(SESSION, "robot_3", "go_forward")
+    table.start_action(SESSION, "robot_4", "wave")
+    source, copied = states(table), states(replica)
+    check("replica has the same robots and actions",
+          {robot_id: state["current_action"] for robot_id, state in copied.items()}
+          == {robot_id: state["current_action"] for robot_id, state in source.items()})
+    check("moving robot replayed where it is on the table worker",
+          replica.get_session_robots(SESSION)["robot_3"].is_animating
+          and max(abs(a - b) for a, b in zip(source["robot_3"]["position"],
+                                             copied["robot_3"]["position"])) < 0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Robot Simulator Serializer Benchmark
+Compares the stdlib JSON path with the orjson / msgpack serializers
+for robot_states payloads of growing size
+
+Run from the repository root:
+    python test_commands/serializer_benchmark.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from socketio.packet import EVENT, Packet
+
+from models.robot import Robot3D
+from server import serializers
+from server.serializers import FastJSONProvider, FastPacket
+from server.session_manager import SessionManager
+
+ROBOT_COUNTS = (6, 100, 1000)
+TARGET_SECONDS = 0.5
+
+
+def build_states(count):
+    """Return a robot_states payload for a session with ``count`` robots"""
+    sessions = SessionManager()
+    for index in range(7, count + 1):
+        sessions.add_robot(
+            "bench", Robot3D(f"robot_{index}", [index % 50, 0, index // 50], "#FF5733")
+        )
+    sessions.start_action("bench", "all", "wave")
+    return sessions.serialize_session("bench")
+
+
+def time_call(func):
+    """Return the mean seconds per call of ``func``"""
+    func()
+    runs = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(runs):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_SECONDS:
+            return elapsed / runs
+        runs *= 2
+
+
+def socketio_packet(packet_class, states):
+    """Encode a robot_states emit the way python-socketio does"""
+    def encode():
+        return packet_class(EVENT, data=["robot_states", states, {"seq": 1}]).encode()
+    return encode
+
+
+def main():
+    default_app = Flask("stdlib")
+    fast_app = Flask("fast")
+    fast_app.json = FastJSONProvider(fast_app)
+
+    print("🏁 Serializer benchmark")
+    print(f"   orjson: {'yes' if serializers.orjson else 'no'}, "
+          f"msgpack: {'yes' if serializers.msgpack else 'no'}\n")
+    print(f"{'robots':>7} {'path':<26} {'µs/call':>10} {'bytes':>9} {'speedup':>8}")
+
+    for count in ROBOT_COUNTS:
+        states = build_states(count)
+        with default_app.app_context():
+            baseline = time_call(lambda: default_app.json.response(states))
+            size = len(default_app.json.response(states).get_data())
+        with fast_app.app_context():
+            fast = time_call(lambda: fast_app.json.response(states))
+            fast_size = len(fast_app.json.response(states).get_data())
+        rows = [
+            ("HTTP jsonify (Flask json)", baseline, size, baseline),
+            ("HTTP jsonify (fast)", fast, fast_size, baseline),
+        ]
+
+        stdlib_emit = socketio_packet(Packet, states)
+        fast_emit = socketio_packet(FastPacket, states)
+        baseline = time_call(stdlib_emit)
+        rows += [
+            ("Socket.IO emit (json)", baseline, len(stdlib_emit()), baseline),
+            ("Socket.IO emit (fast)", time_call(fast_emit), len(fast_emit()), baseline),
+        ]
+        if serializers.msgpack:
+            rows.append(("Socket.IO emit (msgpack)", time_call(lambda: serializers.pack(states)),
+                         len(serializers.pack(states)), baseline))
+
+        for path, seconds, size, reference in rows:
+            print(f"{count:>7} {path:<26} {seconds * 1e6:>10.1f} {size:>9} "
+                  f"{reference / seconds:>7.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
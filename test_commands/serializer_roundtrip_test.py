@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Serializer Round-Trip Test
+Checks that msgpack is negotiated on join_session, that pack() output
+decodes back to the same robot states, that the Socket.IO packet carries
+it as a binary attachment, and that a msgpack client's robot_states
+snapshot matches the one a JSON client gets
+
+Run from the repository root; no server needed:
+    python test_commands/serializer_roundtrip_test.py
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import logging
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+from socketio.packet import BINARY_EVENT, EVENT
+
+from server.serializers import JSON, MSGPACK, FastPacket, negotiate_encoding, pack
+from server.websocket_server import RobotWebSocketServer
+
+SESSION = "roundtrip"
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def join(socketio, app, **options):
+    """Join the session and return the (states, meta) of its robot_states snapshot"""
+    client = socketio.test_client(app)
+    client.emit("join_session", dict(options, session_key=SESSION))
+    snapshot = next(
+        event for event in client.get_received() if event["name"] == "robot_states"
+    )
+    client.disconnect()
+    return snapshot["args"]
+
+
+def main():
+    check("msgpack negotiated", negotiate_encoding(MSGPACK) == MSGPACK)
+    check("unknown encodings fall back to JSON", negotiate_encoding("cbor") == JSON)
+
+    server = RobotWebSocketServer(0)
+    logging.getLogger().setLevel(logging.WARNING)
+    app, socketio = server.app, server.socketio
+    server.sessions_manager.start_action(SESSION, "robot_1", "go_forward")
+    _, states = server.sessions_manager.state_snapshot(SESSION)
+
+    # pack() round trip, including a type msgpack only encodes through _default
+    decoded = msgpack.unpackb(pack(states), raw=False)
+    check("robot states survive pack/unpack", decoded == states)
+    check("non-native types encoded like JSON",
+          msgpack.unpackb(pack({"day": date(2024, 1, 2)})) == {"day": "2024-01-02"})
+
+    # The packed payload leaves the packet as a binary attachment
+    meta = {"seq": 1, "encoding": MSGPACK}
+    packet = FastPacket(EVENT, data=["robot_states", pack(states), meta])
+    encoded = packet.encode()
+    check("binary event with one attachment",
+          packet.packet_type == BINARY_EVENT and isinstance(encoded, list)
+          and len(encoded) == 2 and isinstance(encoded[1], bytes))
+    received = FastPacket(encoded_packet=encoded[0])
+    received.add_attachment(encoded[1])
+    check("attachment reassembled on decode",
+          msgpack.unpackb(received.data[1], raw=False) == states
+          and received.data[2] == meta)
+
+    # Negotiated snapshot on join_session, against a JSON client's
+    json_states, json_meta = join(socketio, app)
+    binary, binary_meta = join(socketio, app, encoding=MSGPACK)
+    check("JSON client gets no encoding field", "encoding" not in json_meta)
+    check("msgpack client told the encoding", binary_meta.get("encoding") == MSGPACK)
+    check("msgpack snapshot is bytes", isinstance(binary, bytes))
+    binary_states = msgpack.unpackb(binary, raw=False)
+    moving = ("position", "action_progress", "action_elapsed", "body_parts")
+    check("same robots and fields as the JSON snapshot",
+          {robot_id: {k: v for k, v in state.items() if k not in moving}
+           for robot_id, state in binary_states.items()}
+          == {robot_id: {k: v for k, v in state.items() if k not in moving}
+              for robot_id, state in json_states.items()})
+    print(f"   robot_states: {len(binary)} bytes msgpack, "
+          f"{len(FastPacket(EVENT, data=['robot_states', json_states]).encode())} bytes JSON")
+
+
+if __name__ == "__main__":
+    main()
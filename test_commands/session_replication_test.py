@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Session Replication Test
+Links two SessionManagers, standing in for two workers, with an in-memory
+bus that holds messages until the test delivers them. Both workers change
+different robots of one session before either hears from the other, and
+the test checks that both changes survive everywhere, that replaced robots
+leave no scheduled completions behind and that stale messages are ignored
+
+Run from the repository root; no server or message queue needed:
+    python test_commands/session_replication_test.py
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.robot import Robot3D
+from server.scheduler import get_scheduler
+from server.session_manager import SessionManager
+
+SESSION = "shared"
+
+
+class HeldBus:
+    """Stand-in for the message bus that keeps messages until ``deliver``"""
+
+    def __init__(self, host_id):
+        self.host_id = host_id
+        self.peers = []
+        self.outbox = []
+
+    def publish_session(self, session_key, state):
+        self.outbox.append((session_key, copy.deepcopy(state)))
+
+    def deliver(self):
+        messages, self.outbox = self.outbox, []
+        for session_key, state in messages:
+            for peer in self.peers:
+                peer.apply_state(session_key, state)
+        return messages
+
+
+def link(*managers):
+    for index, manager in enumerate(managers):
+        manager.bus = HeldBus(f"worker-{index}")
+    for manager in managers:
+        manager.bus.peers = [other for other in managers if other is not manager]
+
+
+def deliver_all(*managers):
+    return [message for manager in managers for message in manager.bus.deliver()]
+
+
+def actions(manager):
+    robots = manager.get_session_robots(SESSION)
+    return {robot_id: robot.current_action.value for robot_id, robot in robots.items()}
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def main():
+    scheduler = get_scheduler()
+    a, b = SessionManager(), SessionManager()
+    link(a, b)
+    a.get_or_create_session(SESSION)
+    b.get_or_create_session(SESSION)
+
+    # Concurrent writes to different robots: neither worker has seen the other's yet
+    a.start_action(SESSION, "robot_1", "wave")
+    b.start_action(SESSION, "robot_2", "go_forward")
+    deliver_all(a, b)
+    for name, manager in (("worker 0", a), ("worker 1", b)):
+        state = actions(manager)
+        check(f"{name} keeps both changes",
+              state["robot_1"] == "wave" and state["robot_2"] == "go_forward")
+    check("moving robot replayed on the other worker",
+          a.get_session_robots(SESSION)["robot_2"].is_animating)
+    check("one completion per animating robot per worker", len(scheduler) == 4)
+
+    # Replacing a robot cancels the completion of the object it replaces
+    a.start_action(SESSION, "robot_1", "bow")
+    stale = copy.deepcopy(a.bus.outbox)
+    deliver_all(a, b)
+    check("replaced robot's completion cancelled", len(scheduler) == 4)
+
+    # A message applied again, or older than one already applied, is skipped
+    a.start_action(SESSION, "robot_1", "kick")
+    deliver_all(a, b)
+    for session_key, state in stale:
+        b.apply_state(session_key, state)
+    check("stale message ignored", actions(b)["robot_1"] == "kick")
+
+    # Concurrent adds and a removal
+    a.add_robot(SESSION, Robot3D("robot_a", [10, 0, 10], "#FFFFFF"))
+    b.add_robot(SESSION, Robot3D("robot_b", [20, 0, 20], "#000000"))
+    b.remove_robot(SESSION, "robot_2")
+    deliver_all(a, b)
+    for name, manager in (("worker 0", a), ("worker 1", b)):
+        robots = manager.get_session_robots(SESSION)
+        check(f"{name} has both added robots", "robot_a" in robots and "robot_b" in robots)
+        check(f"{name} dropped the removed robot", "robot_2" not in robots)
+    check("removed robot's completions cancelled", len(scheduler) == 2)
+
+    # Restoring the defaults replaces the whole session
+    b.restore_default_robots(SESSION)
+    deliver_all(a, b)
+    check("defaults restored on the other worker",
+          sorted(a.get_session_robots(SESSION)) == sorted(b.get_session_robots(SESSION))
+          and "robot_a" not in a.get_session_robots(SESSION))
+    check("no completions left behind", len(scheduler) == 0)
+
+
+if __name__ == "__main__":
+    main()
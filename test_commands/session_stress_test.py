@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Session Concurrency Stress Test
+Hammers one session from many greenlets while other greenlets churn
+through sessions, so the caps and the idle sweep keep evicting, and checks:
+- no lost updates: every robot added and every locked increment is there
+- eviction never removes a session while its lock is held
+- no deadlock: everything finishes within the time limit
+
+Run from the repository root; no server needed:
+    python test_commands/session_stress_test.py
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import logging
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.robot import Robot3D
+from server.session_manager import SessionManager
+
+WRITERS = 50
+WRITES_PER_WRITER = 40
+HOLDERS = 20
+CHURNERS = 10
+SESSIONS_PER_CHURNER = 100
+TIME_LIMIT = 60
+HOT = "hot"
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+def main():
+    logging.disable(logging.WARNING)
+    # Caps low enough that nearly every new session evicts an older one
+    sessions = SessionManager(max_sessions=8, ttl=0)
+    # A connected client keeps the hot session from being evicted
+    sessions.add_client(HOT, "stress-client")
+    hot = sessions.get_or_create_session(HOT)
+    hot["counter"] = 0
+    evicted_while_locked = []
+
+    def writer(index):
+        for n in range(WRITES_PER_WRITER):
+            sessions.add_robot(HOT, Robot3D(f"w{index}_{n}", [index, 0, n], "#FF5733"))
+            with sessions.session_lock(HOT):
+                value = hot["counter"]
+                eventlet.sleep(0)  # let every other greenlet run mid-update
+                hot["counter"] = value + 1
+            sessions.start_action(HOT, f"w{index}_{n}", random.choice(["wave", "bow"]))
+
+    def holder(index):
+        for n in range(5):
+            session_key = f"held_{index}_{n}"
+            with sessions.session_lock(session_key):
+                session = sessions.sessions.get(session_key)
+                # Creating other sessions under the lock runs the cap
+                # eviction from this very greenlet
+                for m in range(3):
+                    sessions.get_or_create_session(f"held_{index}_{n}_{m}")
+                    eventlet.sleep(0.001)
+                if sessions.sessions.get(session_key) is not session:
+                    evicted_while_locked.append(session_key)
+
+    def churner(index):
+        for n in range(SESSIONS_PER_CHURNER):
+            sessions.get_session_robots(f"churn_{index}_{n}")
+            if n % 10 == 0:
+                sessions.evict_idle_sessions(now=float("inf"))
+            eventlet.sleep(0)
+
+    pool = eventlet.GreenPool()
+    threads = (
+        [pool.spawn(writer, i) for i in range(WRITERS)]
+        + [pool.spawn(holder, i) for i in range(HOLDERS)]
+        + [pool.spawn(churner, i) for i in range(CHURNERS)]
+    )
+    finished = True
+    try:
+        with eventlet.Timeout(TIME_LIMIT):
+            for thread in threads:
+                thread.wait()
+    except eventlet.Timeout:
+        finished = False
+
+    expected = WRITERS * WRITES_PER_WRITER
+    robots = sessions.get_session_robots(HOT)
+    added = sum(1 for robot_id in robots if robot_id.startswith("w"))
+    metrics = sessions.get_metrics()
+    results = [
+        check("no deadlock", finished, f"{len(threads)} greenlets, limit {TIME_LIMIT}s"),
+        check("hot session kept", sessions.sessions.get(HOT) is hot),
+        check("no lost robot updates", added == expected, f"{added}/{expected} robots"),
+        check("no lost locked increments", hot["counter"] == expected,
+              f"{hot['counter']}/{expected}"),
+        check("no session evicted while locked", not evicted_while_locked,
+              ", ".join(evicted_while_locked[:5])),
+        check("caps still enforced", metrics["evicted_session_cap"] + metrics["evicted_ttl"] > 0,
+              f"{metrics['sessions_created']} created, {metrics['evicted_session_cap']} "
+              f"cap / {metrics['evicted_ttl']} TTL evictions, "
+              f"{metrics['active_sessions']} left"),
+    ]
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
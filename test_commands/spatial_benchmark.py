@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Robot Simulator Spatial Query Benchmark
+Compares neighbor and collision lookups through the per-session spatial
+hash with a linear scan of every robot, for sessions of up to 10k robots
+
+Run from the repository root:
+    python test_commands/spatial_benchmark.py
+"""
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import ROBOT_RADIUS
+from models.robot import Robot3D
+from server.session_manager import SessionManager
+
+ROBOT_COUNTS = (100, 1000, 10000)
+# Grid spacing; a bit under one footprint diameter so some robots overlap
+SPACING = 2 * ROBOT_RADIUS - 2
+NEIGHBOR_RADIUS = 4 * ROBOT_RADIUS
+TARGET_SECONDS = 0.5
+
+
+def build_session(count):
+    """Return a SessionManager whose "bench" session holds ``count`` robots on a grid"""
+    sessions = SessionManager()
+    robots = sessions.get_session_robots("bench")
+    for robot_id in list(robots):
+        sessions.remove_robot("bench", robot_id)
+    side = math.ceil(math.sqrt(count))
+    for index in range(count):
+        position = [(index % side) * SPACING, 0, (index // side) * SPACING]
+        sessions.add_robot("bench", Robot3D(f"robot_{index}", position, "#FF5733"))
+    return sessions
+
+
+def time_call(func):
+    """Return the mean seconds per call of ``func``"""
+    func()
+    runs = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(runs):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_SECONDS:
+            return elapsed / runs
+        runs *= 2
+
+
+def scan_neighbors(robots, robot_id, radius):
+    """Linear scan: every robot's distance to one robot"""
+    x, _, z = robots[robot_id].position
+    found = []
+    for other_id, other in robots.items():
+        if other_id == robot_id:
+            continue
+        distance = math.hypot(other.position[0] - x, other.position[2] - z)
+        if distance <= radius:
+            found.append((other_id, distance))
+    found.sort(key=lambda item: item[1])
+    return found
+
+
+def main():
+    print("🏁 Spatial query benchmark")
+    print(f"   grid spacing {SPACING}, neighbor radius {NEIGHBOR_RADIUS}, "
+          f"collision radius {2 * ROBOT_RADIUS}\n")
+    print(f"{'robots':>7} {'query':<24} {'scan µs':>12} {'hash µs':>10} {'speedup':>9}")
+
+    for count in ROBOT_COUNTS:
+        sessions = build_session(count)
+        robots = sessions.get_session_robots("bench")
+        middle = f"robot_{count // 2}"
+
+        hashed = time_call(lambda: sessions.find_neighbors("bench", middle, NEIGHBOR_RADIUS))
+        scanned = time_call(lambda: scan_neighbors(robots, middle, NEIGHBOR_RADIUS))
+        # Same robots either way (ties in distance may come out in another order)
+        assert {r for r, _ in sessions.find_neighbors("bench", middle, NEIGHBOR_RADIUS)} == {
+            r for r, _ in scan_neighbors(robots, middle, NEIGHBOR_RADIUS)
+        }
+        print(f"{count:>7} {'neighbors of one robot':<24} {scanned * 1e6:>12.1f} "
+              f"{hashed * 1e6:>10.1f} {scanned / hashed:>8.1f}x")
+
+        hashed = time_call(lambda: sessions.find_overlaps("bench"))
+        # A full pairwise scan is one linear scan per robot
+        scanned *= count
+        pairs = len(sessions.find_overlaps("bench"))
+        print(f"{count:>7} {'all collisions':<24} {scanned * 1e6:>12.1f} "
+              f"{hashed * 1e6:>10.1f} {scanned / hashed:>8.1f}x  ({pairs} pairs)")
+        print()
+    print("Collision scan times are one neighbor scan per robot, extrapolated.")
+
+
+if __name__ == "__main__":
+    main()